@@ -1,20 +1,103 @@
+import asyncio
 import os
-from typing import Any, Dict, List
-import google.generativeai as genai
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+
+# 재시도할 응답 코드 (429 rate limit, 5xx 일시 장애)
+RETRYABLE_CODES = {429, 500, 503, 504}
+
+
+def is_retryable(exc: Exception) -> bool:
+    """google.api_core 예외(ResourceExhausted 등)는 HTTP 상태 코드를 code 로 가지고 있음"""
+    code = getattr(exc, "code", None)
+    try:
+        return int(code) in RETRYABLE_CODES
+    except (TypeError, ValueError):
+        return False
+
+
+class ConversationHistory:
+    """사용자별 최근 대화 몇 턴만 보관 (질문/답변 원문만 저장하고 참고 자료는 넣지 않음)"""
+
+    def __init__(self, max_turns: int):
+        self.max_turns = max_turns
+        self._lock = threading.Lock()
+        self._turns: Dict[str, Deque[Tuple[str, str]]] = {}
+
+    def get(self, user_id: Optional[str]) -> List[Tuple[str, str]]:
+        if not user_id or self.max_turns <= 0:
+            return []
+        with self._lock:
+            return list(self._turns.get(user_id, ()))
+
+    def append(self, user_id: Optional[str], question: str, answer: str) -> None:
+        if not user_id or self.max_turns <= 0:
+            return
+        with self._lock:
+            turns = self._turns.setdefault(user_id, deque(maxlen=self.max_turns))
+            turns.append((question, answer))
+
+    def clear(self, user_id: str) -> None:
+        with self._lock:
+            self._turns.pop(user_id, None)
 
 
 class GeminiClient:
-    def __init__(self, api_key: str):
+    """상태 없는 Gemini 클라이언트
+
+    chat_session 을 공유하지 않고 요청마다 프롬프트(+ 선택적으로 user_id 별 최근 history_turns 턴)만
+    보내므로 여러 사용자가 동시에 써도 안전합니다. 동시 호출 수는 max_concurrency 로 제한하고,
+    rate limit / 일시 장애는 지수 backoff 로 재시도합니다.
+
+    model 에 generate_content / generate_content_async 를 가진 객체를 넘기면 실제 API 대신
+    그 객체를 씁니다 (rag.llm_bench.FakeGenerativeModel 참고). api_endpoint 로 로컬 가짜 서버를
+    가리킬 수도 있습니다.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str = "gemini-2.0-flash",
+        max_concurrency: int = 8,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        history_turns: int = 0,
+        api_endpoint: Optional[str] = None,
+        model: Any = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.history = ConversationHistory(history_turns)
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        # 루프가 사라지면 항목도 같이 사라지도록 루프 객체를 약한 참조 키로 씀
+        self._async_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+        if model is not None:
+            self.model = model
+            return
+
         self.api_key = os.getenv("GOOGLE_API_KEY", api_key)
         if not self.api_key:
             raise ValueError("GOOGLE_API_KEY가 존재하지 않습니다.")
-        
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel("gemini-2.0-flash")
-        self.chat_session = self.model.start_chat(history=[])
 
-    def generate_response(self, prompt: str, context: List[Dict[str, Any]]) -> str:
-        
+        # Gemini SDK 는 import 만 1초 넘게 걸리므로 실제 클라이언트를 만들 때 불러옴
+        import google.generativeai as genai
+
+        api_endpoint = api_endpoint or os.getenv("GEMINI_API_ENDPOINT")
+        if api_endpoint:
+            genai.configure(api_key=self.api_key, transport="rest", client_options={"api_endpoint": api_endpoint})
+        else:
+            genai.configure(api_key=self.api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    def build_prompt(self, prompt: str, context: List[Dict[str, Any]]) -> str:
         basic_text = ""
         for i, chunk in enumerate(context, 1):
             basic_text += f"\n[출처 {i}] {chunk['chapter_name']} - {chunk['sub_chapter_name']}\n"
@@ -41,6 +124,94 @@ class GeminiClient:
         - 가능한 한 친절하고 이해하기 쉽게 설명하세요.
         - 참고 자료에 없는 얘기라면 일반적인 답변을 해주세요. 단 일반적인 답변이라고 명시해주세요.
         """
-        
-        response = self.chat_session.send_message(final_prompt, stream=False)
-        return response.text
\ No newline at end of file
+        return final_prompt
+
+    def build_contents(self, prompt: str, context: List[Dict[str, Any]], user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        contents = []
+        for question, answer in self.history.get(user_id):
+            contents.append({"role": "user", "parts": [question]})
+            contents.append({"role": "model", "parts": [answer]})
+        contents.append({"role": "user", "parts": [self.build_prompt(prompt, context)]})
+        return contents
+
+    def _backoff(self, attempt: int) -> float:
+        return self.backoff_base * (2 ** attempt) * (0.5 + random.random())
+
+    def _async_semaphore(self) -> asyncio.Semaphore:
+        # asyncio.Semaphore 는 이벤트 루프에 묶이므로 루프마다 따로 만듦
+        loop = asyncio.get_running_loop()
+        semaphore = self._async_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._async_semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    # --- 동기 API ----------------------------------------------------------
+    def generate_response(self, prompt: str, context: List[Dict[str, Any]], user_id: Optional[str] = None) -> str:
+        contents = self.build_contents(prompt, context, user_id)
+        with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = self.model.generate_content(contents)
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries or not is_retryable(e):
+                        raise
+                    time.sleep(self._backoff(attempt))
+        self.history.append(user_id, prompt, response.text)
+        return response.text
+
+    def generate_response_stream(
+        self, prompt: str, context: List[Dict[str, Any]], user_id: Optional[str] = None
+    ) -> Iterator[str]:
+        """모델이 만드는 대로 답변 조각을 바로 yield (첫 조각 전까지만 재시도)"""
+        contents = self.build_contents(prompt, context, user_id)
+        chunks = []
+        with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    for chunk in self.model.generate_content(contents, stream=True):
+                        # 안전 필터 등으로 text 가 없는 조각은 chunk.text 접근 시 예외가 나므로 건너뜀
+                        if chunk.parts:
+                            chunks.append(chunk.text)
+                            yield chunk.text
+                    break
+                except Exception as e:
+                    if chunks or attempt == self.max_retries or not is_retryable(e):
+                        raise
+                    time.sleep(self._backoff(attempt))
+        self.history.append(user_id, prompt, "".join(chunks))
+
+    # --- 비동기 API --------------------------------------------------------
+    async def agenerate_response(self, prompt: str, context: List[Dict[str, Any]], user_id: Optional[str] = None) -> str:
+        contents = self.build_contents(prompt, context, user_id)
+        async with self._async_semaphore():
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = await self.model.generate_content_async(contents)
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries or not is_retryable(e):
+                        raise
+                    await asyncio.sleep(self._backoff(attempt))
+        self.history.append(user_id, prompt, response.text)
+        return response.text
+
+    async def agenerate_response_stream(
+        self, prompt: str, context: List[Dict[str, Any]], user_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        contents = self.build_contents(prompt, context, user_id)
+        chunks = []
+        async with self._async_semaphore():
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = await self.model.generate_content_async(contents, stream=True)
+                    async for chunk in response:
+                        if chunk.parts:
+                            chunks.append(chunk.text)
+                            yield chunk.text
+                    break
+                except Exception as e:
+                    if chunks or attempt == self.max_retries or not is_retryable(e):
+                        raise
+                    await asyncio.sleep(self._backoff(attempt))
+        self.history.append(user_id, prompt, "".join(chunks))
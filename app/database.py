@@ -1,15 +1,21 @@
 # Standard Libraries
 import datetime
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Union
 
 # Third-party Libraries
-from sqlalchemy import DateTime, create_engine
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
+from sqlalchemy import URL, DateTime, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.sql import func
 
 # Local Application Modules
 import config
 
+# DATABASE_URL 이 동기 드라이버(postgresql://, mysql+pymysql://, sqlite:///)로 돼 있어도 비동기 드라이버로 바꿔 씀
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "mysql": "aiomysql", "sqlite": "aiosqlite"}
+ASYNC_DRIVER_NAMES = {"asyncpg", "psycopg", "aiomysql", "asyncmy", "aiosqlite"}
+
 
 class Base(DeclarativeBase):
     created_at: Mapped[datetime.datetime] = mapped_column(
@@ -25,7 +31,40 @@ class Base(DeclarativeBase):
     )
 
 
-SQLALCHEMY_DATABASE_URL = config.DATABASE_URL
+def async_database_url(url: Union[str, URL]) -> URL:
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend in ASYNC_DRIVERS and url.get_driver_name() not in ASYNC_DRIVER_NAMES:
+        url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return url
+
+
+def make_engine(url: Union[str, URL], **options) -> AsyncEngine:
+    """커넥션 풀 크기를 정해서 비동기 엔진을 만듦 (SQLite 는 풀 설정 없이)"""
+    url = async_database_url(url)
+    if url.get_backend_name() != "sqlite":
+        options = {
+            "pool_size": config.DB_POOL_SIZE,
+            "max_overflow": config.DB_MAX_OVERFLOW,
+            "pool_timeout": config.DB_POOL_TIMEOUT,
+            "pool_recycle": config.DB_POOL_RECYCLE,
+            **options,
+        }
+    return create_async_engine(url, pool_pre_ping=True, **options)
+
+
+# import 할 때는 DATABASE_URL 을 읽거나 DB 드라이버를 불러오지 않고, 처음 쓸 때 엔진을 만듦
+# (엔진을 만들 때도 접속하지 않고, 세션이 처음 쿼리를 보낼 때 풀에서 커넥션을 꺼냄)
+@lru_cache(maxsize=None)
+def get_engine() -> AsyncEngine:
+    return make_engine(config.DATABASE_URL)
+
+
+@lru_cache(maxsize=None)
+def get_sessionmaker() -> async_sessionmaker:
+    return async_sessionmaker(bind=get_engine(), autoflush=False, expire_on_commit=False)
+
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+async def dispose_engine() -> None:
+    if get_engine.cache_info().currsize:
+        await get_engine().dispose()
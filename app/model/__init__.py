@@ -0,0 +1,4 @@
+# Local Application Modules
+from app.model.rag_log import RagAnswerLog, RagQueryLog, question_hash
+
+__all__ = ["RagAnswerLog", "RagQueryLog", "question_hash"]
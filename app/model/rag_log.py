@@ -0,0 +1,67 @@
+# Standard Libraries
+import hashlib
+from typing import Any, Dict, List, Optional
+
+# Third-party Libraries
+from sqlalchemy import JSON, BigInteger, Boolean, Float, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+# Local Application Modules
+from app.database import Base
+
+# SQLite 는 INTEGER PRIMARY KEY 만 자동 증가하므로 SQLite 에서는 Integer 로
+LogId = BigInteger().with_variant(Integer(), "sqlite")
+
+
+def question_hash(question: str) -> str:
+    """공백/대소문자만 다른 질문을 같은 질문으로 묶는 키 (자주 묻는 질문 집계용)"""
+    normalized = " ".join(question.split()).lower()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class RagQueryLog(Base):
+    """RAG 질의 한 건: 질문, 필터, 답변 캐시 적중 여부, 단계별 시간, 토큰 수"""
+
+    __tablename__ = "rag_query_log"
+    __table_args__ = (
+        Index("ix_rag_query_log_created_at", "created_at"),
+        Index("ix_rag_query_log_question_hash", "question_hash"),
+    )
+
+    id: Mapped[int] = mapped_column(LogId, primary_key=True, autoincrement=True)
+    trace_id: Mapped[str] = mapped_column(String(32), index=True)  # rag.trace 로그와 같은 ID
+    route: Mapped[str] = mapped_column(String(32))  # query, query_stream
+    question: Mapped[str] = mapped_column(Text)
+    question_hash: Mapped[str] = mapped_column(String(40))
+    filters: Mapped[Optional[Dict[str, List[str]]]] = mapped_column(JSON)
+    cache_hit: Mapped[bool] = mapped_column(Boolean, default=False)
+    total_ms: Mapped[float] = mapped_column(Float)
+    timings: Mapped[Dict[str, float]] = mapped_column(JSON, default=dict)  # 단계별 ms (embed_ms, search_ms ...)
+    candidates: Mapped[Optional[int]] = mapped_column(Integer)
+    context_chunks: Mapped[int] = mapped_column(Integer, default=0)
+    prompt_tokens: Mapped[Optional[int]] = mapped_column(Integer)
+    response_tokens: Mapped[Optional[int]] = mapped_column(Integer)
+    error: Mapped[Optional[str]] = mapped_column(String(200))  # 답변을 끝까지 못 만든 이유
+
+    answer: Mapped[Optional["RagAnswerLog"]] = relationship(
+        back_populates="query",
+        uselist=False,
+        cascade="all, delete-orphan",
+    )
+
+
+class RagAnswerLog(Base):
+    """질의 한 건의 답변과 context 로 넣은 청크 ID"""
+
+    __tablename__ = "rag_answer_log"
+
+    id: Mapped[int] = mapped_column(LogId, primary_key=True, autoincrement=True)
+    query_id: Mapped[int] = mapped_column(
+        LogId,
+        ForeignKey("rag_query_log.id", ondelete="CASCADE"),
+        unique=True,
+    )
+    answer: Mapped[str] = mapped_column(Text)
+    chunk_ids: Mapped[List[Any]] = mapped_column(JSON, default=list)
+
+    query: Mapped[RagQueryLog] = relationship(back_populates="answer")
@@ -1,53 +1,64 @@
+# Standard Libraries
+import math
+from typing import Any, Dict, Optional
+
 # Third-party Libraries
-from fastapi import APIRouter, Depends, Path
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi_pagination import Page, paginate
-from sqlalchemy.orm import Session
 from typing_extensions import Annotated
-import xml.etree.ElementTree as ET
-import requests
-import xmltodict
 
 # Local Application Modules
-from app.utils import get_db
-import config
+from app.service.emergency import EmergencyHospitalService, HospitalIndex, HospitalIndexUnavailable
 
 router = APIRouter()
 
+
+def get_emergency_service(request: Request) -> EmergencyHospitalService:
+    return request.app.state.emergency_service
+
+
+async def get_hospital_index(
+    service: EmergencyHospitalService = Depends(get_emergency_service),
+) -> HospitalIndex:
+    try:
+        return await service.get_index()
+    except HospitalIndexUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="응급의료기관 정보를 가져오지 못했습니다.",
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    except (httpx.HTTPError, KeyError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="응급의료기관 정보를 가져오지 못했습니다.",
+        )
+
+
 @router.get(
     path="/",
     tags=["공공데이터포털"],
     summary="국립중앙의료원_전국 응급의료기관 정보 조회 서비스",
+    response_model=Page[Dict[str, Any]],
 )
-def get_emergency_infos(db: Session = Depends(get_db)):
-    url = "http://apis.data.go.kr/B552657/ErmctInfoInqireService/getEgytBassInfoInqire"
-    params = {"serviceKey": config.DATA_SECRET_KEY, "numOfRows": 1000, "pageNo": 1}
-
-    response = requests.get(url, params=params)
-    data_dict = xmltodict.parse(response.content)
-
-    items = data_dict["response"]["body"]["items"]["item"]
-
-    filtered = []
-    # 산부인과 응급 대응 가능 병원을 뽑는 로직
-    for item in items:
-        # 응급실 여부
-        is_hvec = int(item.get("hvec") or 0) > 0
-        # 응급실 운영 여부
-        is_dutyEryn = item.get("dutyEryn", "0") == "1"
-        # 산부인과 여부
-        is_OB_GYN = "산부인과" in item.get("dgidIdName", "")
-        # 산부인과 응급상황 대응 가능 여부 = 조산 산모 수용 가능
-        is_MKioskTy8 = item.get("mkioskTy8", "N") == "Y"
-        # 산부인과 응급상황 대응 가능 여부 = 신생아 수용 가능
-        is_MKioskTy10 = item.get("mkioskTy10", "N") == "Y"
-
-        if is_hvec and is_dutyEryn and (is_OB_GYN or is_MKioskTy8 or is_MKioskTy10):
-            filtered.append({
-                "기관명": item.get("dutyName", ""),
-                "우편번호": item.get("postCdn1", "") + item.get("postCdn2", ""),
-                "주소": item.get("dutyAddr", ""),
-                "대표전화": item.get("dutyTel1", ""),
-                "응급실전화": item.get("dutyTel3", ""),
-            })
-
-    return {"data": filtered}
+async def get_emergency_infos(
+    index: HospitalIndex = Depends(get_hospital_index),
+    sido: Annotated[Optional[str], Query(description="시도 (예: 서울, 경기도)")] = None,
+    sigungu: Annotated[Optional[str], Query(description="시군구 (예: 강남구)")] = None,
+    postal_code: Annotated[Optional[str], Query(description="우편번호 (앞자리만 넣어도 됨)")] = None,
+    lat: Annotated[Optional[float], Query(ge=-90, le=90, description="내 위치 위도")] = None,
+    lon: Annotated[Optional[float], Query(ge=-180, le=180, description="내 위치 경도")] = None,
+    nearest: Annotated[int, Query(ge=1, le=100, description="위치를 주면 가까운 병원 몇 곳을 찾을지")] = 10,
+):
+    ids = index.filter(sido=sido, sigungu=sigungu, postal_code=postal_code)
+
+    if lat is not None and lon is not None:
+        filtered = [
+            {**index.hospitals[i], "거리_km": round(distance, 2)}
+            for i, distance in index.nearest(lat, lon, limit=nearest, ids=ids)
+        ]
+    else:
+        filtered = [index.hospitals[i] for i in ids]
+
+    return paginate(filtered)
@@ -1,10 +1,4 @@
 # Third-party Libraries
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter
 
-# Local Application Modules
-from app import model
-from app.service import dashboard
-from app.utils import ResponseAnnotationHandler, get_db
-
-router = APIRouter()
\ No newline at end of file
+router = APIRouter()
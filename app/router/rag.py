@@ -0,0 +1,180 @@
+# Standard Libraries
+import json
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+# Third-party Libraries
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing_extensions import Annotated
+
+# Local Application Modules
+from app.utils import get_db
+from rag.facets import AGE_GROUPS, RetrievalFilter
+
+# 파이프라인(numpy)과 질의 기록(SQLAlchemy)은 타입에만 쓰고, 실제 객체는 lifespan 이 만들어 app.state 에 둠
+# (main 을 import 할 때 이 라우터가 무거운 모듈을 올리지 않도록)
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.service.query_log import QueryLogWriter
+    from rag.pipeline import RagPipeline, RagResult
+
+router = APIRouter()
+
+
+class RagQueryRequest(BaseModel):
+    query: str = Field(..., min_length=1, description="질문")
+    top_k: int = Field(20, ge=1, le=200, description="벡터 검색 후보 수 (BM25 후보와 RRF 로 합침)")
+    token_budget: int = Field(3000, ge=100, le=30000, description="context 토큰 예산")
+    user_id: Optional[str] = Field(None, description="대화 기록을 이어갈 사용자 ID")
+    source: Optional[List[str]] = Field(None, description="출처 필터 (book, youtube, pediatrics)")
+    chapter: Optional[List[str]] = Field(None, description="챕터 ID 필터 (예: 01)")
+    age: Optional[List[str]] = Field(None, description=f"연령대 필터 ({', '.join(AGE_GROUPS)})")
+
+    def filters(self) -> RetrievalFilter:
+        return RetrievalFilter(source=self.source, chapter=self.chapter, age=self.age)
+
+
+class RagSource(BaseModel):
+    chunk_id: str
+    bookname: str
+    chapter_name: str
+    sub_chapter_name: str
+    paragraph_id: str
+    content: str
+    score: float
+
+
+class RagQueryResponse(BaseModel):
+    answer: str
+    cache_hit: bool
+    sources: List[RagSource]
+    timings: Dict[str, float]
+    prompt_tokens: Optional[int] = None
+    trace_id: Optional[str] = None  # 서버 rag.trace 로그와 맞춰볼 때 씀
+
+
+def get_pipeline(request: Request) -> "RagPipeline":
+    pipeline = getattr(request.app.state, "rag_pipeline", None)
+    if pipeline is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="RAG 파이프라인이 준비되지 않았습니다.")
+    return pipeline
+
+
+def get_query_log(request: Request) -> "Optional[QueryLogWriter]":
+    return getattr(request.app.state, "query_log", None)
+
+
+def _finish(
+    result: "RagResult",
+    route: str,
+    query_log: "Optional[QueryLogWriter]",
+    answer: Optional[str],
+    error: Optional[str] = None,
+) -> None:
+    """trace 를 마무리하고 질의 기록을 큐에 넣음 (DB 쓰기는 QueryLogWriter 가 나중에 배치로)"""
+    from app.service.query_log import QueryLogEntry
+
+    record = result.trace.finish(route=route)
+    if query_log is not None:
+        query_log.record(QueryLogEntry.from_result(result, record, answer, error))
+
+
+def _sources(context: List[dict]) -> List[RagSource]:
+    return [RagSource(**item) for item in context]
+
+
+async def _retrieve(body: RagQueryRequest, pipeline: "RagPipeline"):
+    filters = body.filters()
+    if filters and pipeline.facet_index is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="필터 색인이 준비되지 않았습니다.")
+    return await pipeline.aretrieve(body.query, body.top_k, body.token_budget, filters, body.user_id)
+
+
+@router.get(
+    path="/filters",
+    tags=["RAG"],
+    summary="RAG 검색 필터 값 목록",
+)
+async def filter_options(pipeline: "RagPipeline" = Depends(get_pipeline)) -> Dict[str, List[Dict[str, Any]]]:
+    return pipeline.filter_options()
+
+
+@router.post(
+    path="/query",
+    tags=["RAG"],
+    summary="육아 가이드 RAG 질의",
+    response_model=RagQueryResponse,
+)
+async def query(
+    body: RagQueryRequest,
+    pipeline: "RagPipeline" = Depends(get_pipeline),
+    query_log: "Optional[QueryLogWriter]" = Depends(get_query_log),
+):
+    result = await _retrieve(body, pipeline)
+    try:
+        answer = await pipeline.aanswer(result, user_id=body.user_id)
+    except Exception as e:
+        # Gemini 오류/타임아웃으로 실패한 요청도 단계별 시간과 오류 종류를 남김
+        _finish(result, "query", query_log, None, type(e).__name__)
+        raise
+    _finish(result, "query", query_log, answer)
+    return RagQueryResponse(
+        answer=answer,
+        cache_hit=result.cache_hit,
+        sources=_sources(result.context),
+        timings=result.timings,
+        prompt_tokens=result.report.prompt_tokens if result.report else None,
+        trace_id=result.trace.trace_id,
+    )
+
+
+@router.post(
+    path="/query/stream",
+    tags=["RAG"],
+    summary="육아 가이드 RAG 질의 (답변 스트리밍)",
+)
+async def query_stream(
+    body: RagQueryRequest,
+    pipeline: "RagPipeline" = Depends(get_pipeline),
+    query_log: "Optional[QueryLogWriter]" = Depends(get_query_log),
+):
+    """첫 줄은 출처 JSON, 이후로는 답변 조각을 그대로 흘려보냅니다."""
+    result = await _retrieve(body, pipeline)
+
+    async def body_iter():
+        head = {
+            "cache_hit": result.cache_hit,
+            "sources": [source.model_dump() for source in _sources(result.context)],
+            "timings": result.timings,
+            "trace_id": result.trace.trace_id,
+        }
+        yield json.dumps(head, ensure_ascii=False) + "\n"
+        chunks: List[str] = []
+        completed = False
+        try:
+            async for chunk in pipeline.astream_answer(result, user_id=body.user_id):
+                chunks.append(chunk)
+                yield chunk
+            completed = True
+        finally:
+            # 클라이언트가 중간에 끊어도 그때까지의 단계별 시간은 남김
+            _finish(result, "query_stream", query_log, "".join(chunks), None if completed else "incomplete")
+
+    return StreamingResponse(body_iter(), media_type="text/plain; charset=utf-8")
+
+
+@router.get(
+    path="/logs/hot-questions",
+    tags=["RAG"],
+    summary="자주 묻는 질문 (질의 기록 집계)",
+)
+async def get_hot_questions(
+    db: "AsyncSession" = Depends(get_db),
+    limit: Annotated[int, Query(ge=1, le=200, description="몇 개까지")] = 20,
+    days: Annotated[Optional[int], Query(ge=1, le=365, description="최근 며칠 (없으면 전체)")] = None,
+) -> List[Dict[str, Any]]:
+    from app.service.query_log import hot_questions
+
+    return await hot_questions(db, limit=limit, days=days)
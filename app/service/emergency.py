@@ -0,0 +1,346 @@
+# Standard Libraries
+import asyncio
+import logging
+import math
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from xml.parsers.expat import ExpatError
+
+# Third-party Libraries
+import httpx
+import xmltodict
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "http://apis.data.go.kr/B552657/ErmctInfoInqireService"
+BASE_INFO_PATH = "/getEgytBassInfoInqire"
+REFRESH_INTERVAL = 6 * 60 * 60  # 병원 기본정보는 거의 바뀌지 않으므로 6시간마다 갱신
+RETRY_INTERVAL = 60  # 갱신 실패 시 재시도 간격
+ERROR_COOLDOWN = 30  # 목록이 없는데 갱신이 실패하면 이 시간 동안은 다시 받지 않고 바로 실패
+PAGE_SIZE = 1000
+MAX_CONCURRENT_PAGES = 4
+GRID_DEGREES = 0.1  # 공간 인덱스 격자 크기 (위도 0.1도 ≈ 11km)
+EARTH_RADIUS_KM = 6371.0
+
+
+class HospitalIndexUnavailable(RuntimeError):
+    """목록을 한 번도 받지 못했고 최근 갱신도 실패해서 바로 돌려줄 수 없음"""
+
+    def __init__(self, last_error: Optional[str], retry_after: float):
+        super().__init__(f"응급의료기관 목록 갱신 실패: {last_error}")
+        self.last_error = last_error
+        self.retry_after = retry_after
+
+
+def parse_page(content: bytes) -> Tuple[List[Dict[str, Any]], int]:
+    """한 페이지의 item 목록과 전체 건수(totalCount)
+
+    XML 이 아닌 응답(게이트웨이 오류 HTML 등)은 호출하는 쪽이 다른 응답 오류와 같이 처리하도록 ValueError 로 바꿈
+    """
+    try:
+        data_dict = xmltodict.parse(content)
+    except ExpatError as e:
+        raise ValueError(f"XML 이 아닌 응답입니다: {e}") from e
+    body = data_dict["response"]["body"]
+    items = (body.get("items") or {}).get("item") or []
+    # 결과가 1건이면 xmltodict 는 list 가 아닌 dict 를 돌려줌
+    items = [items] if isinstance(items, dict) else items
+    return items, int(body.get("totalCount") or len(items))
+
+
+def parse_items(content: bytes) -> List[Dict[str, Any]]:
+    return parse_page(content)[0]
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def filter_hospitals(items: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    filtered = []
+    # 산부인과 응급 대응 가능 병원을 뽑는 로직
+    for item in items:
+        # 응급실 여부
+        is_hvec = int(item.get("hvec") or 0) > 0
+        # 응급실 운영 여부
+        is_dutyEryn = item.get("dutyEryn", "0") == "1"
+        # 산부인과 여부
+        is_OB_GYN = "산부인과" in (item.get("dgidIdName") or "")
+        # 산부인과 응급상황 대응 가능 여부 = 조산 산모 수용 가능
+        is_MKioskTy8 = item.get("mkioskTy8", "N") == "Y"
+        # 산부인과 응급상황 대응 가능 여부 = 신생아 수용 가능
+        is_MKioskTy10 = item.get("mkioskTy10", "N") == "Y"
+
+        if is_hvec and is_dutyEryn and (is_OB_GYN or is_MKioskTy8 or is_MKioskTy10):
+            address = item.get("dutyAddr") or ""
+            address_parts = address.split()
+            filtered.append({
+                "기관명": item.get("dutyName") or "",
+                "우편번호": (item.get("postCdn1") or "") + (item.get("postCdn2") or ""),
+                "주소": address,
+                "시도": address_parts[0] if address_parts else "",
+                "시군구": address_parts[1] if len(address_parts) > 1 else "",
+                "대표전화": item.get("dutyTel1") or "",
+                "응급실전화": item.get("dutyTel3") or "",
+                "위도": _to_float(item.get("wgs84Lat")),
+                "경도": _to_float(item.get("wgs84Lon")),
+            })
+    return filtered
+
+
+class HospitalIndex:
+    """병원 목록을 시도/시군구/우편번호/좌표로 미리 색인해두고 메모리에서 조회
+
+    - 시도, (시도, 시군구), 우편번호 앞 3자리 → 병원 번호 목록
+    - 좌표가 있으면 GRID_DEGREES 격자에 넣어두고 가까운 격자부터 넓혀가며 최근접 N개를 찾음
+    """
+
+    def __init__(self, hospitals: List[Dict[str, Any]]):
+        self.hospitals = hospitals
+        self.by_sido: Dict[str, List[int]] = defaultdict(list)
+        self.by_sigungu: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        self.by_postal: Dict[str, List[int]] = defaultdict(list)
+        self.grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+
+        for i, hospital in enumerate(hospitals):
+            self.by_sido[hospital["시도"]].append(i)
+            self.by_sigungu[(hospital["시도"], hospital["시군구"])].append(i)
+            if hospital["우편번호"]:
+                self.by_postal[hospital["우편번호"][:3]].append(i)
+            if hospital["위도"] is not None and hospital["경도"] is not None:
+                self.grid[self._cell(hospital["위도"], hospital["경도"])].append(i)
+
+    def __len__(self) -> int:
+        return len(self.hospitals)
+
+    @staticmethod
+    def _cell(lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / GRID_DEGREES)), int(math.floor(lon / GRID_DEGREES))
+
+    def _sido_ids(self, sido: str) -> List[int]:
+        # "서울" 처럼 줄여 써도 "서울특별시" 에 매칭
+        ids: List[int] = []
+        for name, name_ids in self.by_sido.items():
+            if name.startswith(sido):
+                ids.extend(name_ids)
+        return ids
+
+    def filter(
+        self,
+        sido: Optional[str] = None,
+        sigungu: Optional[str] = None,
+        postal_code: Optional[str] = None,
+    ) -> List[int]:
+        candidates: Optional[Iterable[int]] = None
+        if sido and sigungu:
+            candidates = [i for key, ids in self.by_sigungu.items() if key[0].startswith(sido) and key[1] == sigungu for i in ids]
+        elif sido:
+            candidates = self._sido_ids(sido)
+        elif sigungu:
+            candidates = [i for key, ids in self.by_sigungu.items() if key[1] == sigungu for i in ids]
+
+        if postal_code:
+            if len(postal_code) >= 3:
+                postal_ids = self.by_postal.get(postal_code[:3], [])
+            else:
+                postal_ids = [i for key, ids in self.by_postal.items() if key.startswith(postal_code) for i in ids]
+            postal_ids = [i for i in postal_ids if self.hospitals[i]["우편번호"].startswith(postal_code)]
+            candidates = postal_ids if candidates is None else sorted(set(candidates) & set(postal_ids))
+
+        return list(range(len(self.hospitals))) if candidates is None else sorted(candidates)
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        limit: int = 10,
+        ids: Optional[Iterable[int]] = None,
+    ) -> List[Tuple[int, float]]:
+        """(병원 번호, 거리 km) 를 가까운 순으로 limit 개"""
+        allowed = None if ids is None else set(ids)
+        if not self.grid:
+            return []
+        center_lat, center_lon = self._cell(lat, lon)
+        max_ring = max(
+            max(abs(cell[0] - center_lat), abs(cell[1] - center_lon)) for cell in self.grid
+        )
+
+        found: List[Tuple[int, float]] = []
+        for ring in range(max_ring + 1):
+            for cell in self._ring_cells(center_lat, center_lon, ring):
+                for i in self.grid.get(cell, ()):
+                    if allowed is None or i in allowed:
+                        hospital = self.hospitals[i]
+                        found.append((i, haversine_km(lat, lon, hospital["위도"], hospital["경도"])))
+            if len(found) >= limit:
+                # 현재 링 밖에 있는 병원은 적어도 ring * 격자 크기 만큼 떨어져 있으므로
+                # 그보다 가까운 후보가 limit 개 이상이면 더 넓힐 필요가 없음
+                found.sort(key=lambda pair: pair[1])
+                if found[limit - 1][1] <= ring * GRID_DEGREES * 111.0 * math.cos(math.radians(min(abs(lat), 89.0))):
+                    break
+        found.sort(key=lambda pair: pair[1])
+        return found[:limit]
+
+    @staticmethod
+    def _ring_cells(lat_cell: int, lon_cell: int, ring: int):
+        if ring == 0:
+            yield lat_cell, lon_cell
+            return
+        for d in range(-ring, ring + 1):
+            yield lat_cell - ring, lon_cell + d
+            yield lat_cell + ring, lon_cell + d
+        for d in range(-ring + 1, ring):
+            yield lat_cell + d, lon_cell - ring
+            yield lat_cell + d, lon_cell + ring
+
+
+class EmergencyHospitalService:
+    """산부인과 응급 대응 병원 목록을 메모리에 들고 있다가 바로 돌려주는 서비스
+
+    - 백그라운드 태스크가 refresh_interval 마다 data.go.kr 에서 목록을 다시 받아옵니다.
+    - 요청 시점에 목록이 오래됐으면 기존(stale) 목록을 먼저 돌려주고 갱신은 뒤에서 진행합니다.
+    - 갱신이 실패해도 마지막으로 받은 목록을 계속 돌려주므로 상위 API 장애가 번지지 않습니다.
+    - 동시에 들어온 요청은 진행 중인 갱신 하나를 같이 기다리고, 목록이 없는 상태에서 갱신이 실패하면
+      error_cooldown 동안은 data.go.kr 을 다시 부르지 않고 HospitalIndexUnavailable 로 바로 실패합니다.
+
+    base_url, transport 를 바꾸면 로컬 stub 서버나 httpx.MockTransport 로 대신할 수 있습니다.
+    """
+
+    def __init__(
+        self,
+        service_key: str,
+        base_url: str = BASE_URL,
+        refresh_interval: float = REFRESH_INTERVAL,
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        error_cooldown: float = ERROR_COOLDOWN,
+    ):
+        self.service_key = service_key
+        self.refresh_interval = refresh_interval
+        self.error_cooldown = error_cooldown
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout, connect=3.0),
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            transport=transport,
+        )
+        self.index: Optional[HospitalIndex] = None
+        self.updated_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+
+    @property
+    def age(self) -> Optional[float]:
+        return None if self.updated_at is None else time.time() - self.updated_at
+
+    @property
+    def is_stale(self) -> bool:
+        return self.age is None or self.age > self.refresh_interval
+
+    @property
+    def hospitals(self) -> Optional[List[Dict[str, Any]]]:
+        return None if self.index is None else self.index.hospitals
+
+    async def fetch_page(self, page_no: int) -> Tuple[List[Dict[str, Any]], int]:
+        params = {"serviceKey": self.service_key, "numOfRows": PAGE_SIZE, "pageNo": page_no}
+        response = await self.client.get(BASE_INFO_PATH, params=params)
+        response.raise_for_status()
+        return parse_page(response.content)
+
+    async def fetch(self) -> List[Dict[str, Any]]:
+        """첫 페이지로 전체 건수를 알아낸 뒤 나머지 페이지를 동시에 받아옴"""
+        items, total_count = await self.fetch_page(1)
+        pages = math.ceil(total_count / PAGE_SIZE)
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_PAGES)
+
+        async def fetch_limited(page_no: int) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return (await self.fetch_page(page_no))[0]
+
+        for page_items in await asyncio.gather(*(fetch_limited(n) for n in range(2, pages + 1))):
+            items.extend(page_items)
+        return items
+
+    async def _fetch_and_swap(self) -> None:
+        try:
+            items = await self.fetch()
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            # 요청 URL 에 serviceKey 가 들어있으므로 예외 메시지 전체는 남기지 않음
+            status_code = getattr(getattr(e, "response", None), "status_code", None)
+            self.last_error = type(e).__name__ + (f" ({status_code})" if status_code else "")
+            self.last_error_at = time.time()
+            logger.warning("응급의료기관 목록 갱신 실패: %s", self.last_error)
+            raise
+        self.index = HospitalIndex(filter_hospitals(items))
+        self.updated_at = time.time()
+        self.last_error = self.last_error_at = None
+
+    def _start_refresh(self) -> asyncio.Task:
+        """진행 중인 갱신이 있으면 그것을, 없으면 새 갱신 태스크를 반환"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._fetch_and_swap())
+            # 아무도 기다리지 않는 백그라운드 갱신의 실패가 "never retrieved" 경고로 남지 않도록
+            self._refresh_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return self._refresh_task
+
+    async def refresh(self, force: bool = False) -> None:
+        task = self._refresh_task
+        if task is None or task.done():
+            if not force and self.index is not None and not self.is_stale:
+                return
+            task = self._start_refresh()
+        # 먼저 끊긴 요청이 있어도 같이 기다리는 다른 요청의 갱신은 취소되지 않도록 shield
+        await asyncio.shield(task)
+
+    def _check_cooldown(self) -> None:
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        if self.last_error_at is None:
+            return
+        remaining = self.error_cooldown - (time.time() - self.last_error_at)
+        if remaining > 0:
+            raise HospitalIndexUnavailable(self.last_error, remaining)
+
+    async def get_index(self) -> HospitalIndex:
+        if self.index is None:
+            # 아직 한 번도 못 받았으면 이번 요청에서 기다림 (방금 실패했으면 바로 실패)
+            self._check_cooldown()
+            await self.refresh()
+        elif self.is_stale:
+            self._start_refresh()
+        return self.index
+
+    async def get_hospitals(self) -> List[Dict[str, Any]]:
+        return (await self.get_index()).hospitals
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh(force=True)
+                delay = self.refresh_interval
+            except Exception:
+                delay = RETRY_INTERVAL
+            await asyncio.sleep(delay)
+
+    def start(self) -> None:
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self) -> None:
+        for task in (self._loop_task, self._refresh_task):
+            if task is not None:
+                task.cancel()
+        self._loop_task = self._refresh_task = None
+        await self.client.aclose()
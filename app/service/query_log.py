@@ -0,0 +1,203 @@
+# Standard Libraries
+import asyncio
+import datetime
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Third-party Libraries
+from sqlalchemy import Integer, cast, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+# Local Application Modules
+from app.model import RagAnswerLog, RagQueryLog, question_hash
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100  # 한 트랜잭션에 넣는 질의 수
+FLUSH_INTERVAL = 2.0  # 배치가 덜 찼어도 이만큼 지나면 기록
+MAX_PENDING = 10000  # DB 가 밀릴 때 메모리에 쌓아둘 질의 수 상한 (넘치면 버림)
+CLOSE_TIMEOUT = 10.0
+
+
+@dataclass
+class QueryLogEntry:
+    trace_id: str
+    route: str
+    question: str
+    total_ms: float
+    cache_hit: bool = False
+    filters: Optional[Dict[str, List[str]]] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    candidates: Optional[int] = None
+    context_chunks: int = 0
+    prompt_tokens: Optional[int] = None
+    response_tokens: Optional[int] = None
+    answer: Optional[str] = None
+    chunk_ids: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @classmethod
+    def from_result(cls, result, record: Dict[str, Any], answer: Optional[str], error: Optional[str] = None):
+        """RagResult 와 Trace.finish() 가 돌려준 기록으로 만듦"""
+        return cls(
+            trace_id=record["trace_id"],
+            route=record.get("route", ""),
+            question=result.query,
+            total_ms=record["total_ms"],
+            cache_hit=result.cache_hit,
+            filters=json.loads(result.filters.key()) if result.filters else None,
+            timings={name: round(ms, 2) for name, ms in result.timings.items()},
+            candidates=record.get("candidates"),
+            context_chunks=len(result.context),
+            prompt_tokens=record.get("prompt_tokens"),
+            response_tokens=record.get("response_tokens"),
+            answer=answer,
+            chunk_ids=[item["chunk_id"] for item in result.context],
+            error=error,
+        )
+
+    def to_model(self) -> RagQueryLog:
+        row = RagQueryLog(
+            trace_id=self.trace_id,
+            route=self.route,
+            question=self.question,
+            question_hash=question_hash(self.question),
+            filters=self.filters,
+            cache_hit=self.cache_hit,
+            total_ms=self.total_ms,
+            timings=self.timings,
+            candidates=self.candidates,
+            context_chunks=self.context_chunks,
+            prompt_tokens=self.prompt_tokens,
+            response_tokens=self.response_tokens,
+            error=self.error,
+        )
+        if self.answer:
+            row.answer = RagAnswerLog(answer=self.answer, chunk_ids=self.chunk_ids)
+        return row
+
+
+class QueryLogWriter:
+    """RAG 질의 기록을 요청 경로 밖에서 모아 DB 에 배치로 쓰는 서비스
+
+    - record() 는 큐에 넣기만 하고 바로 돌아오므로 응답 시간에 DB 가 끼지 않습니다.
+    - 백그라운드 태스크가 batch_size 개가 모이거나 flush_interval 이 지나면 한 트랜잭션으로 씁니다.
+    - DB 가 느려 큐가 max_pending 을 넘으면 새 기록은 버리고 dropped 만 늘립니다.
+    - close() 는 남은 기록을 모두 쓴 뒤 끝납니다.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        max_pending: int = MAX_PENDING,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, entry: QueryLogEntry) -> bool:
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        return True
+
+    async def write(self, entries: List[QueryLogEntry]) -> None:
+        try:
+            async with self.session_factory() as session:
+                session.add_all([entry.to_model() for entry in entries])
+                await session.commit()
+        except SQLAlchemyError as e:
+            # 기록 실패가 서비스 장애로 번지지 않게 버리고 로그만 남김
+            self.failed += len(entries)
+            logger.warning("RAG 질의 기록 %d건 저장 실패: %s", len(entries), type(e).__name__)
+        else:
+            self.written += len(entries)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        closing = False
+        while not closing:
+            entry = await self._queue.get()
+            if entry is None:
+                break
+            batch = [entry]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    closing = True
+                    break
+                batch.append(entry)
+            try:
+                await self.write(batch)
+            except Exception:
+                # 예상 못 한 오류로 태스크가 죽으면 이후 기록이 큐에만 쌓이므로 버리고 계속 돎
+                self.failed += len(batch)
+                logger.exception("RAG 질의 기록 %d건 저장 중 예외", len(batch))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self, timeout: float = CLOSE_TIMEOUT) -> None:
+        if self._task is None:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            # 큐가 가득 차 있으면 종료 신호를 넣는 것도 timeout 안에서만 기다림
+            await asyncio.wait_for(self._queue.put(None), timeout)
+            await asyncio.wait_for(self._task, max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            logger.warning("RAG 질의 기록 %d건을 쓰지 못하고 종료합니다.", self._queue.qsize())
+        self._task = None
+
+
+async def hot_questions(db: AsyncSession, limit: int = 20, days: Optional[int] = None) -> List[Dict[str, Any]]:
+    """자주 묻는 질문 (같은 question_hash 끼리 묶어서 횟수순)"""
+    statement = (
+        select(
+            func.min(RagQueryLog.question).label("question"),
+            func.count().label("count"),
+            func.avg(RagQueryLog.total_ms).label("avg_ms"),
+            func.max(RagQueryLog.total_ms).label("max_ms"),
+            func.sum(cast(RagQueryLog.cache_hit, Integer)).label("cache_hits"),
+        )
+        .where(RagQueryLog.deleted_at.is_(None))
+        .group_by(RagQueryLog.question_hash)
+        .order_by(func.count().desc())
+        .limit(limit)
+    )
+    if days is not None:
+        since = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)
+        statement = statement.where(RagQueryLog.created_at >= since)
+    rows = (await db.execute(statement)).all()
+    return [
+        {
+            "question": row.question,
+            "count": row.count,
+            "avg_ms": round(row.avg_ms or 0.0, 2),
+            "max_ms": round(row.max_ms or 0.0, 2),
+            "cache_hit_rate": round((row.cache_hits or 0) / row.count, 3),
+        }
+        for row in rows
+    ]
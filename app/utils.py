@@ -1,11 +1,14 @@
-# Local Application Modules
-from app.database import SessionLocal
+# Standard Libraries
+from typing import TYPE_CHECKING, AsyncIterator
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
+
+# Dependency (DB 를 쓰는 라우트에서만 Depends(get_db) 로 받음)
+# SQLAlchemy 는 처음 DB 를 쓰는 요청에서 불러옴 (앱 import 시간에 들어가지 않도록)
+async def get_db() -> "AsyncIterator[AsyncSession]":
+    from app.database import get_sessionmaker
+
+    async with get_sessionmaker()() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
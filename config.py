@@ -1,13 +1,51 @@
+"""환경 변수 설정
+
+필수 값(REQUIRED)은 import 할 때가 아니라 처음 읽을 때 확인합니다. 그래서 DB 나 Gemini 를 쓰지 않는
+CLI 는 해당 키 없이도 돌고, 서버는 시작할 때 require() 로 필요한 키를 한 번에 확인합니다.
+"""
 # Standard Libraries
 import os
+from typing import List
 
 # Third-party Libraries
 from dotenv import load_dotenv
 
 load_dotenv()
 
-DATA_SECRET_KEY = os.environ["DATA_SECRET_KEY"]
+DATA_GO_BASE_URL = os.getenv("DATA_GO_BASE_URL", "http://apis.data.go.kr/B552657/ErmctInfoInqireService")
 DEBUG = os.getenv("DEBUG", "False").lower() in ("true", "1", "t")
-DATABASE_URL = os.environ["DATABASE_URL"]
-GOOGLE_API_KEY = os.environ["GOOGLE_API_KEY"]
-OPENAI_API_KEY = os.environ["OPENAI_API_KEY"]
\ No newline at end of file
+# 켜면 ?profile=1 을 붙인 요청을 pyinstrument 로 프로파일링해서 HTML 로 돌려줌
+PROFILING = os.getenv("PROFILING", "False").lower() in ("true", "1", "t")
+# 지정하면 검색 후보를 이 cross-encoder 로 다시 매겨서 상위 몇 개만 프롬프트에 넣음 (예: bongsoo/klue-cross-encoder-v1)
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "")
+# 워커 프로세스마다 잡는 DB 커넥션 수 (상시 DB_POOL_SIZE 개 + 몰릴 때 DB_MAX_OVERFLOW 개까지)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# 켜면 RAG 질의/답변/단계별 시간을 모아서 DB(rag_query_log, rag_answer_log)에 배치로 기록
+QUERY_LOG = os.getenv("QUERY_LOG", "True").lower() in ("true", "1", "t")
+# quantized 면 벡터 검색을 Chroma HNSW 대신 int8/PQ 양자화 색인(python -m rag.quantized 로 만듦)으로 함
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+
+REQUIRED = ("DATA_SECRET_KEY", "DATABASE_URL", "GOOGLE_API_KEY")
+
+
+def missing(*names: str) -> List[str]:
+    return [name for name in names or REQUIRED if not os.getenv(name)]
+
+
+def require(*names: str) -> None:
+    """필수 환경 변수가 비어 있으면 빠진 이름을 모두 담아 RuntimeError (names 를 안 주면 REQUIRED 전체)"""
+    absent = missing(*names)
+    if absent:
+        raise RuntimeError(f"환경 변수가 설정되지 않았습니다: {', '.join(absent)}")
+
+
+def __getattr__(name: str) -> str:
+    # config.GOOGLE_API_KEY 처럼 필수 값을 읽는 순간 확인
+    if name in REQUIRED:
+        require(name)
+        return os.environ[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
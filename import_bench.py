@@ -0,0 +1,115 @@
+"""import 시간 벤치마크 (앱/CLI 가 import 만으로 ML 라이브러리를 올리지 않는지 확인)
+
+모듈마다 새 파이썬 프로세스에서 `python -X importtime -c "import <모듈>"` 을 돌려
+- 누적 import 시간(여러 번 돌린 중앙값)이 --budget-ms 를 넘거나
+- 허용하지 않은 무거운 라이브러리(torch, langchain, Gemini SDK, SQLAlchemy ...)를 불러오면
+실패로 표시하고 종료 코드 1 을 돌려줍니다. 필수 환경 변수(config.REQUIRED)는 지우고 돌려서
+설정 확인도 import 시점에 일어나지 않는지 함께 봅니다.
+
+    python import_bench.py
+    python import_bench.py main rag.pipeline --repeat 5 --budget-ms 800
+"""
+# Standard Libraries
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+HEAVY_MODULES = (
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "chromadb",
+    "langchain_core",
+    "langchain_community",
+    "google.generativeai",
+    "sqlalchemy",
+)
+# (모듈, import 할 때 불러와도 되는 무거운 라이브러리)
+TARGETS: Dict[str, Tuple[str, ...]] = {
+    "config": (),
+    "main": (),
+    "app.router.rag": (),
+    "rag.pipeline": (),
+    "rag.ingest": (),
+    "rag.chunker": (),
+    "pediatrics.crawler": (),
+    "pediatrics.clean": (),
+    "rag.chunk_store": (),
+    "rag.quantized": (),
+    "pediatrics.ingest": ("langchain_core",),
+    "youtube.ingest": ("langchain_core",),
+    "rag.bench": ("langchain_core",),
+}
+DEFAULT_BUDGET_MS = 1000.0
+REQUIRED_ENV = ("DATA_SECRET_KEY", "DATABASE_URL", "GOOGLE_API_KEY")  # config.REQUIRED
+
+
+def import_times(module: str, env: Dict[str, str]) -> Dict[str, float]:
+    """모듈 하나를 새 프로세스에서 import 하고 모듈별 누적 시간(ms)"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{module} import 실패:\n{completed.stderr.strip().splitlines()[-1]}")
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+def measure(module: str, repeat: int, env: Dict[str, str]) -> Tuple[float, List[str]]:
+    samples = []
+    loaded: List[str] = []
+    for _ in range(repeat):
+        times = import_times(module, env)
+        samples.append(times.get(module, 0.0))
+        loaded = [name for name in HEAVY_MODULES if name in times]
+    return statistics.median(samples), loaded
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="앱/CLI 모듈의 import 시간과 무거운 라이브러리 로드 여부를 확인합니다.")
+    parser.add_argument("modules", nargs="*", help=f"확인할 모듈 (기본: {', '.join(TARGETS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="모듈마다 반복 횟수 (중앙값 사용)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="모듈별 import 시간 상한")
+    args = parser.parse_args(argv)
+
+    env = {name: value for name, value in os.environ.items() if name not in REQUIRED_ENV}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)), env.get("PYTHONPATH")]))
+    # .env 에 키가 있으면 load_dotenv 가 다시 채우므로 빈 값으로 막아둠
+    env.update({name: "" for name in REQUIRED_ENV})
+
+    failed = 0
+    for module in args.modules or TARGETS:
+        allowed = TARGETS.get(module, ())
+        try:
+            median_ms, loaded = measure(module, args.repeat, env)
+        except RuntimeError as e:
+            print(f"{module:<20} 실패  {e}")
+            failed += 1
+            continue
+        unexpected = [name for name in loaded if name not in allowed]
+        ok = median_ms <= args.budget_ms and not unexpected
+        failed += not ok
+        heavy = ", ".join(loaded) or "-"
+        print(f"{module:<20} {median_ms:7.0f} ms  {'OK  ' if ok else '초과'}  무거운 라이브러리: {heavy}")
+        if unexpected:
+            print(f"{'':<20} 허용하지 않은 import: {', '.join(unexpected)}")
+
+    print(f"\n예산 {args.budget_ms:.0f} ms / 실패 {failed}개")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
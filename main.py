@@ -1,21 +1,75 @@
+# Standard Libraries
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
 # Third-party Libraries
 from fastapi import FastAPI, Request, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi_pagination import add_pagination
 from fastapi_pagination.utils import disable_installed_extensions_check
 from pydantic import BaseModel
 
 # Local Application Modules
-from app.router import data_go
+from app.router import data_go, rag
+from app.service.emergency import EmergencyHospitalService
+from rag import telemetry
 import config
 
+
+# 요청별 단계 시간/토큰 수를 rag.trace 로거로 한 줄 JSON 씩 남김
+telemetry.configure_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 필수 환경 변수는 여기서 한 번에 확인 (import 할 때는 확인하지 않음)
+    config.require()
+    # DB(SQLAlchemy)/RAG 파이프라인(numpy)/Gemini 는 서버를 띄울 때 필요하므로 import 도 여기서 함
+    from ai_client import GeminiClient
+    from app.database import dispose_engine, get_sessionmaker
+    from app.service.query_log import QueryLogWriter
+    from rag.pipeline import RagPipeline
+    from rag.reranker import CrossEncoderReranker
+
+    # 응급의료기관 목록은 백그라운드에서 미리 받아두고 주기적으로 갱신
+    app.state.emergency_service = EmergencyHospitalService(
+        service_key=config.DATA_SECRET_KEY,
+        base_url=config.DATA_GO_BASE_URL,
+    )
+    app.state.emergency_service.start()
+
+    # RAG 질의 기록은 요청 경로 밖에서 모아 DB 에 배치로 씀
+    app.state.query_log = QueryLogWriter(get_sessionmaker()) if config.QUERY_LOG else None
+    if app.state.query_log is not None:
+        app.state.query_log.start()
+
+    # 임베딩 모델과 Chroma 는 워커 프로세스마다 시작할 때 한 번만 로드해서 모든 요청이 공유
+    gemini = GeminiClient(api_key=config.GOOGLE_API_KEY)
+    started = time.perf_counter()
+    reranker = CrossEncoderReranker(config.RERANKER_MODEL) if config.RERANKER_MODEL else None
+    app.state.rag_pipeline = await asyncio.to_thread(
+        RagPipeline.load, gemini, reranker=reranker, vector_backend=config.VECTOR_BACKEND
+    )
+    # 모델/색인 로드를 요청 경로 밖에서 미리 끝냄
+    warmup = await asyncio.to_thread(app.state.rag_pipeline.warmup)
+    print(f"[warmup] RAG 파이프라인 준비 {time.perf_counter() - started:.2f}s {warmup}")
+    yield
+    app.state.rag_pipeline = None
+    await app.state.emergency_service.close()
+    if app.state.query_log is not None:
+        await app.state.query_log.close()
+    await dispose_engine()
+
+
 app = FastAPI(
     title="Thesis API",
     description="",
     version="1.0.0",
     debug=config.DEBUG,
+    lifespan=lifespan,
 )
 
 disable_installed_extensions_check()
@@ -31,10 +85,50 @@ app.add_middleware(
 )
 
 app.include_router(data_go.router, prefix="/api/data-go")
+app.include_router(rag.router, prefix="/api/rag")
 
 add_pagination(app)
 
 
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    """PROFILING=true 일 때 ?profile=1 을 붙인 요청만 pyinstrument 로 프로파일링해서 HTML 로 돌려줌"""
+    if not (config.PROFILING and request.query_params.get("profile")):
+        return await call_next(request)
+    from pyinstrument import Profiler
+
+    profiler = Profiler(async_mode="enabled")
+    with telemetry.profiling():
+        profiler.start()
+        response = await call_next(request)
+        # 스트리밍 응답은 본문을 끝까지 받아야 Gemini 답변 생성까지 프로파일에 들어감
+        async for _ in response.body_iterator:
+            pass
+        profiler.stop()
+    return HTMLResponse(profiler.output_html())
+
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    # 스트리밍 응답은 헤더를 보낼 때까지의 시간 (답변 생성 시간은 rag_stage_seconds{stage="generate"})
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    telemetry.HTTP_SECONDS.observe(
+        time.perf_counter() - started,
+        method=request.method,
+        path=getattr(route, "path", "unmatched"),
+        status=response.status_code,
+    )
+    return response
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus 스크레이프용 지표"""
+    return PlainTextResponse(telemetry.METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     custom_errors = []
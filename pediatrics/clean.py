@@ -0,0 +1,169 @@
+"""기사 HTML 에서 본문을 뽑아 정리하는 모듈 (pediatrics.extract.parse_article 이 씀)
+
+예전 정리 방식은 페이지 전체를 html.parser 로 파싱하고 .bbsCon 을 공백 하나로 이어 붙인 뒤
+re.sub 를 다섯 번 돌렸습니다. 그 과정에서
+- 문단/목록 경계가 사라지고
+- 마침표·쉼표 뒤 공백까지 지워 문장이 붙어버리며 ("합니다.다음")
+- 모든 하이픈 앞에 줄바꿈을 넣어 "3-4개월", "B-형" 같은 단어가 잘렸습니다.
+
+여기서는
+1. .bbsCon 부분만 트리로 만들고 (SoupStrainer, lxml 이 설치돼 있으면 lxml 파서)
+2. 블록 태그(p, div, li, br ...) 경계는 줄바꿈으로, li 는 "- " 목록 항목으로 남긴 뒤
+3. 미리 컴파일한 정규식 하나로 한 번에 공백/문장부호/괄호/목록 기호를 정리합니다.
+   목록 기호는 글 처음이나 줄 처음(블록 경계, <br> 뒤)에 있을 때만 목록 항목으로 보고,
+   문장 중간의 "38도 - 39도", "수유 - 하루 8회" 같은 하이픈은 그대로 둡니다.
+
+    python -m pediatrics.clean                                  # 고정 HTML 로 예전 방식과 속도/결과 비교
+    python -m pediatrics.clean data/fixtures/pediatrics --repeat 500
+"""
+# Standard Libraries
+import argparse
+import glob
+import os
+import re
+import time
+from typing import List, Optional
+
+# Third-party Libraries
+from bs4 import BeautifulSoup, Comment, NavigableString, SoupStrainer, Tag
+
+try:
+    import lxml  # noqa: F401
+
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+CONTENT_CLASS = "bbsCon"
+FIXTURE_DIR = "data/fixtures/pediatrics"
+BLOCK_TAGS = frozenset({
+    "address", "article", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption", "figure", "h1", "h2", "h3",
+    "h4", "h5", "h6", "hr", "li", "ol", "p", "pre", "section", "table", "tbody", "td", "th", "thead", "tr", "ul",
+})
+SKIP_TAGS = frozenset({"script", "style", "noscript", "iframe"})
+BULLETS = "-•·▪◦"
+
+content_strainer = SoupStrainer(class_=CONTENT_CLASS)
+
+# 한 번의 치환으로 처리하는 규칙 (앞에 있는 것부터 시도)
+# - bullet  : 글 처음이나 줄바꿈 뒤(앞뒤 공백 포함)의 목록 기호 + 공백 → 줄바꿈 + "- "
+# - newline : 줄바꿈과 그 앞뒤 공백/빈 줄 → 줄바꿈 하나
+# - tight   : 문장부호/닫는 괄호 앞, 여는 괄호 앞뒤의 공백 → 없앰
+# - space   : 공백 여러 개, 탭/nbsp/전각 공백 → 공백 하나
+normalize_pattern = re.compile(
+    rf"(?P<bullet>(?:\A|[^\S\n]*\n)\s*[{BULLETS}][^\S\n]+)"
+    r"|(?P<newline>[^\S\n]*\n\s*)"
+    r"|(?P<tight>[^\S\n]+(?=[.,?!)])|(?<=\()[^\S\n]+|[^\S\n]+(?=\())"
+    r"|(?P<space>[^\S\n]{2,}|[^\S \n])"
+)
+
+
+def _replace(match: "re.Match[str]") -> str:
+    kind = match.lastgroup
+    if kind == "bullet":
+        return "- " if match.start() == 0 else "\n- "
+    if kind == "newline":
+        return "\n"
+    if kind == "tight":
+        return ""
+    return " "
+
+
+def normalize(text: str) -> str:
+    """공백/문장부호/괄호/목록 기호 정리 (정규식 한 번)"""
+    return normalize_pattern.sub(_replace, text).strip()
+
+
+def _collect(node: Tag, parts: List[str]) -> None:
+    for child in node.children:
+        if isinstance(child, NavigableString):
+            if not isinstance(child, Comment):
+                parts.append(str(child))
+            continue
+        if not isinstance(child, Tag) or child.name in SKIP_TAGS:
+            continue
+        block = child.name in BLOCK_TAGS
+        if block:
+            parts.append("\n- " if child.name == "li" else "\n")
+        _collect(child, parts)
+        if block:
+            parts.append("\n")
+
+
+def extract_text(html: str) -> str:
+    """.bbsCon 안의 텍스트 (블록 경계는 줄바꿈, li 는 "- " 로 시작). 본문이 없으면 빈 문자열"""
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=content_strainer)
+    root = soup.find(class_=CONTENT_CLASS)
+    if root is None:
+        return ""
+    parts: List[str] = []
+    _collect(root, parts)
+    return "".join(parts)
+
+
+def clean_article(html: str) -> str:
+    return normalize(extract_text(html))
+
+
+# --- 마이크로 벤치마크 -------------------------------------------------------
+def _legacy_clean(html: str) -> str:
+    """예전 parse_article 정리 방식 (비교용)"""
+    soup = BeautifulSoup(html, "html.parser")
+    bbs_con = soup.select_one(".bbsCon")
+    if bbs_con is None:
+        return ""
+    content = bbs_con.get_text(separator=" ", strip=True)
+    content = re.sub(r'\s+', ' ', content).strip()
+    content = re.sub(r'\s*(\(|\))\s*', r'\1', content)
+    content = re.sub(r'\s*([.,?!])\s*', r'\1', content)
+    content = re.sub(r'([^\n])\s*-\s*', r'\1\n- ', content)
+    content = re.sub(r'\n{2,}', '\n', content)
+    return content
+
+
+def _time_per_article(clean, pages: List[str], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            clean(html)
+    return (time.perf_counter() - started) / (repeat * len(pages)) * 1000
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="저장해 둔 기사 HTML 로 본문 정리 속도를 예전 방식과 비교합니다.")
+    parser.add_argument("fixture_dir", nargs="?", default=FIXTURE_DIR, help="기사 HTML 파일(*.html) 디렉터리")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--show", action="store_true", help="파일별 정리 결과 앞부분 출력")
+    args = parser.parse_args(argv)
+
+    paths = sorted(glob.glob(os.path.join(args.fixture_dir, "*.html")))
+    if not paths:
+        parser.error(f"{args.fixture_dir} 에 *.html 이 없습니다.")
+    pages = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append(f.read())
+
+    total_kb = sum(len(page.encode("utf-8")) for page in pages) / 1024
+    print(f"기사 HTML {len(pages)}개 ({total_kb:.0f} KB) / 파서 {HTML_PARSER} / 반복 {args.repeat}회")
+    legacy_ms = _time_per_article(_legacy_clean, pages, args.repeat)
+    current_ms = _time_per_article(clean_article, pages, args.repeat)
+    print(f"예전 방식 {legacy_ms:.3f} ms/기사 ({1000 / legacy_ms:.0f} 기사/s)")
+    print(f"현재 방식 {current_ms:.3f} ms/기사 ({1000 / current_ms:.0f} 기사/s) → {legacy_ms / current_ms:.1f}배")
+
+    normalize_only = [extract_text(page) for page in pages]
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        for text in normalize_only:
+            normalize(text)
+    print(f"  그중 normalize {(time.perf_counter() - started) / (args.repeat * len(pages)) * 1000:.3f} ms/기사")
+
+    if args.show:
+        for path, page in zip(paths, pages):
+            print(f"\n== {os.path.basename(path)}")
+            print("[예전]", _legacy_clean(page)[:300])
+            print("[현재]", clean_article(page)[:300])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""대한소아청소년과학회 육아 정보 비동기 크롤러
+
+- 호스트별 동시 요청 수 제한 + 최소 요청 간격(rate limit)으로 사이트에 부담을 주지 않고
+- 하나의 httpx.AsyncClient 커넥션 풀을 공유하며
+- 실패한 요청은 지수 backoff 로 재시도하고 (Retry-After 가 있으면 따름)
+- 받은 기사는 체크포인트(JSONL)에 바로 기록해서 다시 실행하면 이어서 진행합니다.
+- 동시에 받는 기사 수를 max_in_flight 로 묶고, crawl() 을 읽는 쪽이 멈추면 새 요청도 멈춥니다
+  (pediatrics.ingest 의 스트리밍 적재가 임베딩이 밀릴 때 크롤링을 늦추는 데 씀).
+- --revalidate 를 주면 이미 받은 기사도 ETag/Last-Modified 조건부 요청으로 바뀐 것만 다시 받습니다.
+
+    python -m pediatrics.crawler --pages 5 --out 육아_정보.csv
+"""
+# Standard Libraries
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+# Third-party Libraries
+import httpx
+
+# Local Application Modules
+from pediatrics.extract import BASE_URL, HEADERS, CsvAppender, list_page_url, make_row, parse_article, parse_list_page
+
+CHECKPOINT_PATH = "pediatrics/.crawl_state/checkpoint.jsonl"
+DEFAULT_MAX_IN_FLIGHT = 16
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class HostLimiter:
+    """호스트별 동시 요청 수와 요청 간 최소 간격을 지키도록 하는 제한기"""
+
+    def __init__(self, concurrency: int = 4, min_interval: float = 1.0):
+        self.concurrency = concurrency
+        self.min_interval = min_interval
+        self._semaphores: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(self.concurrency))
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._next_slot: Dict[str, float] = defaultdict(float)
+
+    async def _wait_turn(self, host: str) -> None:
+        async with self._locks[host]:
+            now = time.monotonic()
+            wait = self._next_slot[host] - now
+            self._next_slot[host] = max(now, self._next_slot[host]) + self.min_interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def slot(self, host: str) -> "_HostSlot":
+        return _HostSlot(self, host)
+
+
+class _HostSlot:
+    def __init__(self, limiter: HostLimiter, host: str):
+        self.limiter = limiter
+        self.host = host
+
+    async def __aenter__(self):
+        await self.limiter._semaphores[self.host].acquire()
+        await self.limiter._wait_turn(self.host)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.limiter._semaphores[self.host].release()
+
+
+class Checkpoint:
+    """받은 기사 URL 별 결과(본문, ETag, Last-Modified)를 JSONL 로 이어서 기록"""
+
+    def __init__(self, path: str = CHECKPOINT_PATH):
+        self.path = path
+        self.records: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 기록 도중 중단된 마지막 줄은 무시
+                        continue
+                    self.records[record["url"]] = record
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.records
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        return self.records.get(url)
+
+    def add(self, record: Dict[str, Any]) -> None:
+        self.records[record["url"]] = record
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class PediatricsCrawler:
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        concurrency: int = 4,
+        min_interval: float = 1.0,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        timeout: float = 10.0,
+        checkpoint_path: Optional[str] = CHECKPOINT_PATH,
+        revalidate: bool = False,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ):
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.revalidate = revalidate
+        self.limiter = HostLimiter(concurrency, min_interval)
+        self.checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+        self.timeout = timeout
+        self.transport = transport
+        self.max_in_flight = max_in_flight
+        self.stats = defaultdict(int)
+
+    async def fetch(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> httpx.Response:
+        host = urlparse(url).netloc
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.limiter.slot(host):
+                    response = await client.get(url, headers=headers)
+                self.stats["requests"] += 1
+                if response.status_code == 304:
+                    return response
+                if response.status_code not in RETRYABLE_STATUS:
+                    response.raise_for_status()
+                    return response
+                retry_after = response.headers.get("Retry-After")
+                error: Exception = httpx.HTTPStatusError(
+                    f"{response.status_code}", request=response.request, response=response
+                )
+            except httpx.TransportError as e:
+                retry_after = None
+                error = e
+            if attempt == self.max_retries:
+                raise error
+            self.stats["retries"] += 1
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else self.backoff_base * (2 ** attempt) * (0.5 + random.random())
+            await asyncio.sleep(delay)
+        raise RuntimeError("unreachable")
+
+    async def fetch_article(self, client: httpx.AsyncClient, title: str, relative_link: str) -> Optional[Dict[str, Any]]:
+        url = urljoin(self.base_url, relative_link)
+        previous = self.checkpoint.get(url) if self.checkpoint else None
+        if previous and not self.revalidate:
+            self.stats["skipped"] += 1
+            return make_row(title, relative_link, previous["content"], self.base_url)
+
+        headers = {}
+        if previous:
+            if previous.get("etag"):
+                headers["If-None-Match"] = previous["etag"]
+            if previous.get("last_modified"):
+                headers["If-Modified-Since"] = previous["last_modified"]
+
+        try:
+            response = await self.fetch(client, url, headers)
+        except httpx.HTTPError as e:
+            # 기사 하나가 실패해도 나머지 크롤링은 계속
+            self.stats["failed"] += 1
+            print(f"An error occurred while scraping {url}: {e!r}")
+            return make_row(title, relative_link, previous["content"], self.base_url) if previous else None
+
+        if response.status_code == 304:
+            self.stats["not_modified"] += 1
+            return make_row(title, relative_link, previous["content"], self.base_url)
+
+        # HTML 파싱은 CPU 작업이라 스레드에서 돌려서 다른 요청을 막지 않음
+        content = await asyncio.to_thread(parse_article, response.text)
+        self.stats["fetched"] += 1
+        if self.checkpoint is not None:
+            self.checkpoint.add({
+                "url": url,
+                "title": title,
+                "relative_link": relative_link,
+                "content": content,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+            })
+        return make_row(title, relative_link, content, self.base_url)
+
+    async def crawl(self, pages_to_scrape: int) -> AsyncIterator[Dict[str, Any]]:
+        """기사 행을 받는 대로 yield (순서는 완료 순)
+
+        기사 요청은 최대 max_in_flight 개만 띄워두고, yield 한 행을 읽어가야 다음 요청을 띄웁니다.
+        """
+        async with httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=httpx.Timeout(self.timeout),
+            limits=httpx.Limits(max_connections=self.limiter.concurrency, max_keepalive_connections=self.limiter.concurrency),
+            follow_redirects=True,
+            transport=self.transport,
+        ) as client:
+            async def list_page(page_num: int):
+                url = list_page_url(page_num, self.base_url)
+                try:
+                    response = await self.fetch(client, url)
+                except httpx.HTTPError as e:
+                    print(f"An error occurred while scraping {url}: {e!r}")
+                    return []
+                articles = parse_list_page(response.text)
+                print(f"{page_num}페이지: 총 {len(articles)}개의 게시글 항목 발견")
+                return articles
+
+            pages = await asyncio.gather(*(list_page(n) for n in range(1, pages_to_scrape + 1)))
+
+            seen = set()
+            links = []
+            for articles in pages:
+                for title, relative_link in articles:
+                    if relative_link in seen:
+                        continue
+                    seen.add(relative_link)
+                    links.append((title, relative_link))
+
+            queued = iter(links)
+            in_flight = set()
+
+            def fill():
+                while len(in_flight) < self.max_in_flight:
+                    item = next(queued, None)
+                    if item is None:
+                        return
+                    in_flight.add(asyncio.create_task(self.fetch_article(client, *item)))
+
+            try:
+                fill()
+                while in_flight:
+                    done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        in_flight.discard(task)
+                        row = task.result()
+                        if row is not None:
+                            yield row
+                    fill()
+            finally:
+                for task in in_flight:
+                    task.cancel()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="대한소아청소년과학회 육아 정보를 크롤링합니다.")
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--out", default="육아_정보.csv", help="저장할 CSV (이미 있으면 새 기사만 이어 씀)")
+    parser.add_argument("--concurrency", type=int, default=4, help="호스트당 동시 요청 수")
+    parser.add_argument("--interval", type=float, default=1.0, help="호스트당 요청 간 최소 간격(초)")
+    parser.add_argument("--revalidate", action="store_true", help="받은 기사도 조건부 요청으로 변경 여부 확인")
+    parser.add_argument("--base-url", default=BASE_URL, help="테스트용 로컬 서버 주소로 바꿀 수 있음")
+    parser.add_argument("--flush-every", type=int, default=20, help="이만큼 받을 때마다 CSV 를 디스크에 내림")
+    args = parser.parse_args(argv)
+
+    crawler = PediatricsCrawler(
+        base_url=args.base_url,
+        concurrency=args.concurrency,
+        min_interval=args.interval,
+        revalidate=args.revalidate,
+    )
+    started = time.perf_counter()
+
+    async def crawl_to_csv():
+        # 전부 모았다가 쓰지 않고 받는 대로 이어 씀
+        with CsvAppender(args.out, args.flush_every) as out:
+            async for row in crawler.crawl(args.pages):
+                out.append(row)
+        return out.written
+
+    written = asyncio.run(crawl_to_csv())
+    print(f"Saved {written} new items to {args.out}")
+    print(f"{dict(crawler.stats)} ({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
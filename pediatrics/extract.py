@@ -1,103 +1,101 @@
 from urllib.parse import urljoin
-import requests
 from bs4 import BeautifulSoup
-import re
 import csv
-import time
+import os
+from pediatrics.clean import clean_article
 
 BASE_URL = "https://pediatrics.or.kr"
+CSV_FIELDS = ['site', 'title', 'content', 'full_link', 'main_url', 'relative_link']
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36'
+}
+
+
+def list_page_url(page_num, base_url=BASE_URL):
+    return f"{base_url}/bbs?code=infantcare&category=A&page={page_num}"
+
+
+def parse_list_page(html):
+    """목록 페이지에서 (제목, 상대 링크) 목록 추출"""
+    soup = BeautifulSoup(html, 'html.parser')
+    article_items = soup.find_all('dl', class_='infoItem')
+
+    articles = []
+    for item in article_items:
+        link_tag = item.select_one('dt a')
+        if link_tag is None or not link_tag.get('href'):
+            continue
+        title_tag = item.select_one('dt a strong')
+        title = title_tag.get_text(strip=True) if title_tag else "No Title"
+        articles.append((title, link_tag.get('href')))
+    return articles
+
+
+def parse_article(html):
+    """기사 페이지 HTML 에서 본문 텍스트 추출 (정리 규칙은 pediatrics.clean)"""
+    return clean_article(html)
+
+
+def make_row(title, relative_link, content, base_url=BASE_URL):
+    return {'site': "대한소아청소년과학회", 'title': title, 'content': content, 'full_link': urljoin(base_url, relative_link), 'main_url': base_url, 'relative_link': relative_link}
+
+
+class CsvAppender:
+    """기사 행을 CSV 에 이어 쓰고 flush_every 행마다 디스크에 내림
+
+    크롤링 도중 죽어도 그때까지 받은 기사는 남고, 다시 실행하면 이미 있는 full_link 는 건너뜁니다.
+    """
+
+    def __init__(self, filename, flush_every=20):
+        self.filename = filename
+        self.flush_every = flush_every
+        self.links = set()
+        self.written = 0
+        exists = os.path.exists(filename) and os.path.getsize(filename) > 0
+        if exists:
+            with open(filename, 'r', newline='', encoding='utf-8-sig') as f:
+                self.links = {row.get('full_link') for row in csv.DictReader(f)}
+        # utf-8-sig 는 쓸 때마다 BOM 을 붙이므로 이어 쓸 때는 utf-8 로 엶
+        self._file = open(filename, 'a', newline='', encoding='utf-8' if exists else 'utf-8-sig')
+        self._writer = csv.DictWriter(self._file, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        if not exists:
+            self._writer.writeheader()
+        self._unflushed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, row):
+        """새 기사면 쓰고 True, 이미 있는 기사면 False"""
+        if row['full_link'] in self.links:
+            return False
+        self.links.add(row['full_link'])
+        self._writer.writerow(row)
+        self.written += 1
+        self._unflushed += 1
+        if self._unflushed >= self.flush_every:
+            self.flush()
+        return True
+
+    def flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unflushed = 0
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
 
-def scrape_data(pages_to_scrape):
-    """대한소아청소년과학회 육아 정보 페이지에서 데이터 스크래핑"""
-    all_data = []
-    
-    base_url = f"{BASE_URL}/bbs?code=infantcare&category=A&page="
-
-    for page_num in range(1, pages_to_scrape + 1):
-        page_url = f"{base_url}{page_num}"
-        print("page_url >>>>>>", page_url)
-
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36'
-                }
-            response = requests.get(page_url, headers=headers, timeout=10)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            article_items = soup.find_all('dl', class_='infoItem')
-            print(f"{page_num}페이지: 총 {len(article_items)}개의 게시글 항목 발견")
-
-            if article_items is None:
-                print(f"{page_num}페이지에 게시글 항목이 없습니다. 다음 페이지로 넘어갑니다.")
-                continue
-
-            for item in article_items:
-                link_tag = item.select_one('dt a')
-                relative_link = link_tag.get('href')
-                full_link = urljoin(BASE_URL, relative_link)
-
-                title_tag = item.select_one('dt a strong')
-                title = title_tag.get_text(strip=True) if title_tag else "No Title"
-                
-                content = scrape_article_content(full_link, headers)
-                all_data.append({'site': "대한소아청소년과학회", 'title': title, 'content': content, 'full_link': full_link, 'main_url': BASE_URL, 'relative_link': relative_link})
-                time.sleep(5)
-
-        except requests.exceptions.RequestException as e:
-            print(f"An error occurred while scraping {page_url}: {e}")
-            break
-        
-    return all_data
-
-
-def scrape_article_content(link, headers):
-    """개별 기사 페이지에서 내용 스크래핑"""
-    try:
-        response = requests.get(link, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        content_title = soup.find('span', class_='tit').get_text(strip=True)
-
-        bbs_con = soup.select_one(".bbsCon")
-        content = bbs_con.get_text(separator=" ", strip=True)
-        
-        # 1. 불필요한 공백을 하나로 줄입니다.
-        content = re.sub(r'\s+', ' ', content).strip()
-
-        # 2. 괄호 주변의 공백을 제거합니다. 예: "( 내용 )" -> "(내용)"
-        content = re.sub(r'\s*(\(|\))\s*', r'\1', content)
-
-        # 3. 콤마(,)와 마침표(.) 주변의 공백을 제거합니다.
-        content = re.sub(r'\s*([.,?!])\s*', r'\1', content)
-
-        # 4. 리스트를 나타내는 하이픈(-) 앞에 줄바꿈을 추가합니다.
-        content = re.sub(r'([^\n])\s*-\s*', r'\1\n- ', content)
-
-        # 5. 최종적으로 연속된 줄바꿈을 하나로 줄입니다.
-        content = re.sub(r'\n{2,}', '\n', content)
-
-        print(">>>", content)
-        return content
-
-    except requests.exceptions.RequestException as e:
-        print(f"An error occurred while scraping {link}: {e}")
-        return ""
-
-def save_to_csv(data, filename):
-    keys = data[0].keys() if data else []
-    with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
-        writer = csv.DictWriter(f, fieldnames=keys)
-        writer.writeheader()
-        writer.writerows(data)
-    print(f"Saved {len(data)} items to {filename}")
 
 if __name__ == "__main__":
-    results = []
-    data_list = scrape_data(5)
-    results.extend(data_list)
-    save_to_csv(data_list, "육아_정보.csv")
+    # 크롤링은 한 경로로만: 받는 대로 CSV 에 이어 쓰는 pediatrics.crawler 로 넘김
+    from pediatrics.crawler import main
+
+    main()
 
 
@@ -0,0 +1,235 @@
+"""대한소아청소년과학회 육아 정보 기사를 청크로 만들어 벡터 스토어에 적재하는 모듈
+
+크롤러가 저장한 CSV(pediatrics.extract.CsvAppender)의 기사 행을 공용 청커(rag.chunker)로 잘라
+source="pediatrics" Document 로 만듭니다.
+
+stream_ingest 는 기사를 받는 단계 → 청크로 자르는 단계 → 임베딩해서 Chroma 에 넣는 단계를
+크기가 정해진 asyncio.Queue 로 이어서 한 번에 한 배치씩 흘려보냅니다.
+- 임베딩은 스레드에서 돌므로 그동안 이벤트 루프는 다음 기사를 받고 (CPU 와 네트워크가 겹침)
+- 임베딩이 밀려 큐가 차면 앞 단계가 기다리고, 크롤러도 새 요청을 띄우지 않습니다 (back-pressure).
+- 크롤링하면서 적재하면 받은 기사는 CSV 에 flush 단위로 이어 쓰고, 적재한 청크는 배치마다
+  manifest 에 기록하므로 중간에 죽어도 다시 실행하면 남은 것만 처리합니다.
+- 기사 삭제는 반영하지 않는 추가 전용 적재입니다.
+
+    python -m pediatrics.ingest 육아_정보.csv                  # CSV → Chroma
+    python -m pediatrics.ingest 육아_정보.csv --crawl 5        # 5페이지를 크롤링하면서 CSV 에 이어 쓰고 바로 적재
+    python -m pediatrics.ingest 육아_정보.csv --dry-run        # 적재하지 않고 청크 크기 분포만
+"""
+# Standard Libraries
+import argparse
+import asyncio
+import csv
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+# Third-party Libraries
+from langchain_core.documents import Document
+
+# Local Application Modules
+from pediatrics.extract import CsvAppender
+from rag.chunker import ChunkerConfig, ChunkStats, add_arguments, chunk_text, config_from_args
+from rag.embeddings import get_embedding_model
+from rag.ingest import PERSIST_DIR, Manifest, add_documents, build_search_indexes, make_chunk_id, open_vectorstore
+
+SITE_NAME = "대한소아청소년과학회"
+BOARD_CODE = "infantcare"  # 육아 정보 게시판 (pediatrics.extract.list_page_url)
+SOURCE = "pediatrics"
+DEFAULT_EMBED_BATCH = 64  # 한 번에 임베딩해서 넣을 청크 수
+DEFAULT_QUEUE_SIZE = 32  # 청크로 자르기를 기다리는 기사 수 상한
+BATCH_QUEUE_SIZE = 2  # 임베딩을 기다리는 배치 수 상한
+
+
+def read_rows(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        yield from csv.DictReader(f)
+
+
+def article_to_documents(
+    row: Dict[str, Any],
+    chunker: Optional[ChunkerConfig] = None,
+    stats: Optional[ChunkStats] = None,
+) -> List[Document]:
+    """기사 한 건을 청크 Document 목록으로 (기사 제목이 소제목 자리에 들어감)"""
+    chunks = chunk_text(row.get("content") or "", chunker)
+    if stats is not None:
+        stats.add(chunks)
+    documents = []
+    for index, chunk in enumerate(chunks, 1):
+        meta = {
+            "source": SOURCE,
+            "bookname": row.get("site") or SITE_NAME,
+            "chapter_id": BOARD_CODE,
+            "chapter_name": "육아 정보",
+            "sub_chapter_name": row.get("title") or "",
+            "paragraph_id": f"{index:02d}",
+            "url": row.get("full_link") or "",
+            "tokens": chunk.tokens,
+        }
+        meta["chunk_id"] = make_chunk_id(meta, chunk.text)
+        documents.append(Document(page_content=chunk.text, metadata=meta))
+    return documents
+
+
+@dataclass
+class StreamReport:
+    articles: int = 0
+    csv_written: int = 0  # CSV 에 새로 쓴 기사 수
+    chunks: int = 0
+    added: int = 0  # 새로 임베딩해서 넣은 청크 수 (manifest 에 있던 청크는 건너뜀)
+    batches: int = 0
+    fetch_wait: float = 0.0  # 청크 단계가 밀려 기사 받기를 멈춘 시간
+    chunk_wait: float = 0.0  # 임베딩 단계가 밀려 청크 자르기를 멈춘 시간
+    embed_seconds: float = 0.0
+    seconds: float = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"[{SOURCE}] 기사 {self.articles}개 (CSV 추가 {self.csv_written}개) / 청크 {self.chunks}개 / "
+            f"추가 {self.added}개 / 배치 {self.batches}개 / 임베딩 {self.embed_seconds:.2f}s / "
+            f"대기 받기 {self.fetch_wait:.2f}s · 자르기 {self.chunk_wait:.2f}s ({self.seconds:.2f}s)"
+        )
+
+
+async def iterate(rows: Iterable[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+    """CSV 행처럼 이미 있는 행을 stream_ingest 에 넘길 때 씀"""
+    for row in rows:
+        yield row
+
+
+async def stream_ingest(
+    rows: AsyncIterator[Dict[str, Any]],
+    vectorstore,
+    manifest: Manifest,
+    chunker: Optional[ChunkerConfig] = None,
+    csv_out: Optional[CsvAppender] = None,
+    embed_batch: int = DEFAULT_EMBED_BATCH,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    stats: Optional[ChunkStats] = None,
+) -> StreamReport:
+    """기사 행을 받는 대로 청크로 잘라 embed_batch 개씩 Chroma 에 넣음
+
+    csv_out 을 주면 받은 기사를 CSV 에도 이어 씁니다. 끝나면 (새 청크가 있었을 때) BM25/필터 색인을
+    다시 만듭니다.
+    """
+    started = time.perf_counter()
+    report = StreamReport()
+    articles: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    batches: asyncio.Queue = asyncio.Queue(maxsize=BATCH_QUEUE_SIZE)
+
+    async def put(queue: asyncio.Queue, item, wait_field: str) -> None:
+        waited = time.perf_counter()
+        await queue.put(item)
+        setattr(report, wait_field, getattr(report, wait_field) + time.perf_counter() - waited)
+
+    async def fetch_stage():
+        try:
+            async for row in rows:
+                report.articles += 1
+                if csv_out is not None and csv_out.append(row):
+                    report.csv_written += 1
+                await put(articles, row, "fetch_wait")
+        finally:
+            await articles.put(None)
+
+    async def chunk_stage():
+        pending: List[Document] = []
+        try:
+            while (row := await articles.get()) is not None:
+                documents = article_to_documents(row, chunker, stats)
+                report.chunks += len(documents)
+                pending.extend(documents)
+                while len(pending) >= embed_batch:
+                    await put(batches, pending[:embed_batch], "chunk_wait")
+                    pending = pending[embed_batch:]
+            if pending:
+                await put(batches, pending, "chunk_wait")
+        finally:
+            await batches.put(None)
+
+    async def embed_stage():
+        while (batch := await batches.get()) is not None:
+            embed_started = time.perf_counter()
+            # 임베딩(CPU)은 스레드에서 돌려서 그동안 이벤트 루프가 다음 기사를 받게 함
+            added = await asyncio.to_thread(add_documents, vectorstore, batch, manifest, SOURCE, embed_batch)
+            report.embed_seconds += time.perf_counter() - embed_started
+            report.added += len(added)
+            report.batches += 1
+
+    tasks = [asyncio.create_task(stage()) for stage in (fetch_stage, chunk_stage, embed_stage)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    finally:
+        if csv_out is not None:
+            csv_out.flush()
+        if report.added:
+            # 중간에 실패해도 그때까지 넣은 청크는 검색되도록 색인을 다시 만듦
+            persist_dir = os.path.dirname(manifest.path)
+            await asyncio.to_thread(build_search_indexes, vectorstore, persist_dir, manifest.corpus_version)
+        report.seconds = time.perf_counter() - started
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="육아 정보 기사를 청크로 나눠 벡터 스토어에 스트리밍 적재합니다.")
+    parser.add_argument("csv_path", nargs="?", default="육아_정보.csv", help="기사 CSV (--crawl 이면 이어 쓸 파일)")
+    parser.add_argument("--crawl", type=int, metavar="PAGES", help="CSV 를 읽는 대신 이만큼 크롤링하면서 적재")
+    parser.add_argument("--dry-run", action="store_true", help="적재하지 않고 청크 크기 분포만 출력")
+    parser.add_argument("--persist-dir", help="Chroma 저장 경로 (기본: rag.ingest.PERSIST_DIR)")
+    parser.add_argument("--embed-batch", type=int, default=DEFAULT_EMBED_BATCH, help="한 번에 적재할 청크 수")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help="자르기를 기다리는 기사 수 상한")
+    parser.add_argument("--flush-every", type=int, default=20, help="크롤링 중 이만큼 받을 때마다 CSV 를 디스크에 내림")
+    parser.add_argument("--workers", type=int, default=0, help="임베딩 워커 프로세스 수")
+    parser.add_argument("--no-cache", action="store_true", help="임베딩 캐시를 쓰지 않음")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    config = config_from_args(args)
+    stats = ChunkStats()
+    if args.dry_run:
+        articles = 0
+        for row in read_rows(args.csv_path):
+            article_to_documents(row, config, stats)
+            articles += 1
+        print(f"기사 {articles}개")
+        print(stats)
+        return
+
+    persist_dir = args.persist_dir or PERSIST_DIR
+    embedding_model = get_embedding_model(num_workers=args.workers, cache=not args.no_cache)
+    vectorstore = open_vectorstore(embedding_model, persist_dir)
+    manifest = Manifest.load(persist_dir)
+
+    async def run():
+        if args.crawl is None:
+            return await stream_ingest(
+                iterate(read_rows(args.csv_path)), vectorstore, manifest, config,
+                embed_batch=args.embed_batch, queue_size=args.queue_size, stats=stats,
+            )
+        from pediatrics.crawler import PediatricsCrawler
+
+        crawler = PediatricsCrawler()
+        with CsvAppender(args.csv_path, args.flush_every) as out:
+            report = await stream_ingest(
+                crawler.crawl(args.crawl), vectorstore, manifest, config, out,
+                embed_batch=args.embed_batch, queue_size=args.queue_size, stats=stats,
+            )
+        print(dict(crawler.stats))
+        return report
+
+    try:
+        report = asyncio.run(run())
+    finally:
+        embedding_model.close()
+    print(report)
+    print(stats)
+    print(embedding_model.stats)
+
+
+if __name__ == "__main__":
+    main()
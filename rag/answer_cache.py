@@ -0,0 +1,140 @@
+"""질문 임베딩 기반 답변 캐시
+
+"신생아 수면 습관" 처럼 같은 질문이나 거의 같은 질문이 다시 들어오면 Gemini 를 부르지 않고
+저장해둔 답변을 바로 돌려줍니다.
+
+- 질문 임베딩(정규화 벡터)의 코사인 유사도가 threshold 이상이면 같은 질문으로 봅니다.
+- ttl 초가 지난 답변은 버립니다.
+- max_entries 를 넘으면 가장 오래 안 쓴 답변부터 지웁니다.
+- 벡터 스토어의 corpus_version 이 바뀌면(청크 추가/삭제) 캐시를 전부 비웁니다.
+- 검색 필터가 다르면(scope) 같은 질문이라도 다른 답변으로 봅니다.
+- 대화 기록(history)을 이어가는 사용자의 질문은 답변이 대화에 맞춰지므로 RagPipeline 이 캐시를 거치지 않습니다.
+"""
+# Standard Libraries
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Third-party Libraries
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.93
+DEFAULT_TTL = 60 * 60
+DEFAULT_MAX_ENTRIES = 512
+
+
+@dataclass
+class CachedAnswer:
+    query: str
+    answer: str
+    context: List[Dict[str, Any]]
+    scope: str = ""
+    created_at: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+@dataclass
+class AnswerCacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+class SemanticAnswerCache:
+    def __init__(
+        self,
+        embed_query: Callable[[str], List[float]],
+        threshold: float = DEFAULT_THRESHOLD,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        corpus_version: Optional[Callable[[], Optional[str]]] = None,
+    ):
+        self.embed_query = embed_query
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.corpus_version = corpus_version
+        self.stats = AnswerCacheStats()
+
+        self._lock = threading.Lock()
+        self._version: Optional[str] = corpus_version() if corpus_version else None
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._vectors: Dict[int, np.ndarray] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+
+    def _check_version(self) -> None:
+        if self.corpus_version is None:
+            return
+        version = self.corpus_version()
+        if version != self._version:
+            self._version = version
+            self._entries.clear()
+            self._vectors.clear()
+            self.stats.invalidations += 1
+
+    def _drop(self, entry_id: int) -> None:
+        self._entries.pop(entry_id, None)
+        self._vectors.pop(entry_id, None)
+
+    def lookup(self, query: str, scope: str = "") -> Tuple[Optional[CachedAnswer], np.ndarray]:
+        """가장 비슷한 캐시 답변과 질문 벡터를 반환 (없으면 답변은 None)
+
+        질문 벡터는 store() 에 그대로 넘겨서 한 번만 임베딩하도록 합니다.
+        """
+        vector = np.asarray(self.embed_query(query), dtype=np.float32)
+        now = time.time()
+        with self._lock:
+            self._check_version()
+
+            for entry_id in [i for i, e in self._entries.items() if now - e.created_at > self.ttl]:
+                self._drop(entry_id)
+                self.stats.expired += 1
+
+            ids = [i for i, e in self._entries.items() if e.scope == scope]
+            if not ids:
+                self.stats.misses += 1
+                return None, vector
+
+            scores = np.stack([self._vectors[i] for i in ids]) @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.stats.misses += 1
+                return None, vector
+
+            entry = self._entries[ids[best]]
+            self._entries.move_to_end(ids[best])
+            entry.hits += 1
+            self.stats.hits += 1
+            return entry, vector
+
+    def store(
+        self,
+        query: str,
+        vector: np.ndarray,
+        answer: str,
+        context: List[Dict[str, Any]],
+        scope: str = "",
+    ) -> CachedAnswer:
+        entry = CachedAnswer(query=query, answer=answer, context=context, scope=scope)
+        with self._lock:
+            while len(self._entries) >= self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.stats.evictions += 1
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = entry
+            self._vectors[entry_id] = np.asarray(vector, dtype=np.float32)
+        return entry
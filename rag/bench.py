@@ -0,0 +1,259 @@
+"""정답 질문 세트로 검색 품질과 지연 시간을 재는 벤치마크
+
+data/bench/gold_questions_v*.json 의 질문마다 RagPipeline.retrieve 를 실행해서
+- recall@k, MRR: 검색 후보 순위 안에 정답 청크(정답 소제목 + evidence 문장을 포함한 청크)가 있는지
+- context 적중률: 토큰 예산/하한/MMR 을 거친 최종 context 에 정답 청크가 들어갔는지
+- 임베딩/검색/context/프롬프트 단계별 지연 p50/p95/p99, 프롬프트 토큰 수
+를 보고합니다. Gemini 는 가짜 모델(rag.llm_bench.FakeGenerativeModel)로 바꿔서 호출하지 않고,
+답변 캐시도 끄므로 오프라인에서 인덱스 설정/k/청크 방식을 바꿔가며 비교할 수 있습니다.
+
+    python -m rag.bench
+    python -m rag.bench --top-k 10 --no-lexical --out bench_vector_only.json
+    python -m rag.bench --persist-dir ./vector_db_adaptive --repeat 5
+    python -m rag.bench --rerank --rerank-top-n 5 --rerank-budget-ms 400
+    python -m rag.bench --vector-backend quantized   # python -m rag.quantized 로 만든 int8/PQ 색인
+"""
+# Standard Libraries
+import argparse
+import json
+import re
+import resource
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+# Local Application Modules
+from ai_client import GeminiClient
+from rag.embeddings import get_embedding_model
+from rag.ingest import PERSIST_DIR, hnsw_config, open_vectorstore
+from rag.llm_bench import FakeGenerativeModel, percentile
+from rag.pipeline import DEFAULT_TOKEN_BUDGET, DEFAULT_TOP_K, VECTOR_BACKENDS, RagPipeline
+from rag.reranker import DEFAULT_BUDGET_MS, DEFAULT_TOP_N, RERANKER_MODEL, CrossEncoderReranker
+
+GOLD_PATH = "data/bench/gold_questions_v1.json"
+DEFAULT_CUTOFFS = (1, 3, 5, 10, 20)
+
+whitespace_pattern = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    return whitespace_pattern.sub(" ", text or "").strip()
+
+
+@dataclass
+class GoldQuestion:
+    id: str
+    question: str
+    chapter_id: str
+    sub_chapter_name: str
+    evidence: str = ""
+    paragraph_id: Optional[str] = None
+
+    def is_relevant(self, metadata: Dict[str, Any], content: str) -> bool:
+        """정답 소제목에 속하고 evidence 문장을 포함한 청크면 정답 (청크 방식과 무관)"""
+        if metadata.get("chapter_id") != self.chapter_id or metadata.get("sub_chapter_name") != self.sub_chapter_name:
+            return False
+        return _normalize(self.evidence) in _normalize(content)
+
+
+@dataclass
+class GoldSet:
+    version: str
+    questions: List[GoldQuestion]
+
+    @classmethod
+    def load(cls, path: str = GOLD_PATH) -> "GoldSet":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["version"], [GoldQuestion(**item) for item in data["questions"]])
+
+
+@dataclass
+class QuestionResult:
+    id: str
+    question: str
+    rank: Optional[int]  # 정답 청크의 첫 순위 (1부터, 없으면 None)
+    context_hit: bool
+    candidates: int
+    prompt_tokens: int
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class BenchmarkReport:
+    gold_version: str
+    settings: Dict[str, Any]
+    questions: int = 0
+    recall: Dict[int, float] = field(default_factory=dict)
+    mrr: float = 0.0
+    context_hit_rate: float = 0.0
+    latency_ms: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    prompt_tokens: Dict[str, float] = field(default_factory=dict)
+    misses: List[str] = field(default_factory=list)
+    results: List[QuestionResult] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def __str__(self) -> str:
+        lines = [
+            f"정답 세트 {self.gold_version} / 질문 {self.questions}개 / 설정 {self.settings}",
+            " ".join(f"recall@{k} {value:.3f}" for k, value in self.recall.items())
+            + f" / MRR {self.mrr:.3f} / context 적중 {self.context_hit_rate:.3f}",
+        ]
+        for name, stats in self.latency_ms.items():
+            lines.append(
+                f"{name:<12} p50 {stats['p50']:.1f}ms / p95 {stats['p95']:.1f}ms / p99 {stats['p99']:.1f}ms"
+            )
+        lines.append(
+            f"프롬프트 토큰 평균 {self.prompt_tokens['mean']:.0f} / p95 {self.prompt_tokens['p95']:.0f} / "
+            f"최대 {self.prompt_tokens['max']:.0f}"
+        )
+        if self.misses:
+            lines.append(f"후보에 정답이 없는 질문: {', '.join(self.misses)}")
+        return "\n".join(lines)
+
+
+def _latency(values: List[float]) -> Dict[str, float]:
+    return {"p50": percentile(values, 50), "p95": percentile(values, 95), "p99": percentile(values, 99)}
+
+
+def evaluate(
+    pipeline: RagPipeline,
+    gold: GoldSet,
+    top_k: int = DEFAULT_TOP_K,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    cutoffs: Sequence[int] = DEFAULT_CUTOFFS,
+    repeat: int = 1,
+    warmup: bool = True,
+    settings: Optional[Dict[str, Any]] = None,
+) -> BenchmarkReport:
+    """질문마다 검색해서 품질 지표와 단계별 지연을 모음 (지연은 repeat 번 잰 값 전부 사용)"""
+    if warmup:
+        # 모델 로딩/HNSW 첫 접근 비용이 첫 질문 지연에 섞이지 않도록 한 번 돌려둠
+        pipeline.retrieve(gold.questions[0].question, top_k=top_k, token_budget=token_budget)
+
+    report = BenchmarkReport(gold_version=gold.version, settings=dict(settings or {}), questions=len(gold.questions))
+    samples: Dict[str, List[float]] = {
+        "embed": [], "search": [], "rerank": [], "context": [], "prompt": [], "retrieval": [],
+    }
+    for question in gold.questions:
+        for _ in range(max(1, repeat)):
+            result = pipeline.retrieve(question.question, top_k=top_k, token_budget=token_budget)
+            timings = result.timings
+            samples["embed"].append(timings.get("embed_ms", 0.0))
+            samples["search"].append(timings.get("search_ms", 0.0))
+            samples["rerank"].append(timings.get("rerank_ms", 0.0))
+            samples["context"].append(timings.get("context_ms", 0.0))
+            samples["prompt"].append(timings.get("prompt_ms", 0.0))
+            samples["retrieval"].append(
+                sum(timings.get(f"{name}_ms", 0.0) for name in ("embed", "search", "rerank", "context", "prompt"))
+            )
+
+        rank = next(
+            (i for i, c in enumerate(result.candidates, 1) if question.is_relevant(c.metadata, c.content)),
+            None,
+        )
+        relevant_ids = {c.chunk_id for c in result.candidates if question.is_relevant(c.metadata, c.content)}
+        report.results.append(QuestionResult(
+            id=question.id,
+            question=question.question,
+            rank=rank,
+            context_hit=any(item["chunk_id"] in relevant_ids for item in result.context),
+            candidates=len(result.candidates),
+            prompt_tokens=result.report.prompt_tokens if result.report else 0,
+            timings=dict(timings),
+        ))
+
+    n = max(1, len(report.results))
+    ranks = [r.rank for r in report.results]
+    report.recall = {k: sum(1 for rank in ranks if rank is not None and rank <= k) / n for k in cutoffs}
+    report.mrr = sum(1.0 / rank for rank in ranks if rank is not None) / n
+    report.context_hit_rate = sum(1 for r in report.results if r.context_hit) / n
+    report.latency_ms = {name: _latency(values) for name, values in samples.items()}
+    tokens = [r.prompt_tokens for r in report.results]
+    report.prompt_tokens = {
+        "mean": sum(tokens) / n,
+        "p95": percentile(tokens, 95),
+        "max": max(tokens, default=0),
+    }
+    report.misses = [r.id for r in report.results if r.rank is None]
+    return report
+
+
+def offline_gemini() -> GeminiClient:
+    """프롬프트 구성(build_prompt)은 실제와 같고 API 는 호출하지 않는 클라이언트"""
+    return GeminiClient(api_key="", model=FakeGenerativeModel(first_token_latency=0.0, rate_limit_ratio=0.0, seed=0))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="정답 질문 세트로 검색 품질/지연을 측정합니다 (Gemini 호출 없음).")
+    parser.add_argument("--gold", default=GOLD_PATH, help="정답 질문 세트 JSON")
+    parser.add_argument("--persist-dir", default=PERSIST_DIR, help="비교할 Chroma 저장 경로")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K, help="벡터 검색 후보 수")
+    parser.add_argument("--token-budget", type=int, default=DEFAULT_TOKEN_BUDGET)
+    parser.add_argument("--k", type=int, nargs="+", default=list(DEFAULT_CUTOFFS), help="recall@k 의 k 목록")
+    parser.add_argument("--repeat", type=int, default=3, help="지연 측정을 위해 질문마다 반복할 횟수")
+    parser.add_argument("--no-lexical", action="store_true", help="BM25 없이 벡터 검색만")
+    parser.add_argument("--no-embed-cache", action="store_true", help="임베딩 캐시를 꺼서 실제 임베딩 지연을 잼")
+    parser.add_argument("--rerank", nargs="?", const=RERANKER_MODEL, help="cross-encoder 재순위 (모델명 생략 시 기본 모델)")
+    parser.add_argument("--rerank-top-n", type=int, default=DEFAULT_TOP_N, help="재순위 후 프롬프트에 넣을 청크 수")
+    parser.add_argument("--rerank-budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="재순위 지연 예산")
+    parser.add_argument("--vector-backend", choices=VECTOR_BACKENDS, default="chroma", help="벡터 검색 색인")
+    parser.add_argument("--out", help="결과를 JSON 으로 저장할 경로 (설정끼리 비교용)")
+    args = parser.parse_args(argv)
+    if args.no_lexical and args.vector_backend == "quantized":
+        # 양자화 색인도 persist_dir 에서 읽으므로 BM25 만 따로 끌 수 없음 (벡터 검색만 비교는 python -m rag.quantized)
+        parser.error("--no-lexical 은 --vector-backend chroma 에서만 쓸 수 있습니다.")
+
+    gold = GoldSet.load(args.gold)
+    started = time.perf_counter()
+    embedding_model = get_embedding_model(num_workers=0, cache=not args.no_embed_cache)
+    vectorstore = open_vectorstore(embedding_model, persist_dir=args.persist_dir)
+    # 재순위 캐시가 반복 측정 지연을 줄이지 않도록 캐시 크기를 0 으로 둠
+    reranker = CrossEncoderReranker(args.rerank, budget_ms=args.rerank_budget_ms, cache_size=0) if args.rerank else None
+    pipeline = RagPipeline(
+        vectorstore,
+        offline_gemini(),
+        answer_cache=None,
+        persist_dir=None if args.no_lexical else args.persist_dir,
+        reranker=reranker,
+        rerank_top_n=args.rerank_top_n,
+        vector_backend=args.vector_backend,
+    )
+    warmup = pipeline.warmup()
+    load_seconds = time.perf_counter() - started
+
+    settings = {
+        "persist_dir": args.persist_dir,
+        "hnsw": asdict(hnsw_config(vectorstore)),
+        "top_k": args.top_k,
+        "token_budget": args.token_budget,
+        "lexical": not args.no_lexical,
+        "embed_cache": not args.no_embed_cache,
+        "rerank": {"model": args.rerank, "top_n": args.rerank_top_n, "budget_ms": args.rerank_budget_ms} if args.rerank else None,
+        "vector_backend": args.vector_backend,
+        "repeat": args.repeat,
+    }
+    if pipeline.vector_index is not None:
+        settings["vector_index"] = {
+            "kind": pipeline.vector_index.kind,
+            "pq_m": pipeline.vector_index.pq_m,
+            "files_kb": {name: round(size / 1024, 1) for name, size in pipeline.vector_index.file_sizes().items()},
+        }
+    report = evaluate(pipeline, gold, args.top_k, args.token_budget, args.k, args.repeat, settings=settings)
+    print(f"로딩/워밍업 {load_seconds:.2f}s {warmup}")
+    print(report)
+    # 리눅스에서 ru_maxrss 는 KB (색인별 메모리 비교용)
+    print(f"최대 RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    if reranker is not None:
+        print(reranker.stats)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(), f, ensure_ascii=False, indent=2)
+        print(f"결과를 {args.out}에 저장했습니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""청크를 디렉터리 하나에 바이너리로 저장하는 청크 스토어
+
+들여쓰기 JSON 은 본문을 page_content 와 metadata.content 에 두 번 담고, 청크 하나를 보려 해도
+파일 전체를 읽어야 했습니다. 이 형식은
+
+- text.bin      : 청크 본문(UTF-8)을 한 번씩만 이어 붙인 파일
+- offsets.u64   : 청크별 본문 시작 위치 (n + 1 개, memmap)
+- ids.bin       : 청크 ID (고정 32바이트, memmap)
+- slots.i32     : 청크 ID → 행 번호 해시 테이블 (open addressing, memmap) → ID 로 O(1) 조회
+- schema.json   : 청크 수, 메타데이터 키별 저장 방식과 (사전 인코딩 열의) 값 사전
+- 메타데이터 키별 열(column). 키 값의 종류에 따라
+  - col_XX.u32               : 값 종류가 적은 키 (챕터명, 출처 등). 사전(schema.json)의 번호로 저장
+  - num_XX.i64 / num_XX.f64  : 정수/실수 키 (문단 번호, 영상 start/end 등). has_XX.u8 에 값이 있는 행 표시
+  - val_XX.u64 + val_XX.bin  : 청크마다 값이 다른 키 (url, 제목 등). 행별 JSON 을 이어 붙이고 시작 위치만 저장
+
+로 나눠서, 열 때는 schema.json 만 읽고 나머지는 memmap 으로 필요한 부분만 읽습니다. 청크마다 다른 값은
+schema.json 에 넣지 않으므로 코퍼스가 커져도 여는 비용은 값 종류가 적은 키의 사전 크기만큼만 듭니다.
+처음부터 순서대로 읽을 때는 iter_documents 로 스트리밍합니다.
+
+    python -m rag.chunk_store chunk/childcare_guide_chunks
+    python -m rag.chunk_store chunk/childcare_guide_chunks --get <chunk_id>
+    python -m rag.chunk_store chunk/childcare_guide_chunks --jsonl > chunks.jsonl
+"""
+from __future__ import annotations
+
+# Standard Libraries
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional
+
+# Third-party Libraries
+import numpy as np
+
+# 본문/메타데이터만 읽는 쪽(rag.quantized)은 langchain 을 불러오지 않도록 Document 는 만들 때만 import
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+FORMAT_VERSION = 2
+ID_BYTES = 32
+MISSING = np.iinfo(np.uint32).max  # 메타데이터에 키가 없는 행
+EMPTY_SLOT = -1
+# 값 종류가 이 개수 이하이고 청크 수의 이 비율 이하인 키만 사전 인코딩 (나머지는 행별로 저장)
+DICT_MAX_VALUES = 1024
+DICT_MAX_RATIO = 0.5
+_ABSENT = object()
+
+
+def _slot_hash(chunk_id: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(chunk_id, digest_size=8).digest(), "little")
+
+
+def _encode_id(chunk_id: str) -> bytes:
+    raw = chunk_id.encode("ascii")
+    if len(raw) > ID_BYTES:
+        raise ValueError(f"청크 ID 는 {ID_BYTES}바이트 이하여야 합니다: {chunk_id}")
+    return raw
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and -(2 ** 63) <= value < 2 ** 63
+
+
+def _encoding(values: Dict[int, Any], count: int) -> str:
+    """열 하나의 저장 방식: int / float / dict / json"""
+    if all(_is_int(v) for v in values.values()):
+        return "int"
+    if all(isinstance(v, float) for v in values.values()):
+        return "float"
+    distinct = {json.dumps(v, ensure_ascii=False, sort_keys=True) for v in values.values()}
+    if len(distinct) <= DICT_MAX_VALUES and len(distinct) <= count * DICT_MAX_RATIO:
+        return "dict"
+    return "json"
+
+
+class _DictColumn:
+    def __init__(self, codes: np.ndarray, dictionary: List[Any]):
+        self.codes = codes
+        self.dictionary = dictionary
+
+    def get(self, index: int) -> Any:
+        code = int(self.codes[index])
+        return _ABSENT if code == MISSING else self.dictionary[code]
+
+
+class _NumberColumn:
+    def __init__(self, values: np.ndarray, present: np.ndarray, cast):
+        self.values = values
+        self.present = present
+        self.cast = cast
+
+    def get(self, index: int) -> Any:
+        return self.cast(self.values[index]) if self.present[index] else _ABSENT
+
+
+class _JsonColumn:
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self.offsets = offsets
+        self.blob = blob
+
+    def get(self, index: int) -> Any:
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        # 값이 있으면 JSON 은 최소 1바이트이므로 길이 0 은 키가 없는 행
+        return _ABSENT if start == end else json.loads(self.blob[start:end].tobytes().decode("utf-8"))
+
+
+class ChunkStore:
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "schema.json"), "r", encoding="utf-8") as f:
+            schema = json.load(f)
+        version = schema.get("version")
+        if version == 1:
+            # 예전 형식: 모든 키를 사전 인코딩
+            specs = [{"key": k, "encoding": "dict", "dictionary": d} for k, d in zip(schema["keys"], schema["dictionaries"])]
+        elif version == FORMAT_VERSION:
+            specs = schema["columns"]
+        else:
+            raise ValueError(f"지원하지 않는 청크 스토어 형식입니다: {version}")
+        self.count: int = schema["count"]
+        self.keys: List[str] = [spec["key"] for spec in specs]
+        self.encodings: List[str] = [spec["encoding"] for spec in specs]
+
+        self.offsets = self._memmap("offsets.u64", np.uint64, self.count + 1)
+        self.ids = self._memmap("ids.bin", f"S{ID_BYTES}", self.count)
+        self.slots = self._memmap("slots.i32", np.int32, None)
+        self.columns = [self._column(i, spec) for i, spec in enumerate(specs)]
+        self.text = self._memmap("text.bin", np.uint8, None)
+
+    def _column(self, i: int, spec: Dict[str, Any]):
+        encoding = spec["encoding"]
+        if encoding == "dict":
+            return _DictColumn(self._memmap(f"col_{i:02d}.u32", np.uint32, self.count), spec["dictionary"])
+        if encoding in ("int", "float"):
+            dtype, suffix, cast = (np.int64, "i64", int) if encoding == "int" else (np.float64, "f64", float)
+            return _NumberColumn(
+                self._memmap(f"num_{i:02d}.{suffix}", dtype, self.count),
+                self._memmap(f"has_{i:02d}.u8", np.uint8, self.count),
+                cast,
+            )
+        if encoding == "json":
+            return _JsonColumn(
+                self._memmap(f"val_{i:02d}.u64", np.uint64, self.count + 1),
+                self._memmap(f"val_{i:02d}.bin", np.uint8, None),
+            )
+        raise ValueError(f"지원하지 않는 메타데이터 열 형식입니다: {encoding}")
+
+    def _memmap(self, name: str, dtype, count: Optional[int]) -> np.ndarray:
+        file_path = os.path.join(self.path, name)
+        if os.path.getsize(file_path) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(file_path, dtype=dtype, mode="r", shape=(count,) if count is not None else None)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return self.index_of(chunk_id) is not None
+
+    def index_of(self, chunk_id: str) -> Optional[int]:
+        """청크 ID 의 행 번호 (없으면 None)"""
+        if not len(self.slots):
+            return None
+        key = _encode_id(chunk_id)
+        mask = len(self.slots) - 1
+        slot = _slot_hash(key) & mask
+        while True:
+            row = int(self.slots[slot])
+            if row == EMPTY_SLOT:
+                return None
+            if self.ids[row] == key:
+                return row
+            slot = (slot + 1) & mask
+
+    def chunk_id(self, index: int) -> str:
+        return self.ids[index].decode("ascii")
+
+    def page_content(self, index: int) -> str:
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        return self.text[start:end].tobytes().decode("utf-8")
+
+    def metadata(self, index: int) -> Dict[str, Any]:
+        meta = {"chunk_id": self.chunk_id(index)}
+        for key, column in zip(self.keys, self.columns):
+            value = column.get(index)
+            if value is not _ABSENT:
+                meta[key] = value
+        return meta
+
+    def document(self, index: int) -> Document:
+        from langchain_core.documents import Document
+
+        return Document(page_content=self.page_content(index), metadata=self.metadata(index))
+
+    def get(self, chunk_id: str) -> Optional[Document]:
+        index = self.index_of(chunk_id)
+        return self.document(index) if index is not None else None
+
+    def __iter__(self) -> Iterator[Document]:
+        for index in range(self.count):
+            yield self.document(index)
+
+    @staticmethod
+    def write(path: str, documents: Iterable[Document]) -> "ChunkStore":
+        """Document 들을 path 디렉터리에 저장 (임시 디렉터리에 쓴 뒤 통째로 교체)"""
+        tmp_path = path.rstrip("/") + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        ids: List[bytes] = []
+        offsets = [0]
+        keys: List[str] = []
+        key_index: Dict[str, int] = {}
+        # 열별 {행 번호: 값} (키가 없는 행은 빠짐)
+        values: List[Dict[int, Any]] = []
+        with open(os.path.join(tmp_path, "text.bin"), "wb") as text_file:
+            for doc in documents:
+                meta = dict(doc.metadata)
+                # 예전 청크는 본문을 metadata.content 에도 담았으므로 한 번만 저장
+                if meta.get("content") == doc.page_content:
+                    meta.pop("content")
+                # chunk_id 는 ids.bin 에 있으므로 열로 중복 저장하지 않음
+                chunk_id = meta.pop("chunk_id", None)
+                if not chunk_id:
+                    raise ValueError("chunk_id 가 없는 청크는 저장할 수 없습니다.")
+                ids.append(_encode_id(chunk_id))
+
+                encoded = doc.page_content.encode("utf-8")
+                text_file.write(encoded)
+                offsets.append(offsets[-1] + len(encoded))
+
+                for key, value in meta.items():
+                    if key not in key_index:
+                        key_index[key] = len(keys)
+                        keys.append(key)
+                        values.append({})
+                    values[key_index[key]][len(ids) - 1] = value
+
+        count = len(ids)
+        np.asarray(offsets, dtype=np.uint64).tofile(os.path.join(tmp_path, "offsets.u64"))
+        np.asarray(ids, dtype=f"S{ID_BYTES}").tofile(os.path.join(tmp_path, "ids.bin"))
+        columns = [
+            ChunkStore._write_column(tmp_path, i, key, values[i], count) for i, key in enumerate(keys)
+        ]
+
+        # 적재율 50% 이하인 2의 거듭제곱 크기 해시 테이블
+        size = 1
+        while size < count * 2:
+            size *= 2
+        slots = np.full(size if count else 0, EMPTY_SLOT, dtype=np.int32)
+        for row, key in enumerate(ids):
+            slot = _slot_hash(key) & (size - 1)
+            while slots[slot] != EMPTY_SLOT:
+                if ids[slots[slot]] == key:
+                    raise ValueError(f"청크 ID 가 중복됩니다: {key.decode('ascii')}")
+                slot = (slot + 1) & (size - 1)
+            slots[slot] = row
+        slots.tofile(os.path.join(tmp_path, "slots.i32"))
+
+        with open(os.path.join(tmp_path, "schema.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": FORMAT_VERSION,
+                "count": count,
+                "columns": columns,
+            }, f, ensure_ascii=False)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        return ChunkStore(path)
+
+    @staticmethod
+    def _write_column(tmp_path: str, i: int, key: str, values: Dict[int, Any], count: int) -> Dict[str, Any]:
+        """열 하나를 저장 방식에 맞는 파일로 쓰고 schema.json 에 넣을 설명을 반환"""
+        encoding = _encoding(values, count)
+        spec: Dict[str, Any] = {"key": key, "encoding": encoding}
+        if encoding == "dict":
+            dictionary: List[Any] = []
+            value_index: Dict[str, int] = {}
+            codes = np.full(count, MISSING, dtype=np.uint32)
+            for row, value in values.items():
+                token = json.dumps(value, ensure_ascii=False, sort_keys=True)
+                code = value_index.get(token)
+                if code is None:
+                    code = value_index[token] = len(dictionary)
+                    dictionary.append(value)
+                codes[row] = code
+            codes.tofile(os.path.join(tmp_path, f"col_{i:02d}.u32"))
+            spec["dictionary"] = dictionary
+        elif encoding in ("int", "float"):
+            dtype, suffix = (np.int64, "i64") if encoding == "int" else (np.float64, "f64")
+            numbers = np.zeros(count, dtype=dtype)
+            present = np.zeros(count, dtype=np.uint8)
+            rows = np.fromiter(values.keys(), dtype=np.int64, count=len(values))
+            numbers[rows] = np.fromiter(values.values(), dtype=dtype, count=len(values))
+            present[rows] = 1
+            numbers.tofile(os.path.join(tmp_path, f"num_{i:02d}.{suffix}"))
+            present.tofile(os.path.join(tmp_path, f"has_{i:02d}.u8"))
+        else:
+            offsets = np.zeros(count + 1, dtype=np.uint64)
+            with open(os.path.join(tmp_path, f"val_{i:02d}.bin"), "wb") as blob:
+                position = 0
+                for row in range(count):
+                    if row in values:
+                        encoded = json.dumps(values[row], ensure_ascii=False).encode("utf-8")
+                        blob.write(encoded)
+                        position += len(encoded)
+                    offsets[row + 1] = position
+            offsets.tofile(os.path.join(tmp_path, f"val_{i:02d}.u64"))
+        return spec
+
+
+def iter_documents(path: str) -> Iterator[Document]:
+    """청크 스토어를 처음부터 순서대로 읽음"""
+    return iter(ChunkStore(path))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="청크 스토어 정보를 보거나 청크를 꺼냅니다.")
+    parser.add_argument("path", help="청크 스토어 디렉터리")
+    parser.add_argument("--get", help="이 청크 ID 의 청크를 출력")
+    parser.add_argument("--jsonl", action="store_true", help="모든 청크를 JSON Lines 로 출력")
+    args = parser.parse_args(argv)
+
+    store = ChunkStore(args.path)
+    if args.get:
+        doc = store.get(args.get)
+        if doc is None:
+            sys.exit(f"청크 {args.get} 가 없습니다.")
+        print(json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False, indent=2))
+    elif args.jsonl:
+        for doc in store:
+            print(json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False))
+    else:
+        sizes = {name: os.path.getsize(os.path.join(args.path, name)) for name in sorted(os.listdir(args.path))}
+        print(f"청크 {len(store)}개 / 메타데이터 키 {dict(zip(store.keys, store.encodings))}")
+        print(f"파일 {sum(sizes.values()) / 1024:.1f} KB: " + ", ".join(f"{n} {s / 1024:.1f} KB" for n, s in sizes.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""구조를 따라 자르고 크기를 맞추는 청커 (책/소아청소년과학회 기사/유튜브 자막 공용)
+
+입력은 순서가 있는 단위(unit) 목록입니다. 책은 소제목 안의 문단, 기사는 빈 줄로 나눈 문단,
+유튜브는 자막 조각이 단위가 됩니다.
+
+1. max_tokens 보다 긴 단위는 줄 → 문장 경계에서 나누고 (그래도 길면 글자 수로 자름)
+2. 조각을 순서대로 target_tokens 까지 채워 청크를 만들고
+3. min_tokens 보다 짧게 남은 마지막 청크는 앞 청크에 붙이며 (max_tokens 를 넘지 않을 때)
+4. overlap_tokens 를 주면 앞 청크 끝 문장을 다음 청크 앞에 겹쳐 넣습니다.
+
+챕터/소제목 같은 위치 정보는 본문에 머리글로 반복하지 않고 메타데이터에만 둡니다.
+
+    python -m rag.chunker --target-tokens 200 --max-tokens 400   # 책 청크 크기 분포 비교
+"""
+# Standard Libraries
+import argparse
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Local Application Modules
+from rag.context import CHARS_PER_TOKEN, estimate_tokens
+
+DEFAULT_TARGET_TOKENS = 200
+DEFAULT_MIN_TOKENS = 60
+DEFAULT_MAX_TOKENS = 400
+DEFAULT_OVERLAP_TOKENS = 0
+HISTOGRAM_BIN = 50
+
+paragraph_pattern = re.compile(r"\n\s*\n")
+sentence_pattern = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass(frozen=True)
+class ChunkerConfig:
+    target_tokens: int = DEFAULT_TARGET_TOKENS
+    min_tokens: int = DEFAULT_MIN_TOKENS
+    max_tokens: int = DEFAULT_MAX_TOKENS
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS
+
+    def __post_init__(self):
+        if not 0 < self.min_tokens <= self.target_tokens <= self.max_tokens:
+            raise ValueError("min_tokens <= target_tokens <= max_tokens 이어야 합니다.")
+        if not 0 <= self.overlap_tokens < self.target_tokens:
+            raise ValueError("overlap_tokens 는 0 이상 target_tokens 미만이어야 합니다.")
+
+
+@dataclass
+class Chunk:
+    text: str
+    tokens: int
+    first_unit: int  # 청크에 들어간 첫 단위 번호
+    last_unit: int  # 마지막 단위 번호 (겹친 부분 제외)
+
+
+@dataclass
+class _Piece:
+    text: str
+    unit: int
+    tokens: int
+
+
+def _hard_split(text: str, max_tokens: int) -> List[str]:
+    size = max(1, int(max_tokens * CHARS_PER_TOKEN))
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def _split_unit(text: str, unit: int, max_tokens: int) -> List[_Piece]:
+    """max_tokens 를 넘는 단위를 줄 → 문장 → 글자 순으로 나눔"""
+    if estimate_tokens(text) <= max_tokens:
+        return [_Piece(text, unit, estimate_tokens(text))]
+    pieces = []
+    for line in (line.strip() for line in text.split("\n")):
+        if not line:
+            continue
+        for sentence in sentence_pattern.split(line):
+            parts = [sentence] if estimate_tokens(sentence) <= max_tokens else _hard_split(sentence, max_tokens)
+            pieces.extend(_Piece(part, unit, estimate_tokens(part)) for part in parts if part.strip())
+    return pieces
+
+
+def _join(pieces: Sequence[_Piece]) -> str:
+    text = ""
+    for i, piece in enumerate(pieces):
+        if i:
+            # 같은 단위에서 나온 조각은 줄바꿈, 단위가 바뀌면 빈 줄로 이어 붙임
+            text += "\n" if pieces[i - 1].unit == piece.unit else "\n\n"
+        text += piece.text
+    return text
+
+
+def chunk_units(units: Sequence[str], config: Optional[ChunkerConfig] = None) -> List[Chunk]:
+    """순서 있는 단위 목록을 크기 범위에 맞는 청크로 묶음"""
+    config = config or ChunkerConfig()
+    pieces: List[_Piece] = []
+    for unit, text in enumerate(units):
+        text = (text or "").strip()
+        if text:
+            pieces.extend(_split_unit(text, unit, config.max_tokens))
+
+    groups: List[List[_Piece]] = []
+    current: List[_Piece] = []
+    size = 0
+    for piece in pieces:
+        if current and (size >= config.target_tokens or size + piece.tokens > config.max_tokens):
+            groups.append(current)
+            current, size = [], 0
+        current.append(piece)
+        size += piece.tokens
+    if current:
+        if groups and size < config.min_tokens and sum(p.tokens for p in groups[-1]) + size <= config.max_tokens:
+            groups[-1].extend(current)
+        else:
+            groups.append(current)
+
+    chunks = []
+    previous: List[_Piece] = []
+    for group in groups:
+        overlap: List[_Piece] = []
+        if config.overlap_tokens and previous:
+            budget = config.overlap_tokens
+            for piece in reversed(previous):
+                if piece.tokens > budget:
+                    break
+                overlap.insert(0, piece)
+                budget -= piece.tokens
+        text = _join(overlap + group)
+        chunks.append(Chunk(text=text, tokens=estimate_tokens(text), first_unit=group[0].unit, last_unit=group[-1].unit))
+        previous = group
+    return chunks
+
+
+def chunk_text(text: str, config: Optional[ChunkerConfig] = None) -> List[Chunk]:
+    """빈 줄로 나눈 문단을 단위로 청크를 만듦 (기사 본문 등)"""
+    return chunk_units(paragraph_pattern.split(text or ""), config)
+
+
+@dataclass
+class ChunkStats:
+    """청크 크기(추정 토큰) 분포"""
+    sizes: List[int] = field(default_factory=list)
+    bin_size: int = HISTOGRAM_BIN
+
+    def add(self, chunks: Sequence[Chunk]) -> None:
+        self.sizes.extend(chunk.tokens for chunk in chunks)
+
+    def histogram(self) -> List[Tuple[int, int]]:
+        counts: Dict[int, int] = {}
+        for size in self.sizes:
+            start = size // self.bin_size * self.bin_size
+            counts[start] = counts.get(start, 0) + 1
+        return sorted(counts.items())
+
+    def __str__(self) -> str:
+        if not self.sizes:
+            return "청크 0개"
+        ordered = sorted(self.sizes)
+        n = len(ordered)
+        lines = [
+            f"청크 {n}개 / 토큰 최소 {ordered[0]} / 중앙값 {ordered[n // 2]} / 평균 {sum(ordered) / n:.0f} / "
+            f"최대 {ordered[-1]} / 합계 {sum(ordered)}"
+        ]
+        histogram = self.histogram()
+        peak = max(count for _, count in histogram)
+        for start, count in histogram:
+            bar = "#" * max(1, round(count / peak * 40))
+            lines.append(f"{start:>5}-{start + self.bin_size - 1:<5} {count:>5} {bar}")
+        return "\n".join(lines)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """청커 설정 CLI 옵션 (적재 스크립트들이 같이 씀)"""
+    parser.add_argument("--target-tokens", type=int, default=DEFAULT_TARGET_TOKENS, help="청크 목표 크기(추정 토큰)")
+    parser.add_argument("--min-tokens", type=int, default=DEFAULT_MIN_TOKENS, help="이보다 작은 마지막 청크는 앞에 붙임")
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS, help="청크 최대 크기(추정 토큰)")
+    parser.add_argument("--overlap-tokens", type=int, default=DEFAULT_OVERLAP_TOKENS, help="앞 청크와 겹칠 크기")
+
+
+def config_from_args(args: argparse.Namespace) -> ChunkerConfig:
+    return ChunkerConfig(args.target_tokens, args.min_tokens, args.max_tokens, args.overlap_tokens)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from rag.ingest import BOOK_PATH, load_book
+
+    parser = argparse.ArgumentParser(description="책을 주어진 설정으로 잘라 청크 크기 분포를 보여줍니다.")
+    parser.add_argument("--book", default=BOOK_PATH)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    stats = ChunkStats()
+    load_book(args.book, chunker=config_from_args(args), stats=stats)
+    print(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""검색 후보를 프롬프트용 context 로 만드는 모듈
+
+1. 실제 청크 ID 로 중복 제거
+2. 유사도 하한(score_floor) 미만 제거
+3. MMR 로 비슷한 문단끼리 겹치지 않게 순서를 정하고
+4. 토큰 예산(token_budget) 안에 들어가는 만큼만 담습니다.
+"""
+# Standard Libraries
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+# Third-party Libraries
+import numpy as np
+
+# Local Application Modules
+from rag.retriever import Candidate
+
+DEFAULT_TOKEN_BUDGET = 3000
+DEFAULT_SCORE_FLOOR = 0.3
+DEFAULT_MMR_LAMBDA = 0.7
+# Gemini 토크나이저 기준 한국어는 대략 1.5자당 1토큰 (정확한 값이 아니라 예산용 추정치)
+CHARS_PER_TOKEN = 1.5
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@dataclass
+class ContextReport:
+    candidates: int = 0
+    unique: int = 0
+    above_floor: int = 0
+    selected: int = 0
+    context_tokens: int = 0
+    token_budget: int = 0
+    prompt_chars: int = 0
+    prompt_tokens: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"후보 {self.candidates}개 → 중복 제거 {self.unique}개 → 하한 통과 {self.above_floor}개 → "
+            f"선택 {self.selected}개 / context {self.context_tokens}/{self.token_budget} 토큰"
+            + (f" / 프롬프트 약 {self.prompt_tokens} 토큰 ({self.prompt_chars}자)" if self.prompt_chars else "")
+        )
+
+
+def mmr_order(query_vector: np.ndarray, candidates: List[Candidate], mmr_lambda: float = DEFAULT_MMR_LAMBDA) -> List[Candidate]:
+    """maximal marginal relevance 순서로 후보를 정렬"""
+    if len(candidates) <= 1 or any(c.vector is None for c in candidates):
+        return list(candidates)
+
+    vectors = np.stack([c.vector for c in candidates])
+    if all(c.rerank is not None for c in candidates):
+        # cross-encoder 점수는 모델마다 범위가 달라서 후보 안에서 0~1 로 맞춤
+        rerank = np.asarray([c.rerank for c in candidates], dtype=np.float32)
+        spread = rerank.max() - rerank.min()
+        relevance = (rerank - rerank.min()) / spread if spread > 0 else np.ones(len(candidates), dtype=np.float32)
+    elif all(c.fusion is not None for c in candidates):
+        # 하이브리드 검색이면 RRF 점수를 0~1 로 맞춰서 관련도로 씀
+        fusion = np.asarray([c.fusion for c in candidates], dtype=np.float32)
+        relevance = fusion / fusion.max()
+    else:
+        relevance = vectors @ np.asarray(query_vector, dtype=np.float32)
+    pairwise = vectors @ vectors.T
+
+    remaining = list(range(len(candidates)))
+    order: List[int] = []
+    max_redundancy = np.full(len(candidates), -np.inf)
+    while remaining:
+        if order:
+            max_redundancy = np.maximum(max_redundancy, pairwise[order[-1]])
+            redundancy = max_redundancy[remaining]
+        else:
+            redundancy = np.zeros(len(remaining))
+        mmr = mmr_lambda * relevance[remaining] - (1 - mmr_lambda) * redundancy
+        best = remaining[int(np.argmax(mmr))]
+        order.append(best)
+        remaining.remove(best)
+    return [candidates[i] for i in order]
+
+
+def _rank_key(candidate: Candidate) -> Tuple[int, float]:
+    """재순위 점수 > RRF 점수 > 코사인 유사도 순으로 있는 값을 씀 (재순위된 후보가 항상 앞)"""
+    if candidate.rerank is not None:
+        return 2, candidate.rerank
+    if candidate.fusion is not None:
+        return 1, candidate.fusion
+    return 0, candidate.score
+
+
+def to_context_item(candidate: Candidate) -> Dict[str, Any]:
+    meta = candidate.metadata
+    return {
+        "chunk_id": candidate.chunk_id,
+        "bookname": meta.get("bookname", "정보 없음"),
+        "chapter_name": meta.get("chapter_name", "정보 없음"),
+        "sub_chapter_name": meta.get("sub_chapter_name", "정보 없음"),
+        "paragraph_id": meta.get("paragraph_id", "-"),
+        "content": candidate.content,
+        "score": max(0.0, min(candidate.score, 1.0)),
+    }
+
+
+def build_context(
+    candidates: List[Candidate],
+    query_vector: Optional[np.ndarray] = None,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    score_floor: float = DEFAULT_SCORE_FLOOR,
+    mmr_lambda: Optional[float] = DEFAULT_MMR_LAMBDA,
+    max_chunks: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], ContextReport]:
+    report = ContextReport(candidates=len(candidates), token_budget=token_budget)
+
+    unique: Dict[str, Candidate] = {}
+    for candidate in candidates:
+        kept = unique.get(candidate.chunk_id)
+        if kept is None or candidate.score > kept.score:
+            unique[candidate.chunk_id] = candidate
+    report.unique = len(unique)
+
+    ranked = sorted(unique.values(), key=_rank_key, reverse=True)
+    ranked = [c for c in ranked if c.score >= score_floor]
+    report.above_floor = len(ranked)
+
+    if mmr_lambda is not None and query_vector is not None:
+        ranked = mmr_order(query_vector, ranked, mmr_lambda)
+
+    context = []
+    used = 0
+    for candidate in ranked:
+        if max_chunks is not None and len(context) >= max_chunks:
+            break
+        # 출처 머리글 한 줄 정도를 포함한 토큰 수
+        cost = estimate_tokens(candidate.content) + 20
+        if used + cost > token_budget:
+            continue
+        context.append(to_context_item(candidate))
+        used += cost
+    report.selected = len(context)
+    report.context_tokens = used
+    return context, report
@@ -0,0 +1,302 @@
+"""디스크에 남는 임베딩 캐시
+
+(모델명, 정규화 여부, 텍스트) 해시를 키로 벡터를 저장해두고, 같은 텍스트는 모델을 거치지 않고
+바로 돌려줍니다. 청크를 다시 적재하거나 자주 나오는 질문을 임베딩할 때 씁니다.
+
+저장 형식 (캐시 디렉터리 하나 = 모델/정규화 조합 하나)
+- vectors.f32 : (capacity, dim) float32 memmap
+- keys.bin    : (capacity, 16) uint8 memmap, 각 슬롯에 들어있는 벡터의 키 (전부 0 이면 빈 슬롯)
+- checks.bin  : (capacity, 8) uint8 memmap, 슬롯별 blake2b(키 + 벡터 바이트) 체크섬
+- lru.i32     : 오래 안 쓴 순서대로 나열한 슬롯 번호
+- meta.json   : format, model_name, normalize, dim, capacity
+- writer.lock : 쓰기 프로세스가 잡고 있는 flock
+
+슬롯 할당(_free/_lru)은 프로세스 메모리에만 있으므로 캐시 디렉터리에 쓰는 프로세스는 하나뿐입니다.
+writer.lock 을 먼저 잡은 프로세스만 저장하고, 나머지 프로세스(uvicorn 워커 여러 개 등)는 읽기 전용으로
+열어서 조회만 합니다. 읽는 도중 쓰기 프로세스가 같은 슬롯을 덮어쓸 수 있으므로 복사한 벡터를 체크섬으로
+확인하고, 맞지 않으면 캐시 미스로 처리합니다.
+
+디스크 동기화(flush)는 새 항목이 flush_every 개 쌓였을 때와 close()/프로세스 종료 때만 해서
+질문 하나를 임베딩하는 요청 경로에서는 msync 와 lru.i32 다시 쓰기가 일어나지 않습니다.
+"""
+# Standard Libraries
+import atexit
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없이 단일 프로세스로 가정
+    fcntl = None
+
+# Third-party Libraries
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Local Application Modules
+from rag import telemetry
+
+EMBEDDING_CACHE_DIR = ".cache/embeddings"
+DEFAULT_MAX_ENTRIES = 100_000
+DEFAULT_FLUSH_EVERY = 1024  # 새로 넣은 항목이 이만큼 쌓이면 디스크에 동기화
+KEY_BYTES = 16
+CHECK_BYTES = 8
+FORMAT_VERSION = 2
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self) -> str:
+        return f"임베딩 캐시 hit {self.hits} / miss {self.misses} / evict {self.evictions} ({self.hit_rate * 100:.1f}%)"
+
+
+def cache_key(model_name: str, normalize: bool, text: str) -> bytes:
+    raw = f"{model_name}\x1f{int(normalize)}\x1f{text}".encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=KEY_BYTES).digest()
+
+
+def slot_checksum(key: bytes, vector: np.ndarray) -> bytes:
+    return hashlib.blake2b(key + np.ascontiguousarray(vector, dtype=np.float32).tobytes(), digest_size=CHECK_BYTES).digest()
+
+
+class EmbeddingCache:
+    """크기 제한이 있는 LRU 임베딩 캐시 (memmap float32 행렬 + 16바이트 키 인덱스)
+
+    writer.lock 을 잡지 못하면 read_only 로 열리고 put_many/flush 는 아무것도 하지 않습니다.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        normalize: bool = True,
+        cache_dir: str = EMBEDDING_CACHE_DIR,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        flush_every: int = DEFAULT_FLUSH_EVERY,
+    ):
+        self.model_name = model_name
+        self.normalize = normalize
+        slug = f"{model_name.replace('/', '__')}-{'norm' if normalize else 'raw'}"
+        self.path = os.path.join(cache_dir, slug)
+        self.capacity = max_entries
+        self.dim: Optional[int] = None
+        self.stats = CacheStats()
+        self.flush_every = flush_every
+
+        self._lock = threading.Lock()
+        self._dirty = 0  # 마지막 flush 이후 넣은 항목 수
+        self._vectors: Optional[np.memmap] = None
+        self._keys: Optional[np.memmap] = None
+        self._checks: Optional[np.memmap] = None
+        # key -> slot, 앞쪽일수록 오래 전에 쓴 항목
+        self._lru: "OrderedDict[bytes, int]" = OrderedDict()
+        self._free: List[int] = []
+        self._lock_file = None
+        self.read_only = not self._acquire_writer()
+        self._open_existing()
+        # close() 를 부르지 않고 끝나도 마지막 flush 이후 항목을 잃지 않도록
+        atexit.register(self.flush)
+
+    # --- 파일 관리 -------------------------------------------------------
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _acquire_writer(self) -> bool:
+        """writer.lock 을 잡으면 True (프로세스가 끝날 때까지 유지)"""
+        if fcntl is None:
+            return True
+        os.makedirs(self.path, exist_ok=True)
+        lock_file = open(self._file("writer.lock"), "a+b")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _open_existing(self) -> None:
+        meta_path = self._file("meta.json")
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if (
+            meta.get("format") != FORMAT_VERSION
+            or meta.get("model_name") != self.model_name
+            or meta.get("normalize") != self.normalize
+        ):
+            # 읽기 전용이면 그대로 두고, 쓰기 프로세스는 첫 put_many 때 새로 만듦
+            return
+        self.dim = meta["dim"]
+        self.capacity = meta["capacity"]
+        self._map_files("r" if self.read_only else "r+")
+
+        empty = bytes(KEY_BYTES)
+        raw_keys = self._keys.tobytes()
+        order: List[int] = []
+        if os.path.exists(self._file("lru.i32")):
+            order = [int(slot) for slot in np.fromfile(self._file("lru.i32"), dtype=np.int32)]
+        # lru.i32 를 쓴 뒤(마지막 flush 이후)에 채운 슬롯도 빠뜨리지 않고 인덱스에 넣음
+        seen = set(order)
+        order += [slot for slot in range(self.capacity) if slot not in seen]
+        for slot in order:
+            key = raw_keys[slot * KEY_BYTES:(slot + 1) * KEY_BYTES]
+            if key == empty or key in self._lru:
+                self._free.append(slot)
+            else:
+                self._lru[key] = slot
+
+    def _create(self, dim: int) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        self.dim = dim
+        with open(self._file("meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "format": FORMAT_VERSION,
+                "model_name": self.model_name,
+                "normalize": self.normalize,
+                "dim": dim,
+                "capacity": self.capacity,
+            }, f)
+        self._map_files("w+")
+        self._free = list(range(self.capacity - 1, -1, -1))
+
+    def _map_files(self, mode: str) -> None:
+        self._vectors = np.memmap(self._file("vectors.f32"), dtype=np.float32, mode=mode, shape=(self.capacity, self.dim))
+        self._keys = np.memmap(self._file("keys.bin"), dtype=np.uint8, mode=mode, shape=(self.capacity, KEY_BYTES))
+        self._checks = np.memmap(self._file("checks.bin"), dtype=np.uint8, mode=mode, shape=(self.capacity, CHECK_BYTES))
+
+    def flush(self) -> None:
+        with self._lock:
+            if self.read_only or self._vectors is None or not self._dirty:
+                return
+            self._dirty = 0
+            self._vectors.flush()
+            self._keys.flush()
+            self._checks.flush()
+            tmp_path = self._file("lru.i32.tmp")
+            np.fromiter(self._lru.values(), dtype=np.int32, count=len(self._lru)).tofile(tmp_path)
+            os.replace(tmp_path, self._file("lru.i32"))
+
+    def close(self) -> None:
+        """flush 한 뒤 writer.lock 을 놓아서 다른 프로세스가 쓰기 프로세스가 될 수 있게 함"""
+        self.flush()
+        with self._lock:
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+            self.read_only = True
+
+    def maybe_flush(self) -> None:
+        """새 항목이 flush_every 개 이상 쌓였을 때만 flush"""
+        if self._dirty >= self.flush_every:
+            self.flush()
+
+    # --- 조회/저장 -------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def get_many(self, texts: List[str]) -> Dict[int, np.ndarray]:
+        """texts 중 캐시에 있는 것만 {입력 위치: 벡터} 로 반환"""
+        found: Dict[int, np.ndarray] = {}
+        with self._lock:
+            for i, text in enumerate(texts):
+                key = cache_key(self.model_name, self.normalize, text)
+                slot = self._lru.get(key)
+                vector = None if slot is None else self._read_slot(slot, key)
+                if vector is None:
+                    self.stats.misses += 1
+                    continue
+                self._lru.move_to_end(key)
+                found[i] = vector
+                self.stats.hits += 1
+        return found
+
+    def _read_slot(self, slot: int, key: bytes) -> Optional[np.ndarray]:
+        """슬롯 벡터를 복사한 뒤 키와 체크섬이 맞을 때만 반환 (다른 프로세스가 덮어쓰는 중이면 None)"""
+        if bytes(self._keys[slot]) != key:
+            return None
+        vector = np.array(self._vectors[slot])
+        if bytes(self._checks[slot]) != slot_checksum(key, vector) or bytes(self._keys[slot]) != key:
+            return None
+        return vector
+
+    def put_many(self, texts: List[str], vectors: np.ndarray) -> None:
+        if not texts or self.read_only:
+            return
+        with self._lock:
+            if self._vectors is None:
+                self._create(vectors.shape[1])
+            for text, vector in zip(texts, vectors):
+                key = cache_key(self.model_name, self.normalize, text)
+                slot = self._lru.get(key)
+                if slot is None:
+                    if self._free:
+                        slot = self._free.pop()
+                    else:
+                        _, slot = self._lru.popitem(last=False)
+                        self.stats.evictions += 1
+                    self._lru[key] = slot
+                self._lru.move_to_end(key)
+                # 키를 먼저 지워서 덮어쓰는 동안에는 어떤 키로도 조회되지 않게 함
+                self._keys[slot] = 0
+                self._vectors[slot] = vector
+                self._checks[slot] = np.frombuffer(slot_checksum(key, self._vectors[slot]), dtype=np.uint8)
+                self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+                self._dirty += 1
+
+
+class CachedEmbeddings(Embeddings):
+    """EmbeddingEngine 앞단에 EmbeddingCache 를 두는 래퍼
+
+    캐시에 없는 텍스트만 모아서 한 번에 인코딩합니다.
+    """
+
+    def __init__(self, engine, cache: Optional[EmbeddingCache] = None):
+        self.engine = engine
+        self.cache = cache if cache is not None else EmbeddingCache(engine.model_name, engine.normalize)
+
+    def __getattr__(self, name):
+        # stats, model_name 등은 감싼 엔진의 것을 그대로 노출
+        if name == "engine":
+            raise AttributeError(name)
+        return getattr(self.engine, name)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        found = self.cache.get_many(texts)
+        missing = [i for i in range(len(texts)) if i not in found]
+        telemetry.count("embed_cache_hits", len(found))
+        telemetry.count("embed_cache_misses", len(missing))
+        if missing:
+            missing_texts = list(dict.fromkeys(texts[i] for i in missing))
+            encoded = self.engine.encode(missing_texts)
+            self.cache.put_many(missing_texts, encoded)
+            self.cache.maybe_flush()
+            by_text = dict(zip(missing_texts, encoded))
+            found.update((i, by_text[texts[i]]) for i in missing)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([found[i] for i in range(len(texts))]).astype(np.float32, copy=False)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+    def close(self) -> None:
+        self.cache.close()
+        self.engine.close()
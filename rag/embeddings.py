@@ -0,0 +1,225 @@
+"""ko-sbert-nli 임베딩 엔진
+
+HuggingFaceEmbeddings 기본값(단일 프로세스, 입력 순서대로 배치) 대신
+- 길이순으로 정렬해서 배치를 만들어 패딩 낭비를 줄이고
+- 문서가 많을 때는 워커 프로세스 풀로 모든 코어를 사용하며
+- 처리량(chunks/sec)을 기록합니다.
+
+LangChain Embeddings 인터페이스를 구현하므로 Chroma 의 embedding_function 으로 그대로 씁니다.
+
+    python -m rag.embeddings --batch-size 64 --workers 4
+"""
+# Standard Libraries
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from typing import List, Optional
+
+# Third-party Libraries
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_MODEL = "jhgan/ko-sbert-nli"
+DEFAULT_BATCH_SIZE = 64
+# 이보다 적은 문서는 프로세스 간 전송 비용이 더 커서 현재 프로세스에서 바로 인코딩
+POOL_THRESHOLD = 256
+WARMUP_TEXT = "워밍업"
+
+
+@dataclass
+class EmbeddingStats:
+    chunks: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def chunks_per_sec(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return f"임베딩 {self.chunks}개 / 배치 {self.batches}개 / {self.seconds:.2f}s ({self.chunks_per_sec:.1f} chunks/sec)"
+
+
+def length_sorted_batches(texts: List[str], batch_size: int) -> List[List[int]]:
+    """비슷한 길이끼리 묶이도록 긴 문장부터 정렬한 인덱스 배치"""
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def _load_model(model_name: str, device: str):
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name, device=device)
+
+
+# 워커 프로세스마다 한 번만 로드되는 모델
+_worker_model = None
+_worker_normalize = True
+
+
+def _init_worker(model_name: str, device: str, normalize: bool, torch_threads: int) -> None:
+    global _worker_model, _worker_normalize
+    import torch
+
+    torch.set_num_threads(torch_threads)
+    _worker_model = _load_model(model_name, device)
+    _worker_normalize = normalize
+
+
+def _encode_in_worker(texts: List[str]) -> np.ndarray:
+    return _worker_model.encode(
+        texts,
+        batch_size=len(texts),
+        normalize_embeddings=_worker_normalize,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    ).astype(np.float32)
+
+
+def _warm_worker(text: str) -> int:
+    """워커 하나가 모델을 로드하고 더미 배치를 인코딩했는지 확인하는 용도 (워커 pid 반환)"""
+    _encode_in_worker([text])
+    time.sleep(0.05)  # 먼저 뜬 워커 하나가 같은 라운드의 작업을 모두 가져가지 않도록
+    return os.getpid()
+
+
+class EmbeddingEngine(Embeddings):
+    """배치 크기, 워커 수를 조절할 수 있는 SentenceTransformer 임베딩
+
+    num_workers 가 0 이면 항상 현재 프로세스에서 인코딩하고,
+    None 이면 CPU 코어 수만큼 워커를 띄웁니다.
+    """
+
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL,
+        device: str = "cpu",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        normalize: bool = True,
+        num_workers: Optional[int] = 0,
+        pool_threshold: int = POOL_THRESHOLD,
+    ):
+        self.model_name = model_name
+        self.device = device
+        self.batch_size = batch_size
+        self.normalize = normalize
+        self.num_workers = (os.cpu_count() or 1) if num_workers is None else num_workers
+        self.pool_threshold = pool_threshold
+        self.stats = EmbeddingStats()
+        self._model = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = _load_model(self.model_name, self.device)
+        return self._model
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            torch_threads = max(1, (os.cpu_count() or 1) // self.num_workers)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                # torch 는 fork 이후 스레드 풀이 깨질 수 있어 spawn 으로 띄움
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.device, self.normalize, torch_threads),
+            )
+        return self._pool
+
+    def warmup(self) -> None:
+        """모델 로드와 첫 인코딩을 미리 끝냄 (워커 풀이면 모든 워커가 모델을 올릴 때까지 기다림)"""
+        if self.num_workers <= 1:
+            self.model.encode([WARMUP_TEXT], show_progress_bar=False)
+            return
+        pool = self._get_pool()
+        ready = set()
+        while len(ready) < self.num_workers:
+            ready.update(pool.map(_warm_worker, [WARMUP_TEXT] * self.num_workers))
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """texts 를 입력 순서 그대로의 (len(texts), dim) float32 행렬로 인코딩"""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        started = time.perf_counter()
+        batches = length_sorted_batches(texts, self.batch_size)
+        batch_texts = [[texts[i] for i in batch] for batch in batches]
+
+        if self.num_workers > 1 and len(texts) >= self.pool_threshold:
+            results = list(self._get_pool().map(_encode_in_worker, batch_texts))
+        else:
+            results = [
+                self.model.encode(
+                    chunk,
+                    batch_size=len(chunk),
+                    normalize_embeddings=self.normalize,
+                    convert_to_numpy=True,
+                    show_progress_bar=False,
+                ).astype(np.float32)
+                for chunk in batch_texts
+            ]
+
+        vectors = np.empty((len(texts), results[0].shape[1]), dtype=np.float32)
+        for batch, result in zip(batches, results):
+            vectors[batch] = result
+
+        self.stats.chunks += len(texts)
+        self.stats.batches += len(batches)
+        self.stats.seconds += time.perf_counter() - started
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def get_embedding_model(
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    num_workers: Optional[int] = 0,
+    cache: bool = True,
+) -> Embeddings:
+    """적재/질의 경로가 같이 쓰는 ko-sbert-nli 임베딩 (정규화 벡터, 기본으로 디스크 캐시 사용)"""
+    from rag.embedding_cache import CachedEmbeddings
+
+    engine = EmbeddingEngine(batch_size=batch_size, num_workers=num_workers)
+    return CachedEmbeddings(engine) if cache else engine
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="청크 파일로 임베딩 처리량을 측정합니다.")
+    parser.add_argument("--chunk-path", default="chunk/childcare_guide_chunks", help="청크 스토어 디렉터리")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="워커 프로세스 수 (기본: CPU 코어 수)")
+    args = parser.parse_args(argv)
+
+    from rag.chunk_store import iter_documents
+
+    texts = [doc.page_content for doc in iter_documents(args.chunk_path)]
+
+    engine = EmbeddingEngine(batch_size=args.batch_size, num_workers=args.workers, pool_threshold=0)
+    try:
+        # 워커 프로세스 spawn + 모델 로드 시간은 처리량에서 빼고 따로 출력
+        started = time.perf_counter()
+        engine.warmup()
+        load_seconds = time.perf_counter() - started
+        engine.encode(texts)
+    finally:
+        engine.close()
+    print(f"batch_size={args.batch_size} workers={engine.num_workers}")
+    print(f"모델 로드/워밍업 {load_seconds:.2f}s")
+    print(engine.stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""출처/챕터/연령대 필터용 청크 ID 집합
+
+적재(rag.ingest.sync_documents) 때 Chroma 의 전체 청크 메타데이터로 값별 청크 ID 목록을 미리
+만들어 persist_dir/facet_index.json 에 저장해둡니다. 필터가 있는 질문은 이 ID 집합의 교집합만
+벡터 검색(where chunk_id $in)과 BM25 검색에 넘겨서 해당 부분만 검색합니다.
+
+연령대는 청크 메타데이터에 없으므로 소제목/챕터명의 키워드로 먼저 정하고, 제목에 단서가 없으면
+본문 키워드로 정합니다. 한 청크가 여러 연령대에 속할 수 있습니다.
+"""
+# Standard Libraries
+import json
+import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+FACET_INDEX_NAME = "facet_index.json"
+
+# 연령대 → 키워드 (위에서부터 나이순)
+AGE_PATTERNS = {
+    "임신": re.compile(r"임신|임산부|태아|태교|태담|진통|출산|산모|산후|분만"),
+    "신생아": re.compile(r"신생아|갓난|탯줄|배꼽|황달|태어났|생후\s*[1-4]\s*주|(?<!\d)[01]\s*개월"),
+    "영아": re.compile(r"영아|영유아|이유식|이유기|뒤집기|배밀이|기어|(?<!\d)([2-9]|1[0-2])\s*개월"),
+    "유아": re.compile(r"유아|영유아|유아식|걸음마|말을 시작|기저귀 탈출|배변|떼를|돌\s*이후|(?<!\d)([1-9])\s*(세|살)|(?<!\d)(1[3-9]|[2-5]\d)\s*개월"),
+}
+AGE_GROUPS = list(AGE_PATTERNS)
+
+
+def classify_age(metadata: Dict[str, Any], content: str = "") -> List[str]:
+    """청크가 다루는 연령대 목록 (단서가 없으면 빈 목록)"""
+    title = " ".join(str(metadata.get(name) or "") for name in ("chapter_name", "sub_chapter_name"))
+    groups = [age for age, pattern in AGE_PATTERNS.items() if pattern.search(title)]
+    if groups:
+        return groups
+    body = metadata.get("content") or content
+    return [age for age, pattern in AGE_PATTERNS.items() if pattern.search(body)]
+
+
+@dataclass
+class RetrievalFilter:
+    source: Optional[List[str]] = None  # "book", "youtube", "pediatrics"
+    chapter: Optional[List[str]] = None  # chapter_id
+    age: Optional[List[str]] = None  # AGE_GROUPS
+
+    def __bool__(self) -> bool:
+        return bool(self.source or self.chapter or self.age)
+
+    def key(self) -> str:
+        """답변 캐시 등에서 필터를 구분하는 문자열 (필터가 없으면 "")"""
+        if not self:
+            return ""
+        return json.dumps(
+            {name: sorted(values) for name, values in self.__dict__.items() if values},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+
+
+class FacetIndex:
+    FIELDS = ("source", "chapter", "age")
+
+    def __init__(
+        self,
+        facets: Dict[str, Dict[str, List[str]]],
+        chapter_names: Dict[str, str],
+        corpus_version: Optional[str] = None,
+    ):
+        self.facets = facets
+        self.chapter_names = chapter_names
+        self.corpus_version = corpus_version
+        self._sets: Dict[str, Dict[str, Set[str]]] = {
+            name: {value: set(ids) for value, ids in values.items()}
+            for name, values in facets.items()
+        }
+
+    @classmethod
+    def build(
+        cls,
+        ids: Iterable[str],
+        documents: Iterable[str],
+        metadatas: Iterable[Optional[Dict[str, Any]]],
+        corpus_version: Optional[str] = None,
+    ) -> "FacetIndex":
+        facets: Dict[str, Dict[str, List[str]]] = {name: defaultdict(list) for name in cls.FIELDS}
+        chapter_names: Dict[str, str] = {}
+        for chunk_id, content, metadata in zip(ids, documents, metadatas):
+            metadata = metadata or {}
+            facets["source"][metadata.get("source") or "book"].append(chunk_id)
+            chapter_id = metadata.get("chapter_id")
+            if chapter_id:
+                facets["chapter"][chapter_id].append(chunk_id)
+                chapter_names.setdefault(chapter_id, metadata.get("chapter_name") or chapter_id)
+            for age in classify_age(metadata, content or ""):
+                facets["age"][age].append(chunk_id)
+        return cls({name: dict(values) for name, values in facets.items()}, chapter_names, corpus_version)
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "corpus_version": self.corpus_version,
+                "chapter_names": self.chapter_names,
+                "facets": self.facets,
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["FacetIndex"]:
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["facets"], data.get("chapter_names", {}), data.get("corpus_version"))
+
+    def resolve(self, retrieval_filter: Optional[RetrievalFilter]) -> Optional[Set[str]]:
+        """필터에 맞는 청크 ID 집합 (필터가 없으면 None = 전체)
+
+        같은 항목 안의 값들은 합집합, 항목끼리는 교집합입니다.
+        """
+        if not retrieval_filter:
+            return None
+        allowed: Optional[Set[str]] = None
+        for name in self.FIELDS:
+            values = getattr(retrieval_filter, name)
+            if not values:
+                continue
+            ids: Set[str] = set()
+            for value in values:
+                ids |= self._sets[name].get(value, set())
+            allowed = ids if allowed is None else allowed & ids
+        return allowed
+
+    def options(self) -> Dict[str, List[Dict[str, Any]]]:
+        """UI/API 에 보여줄 필터 값과 청크 수"""
+        return {
+            "source": [{"value": v, "label": v, "count": len(ids)} for v, ids in sorted(self.facets["source"].items())],
+            "chapter": [
+                {"value": v, "label": self.chapter_names.get(v, v), "count": len(ids)}
+                for v, ids in sorted(self.facets["chapter"].items())
+            ],
+            "age": [
+                {"value": v, "label": v, "count": len(self.facets["age"].get(v, []))}
+                for v in AGE_GROUPS
+            ],
+        }
+
+
+def index_path(persist_dir: str) -> str:
+    return os.path.join(persist_dir, FACET_INDEX_NAME)
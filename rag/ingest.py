@@ -0,0 +1,495 @@
+"""육아 가이드 청크를 Chroma 벡터 스토어에 증분 적재하는 모듈
+
+청크마다 (책/챕터/소챕터/문단 위치 + 내용) 해시로 ID를 만들고, 적재한 ID를 manifest 에
+기록해둡니다. 다시 실행하면 새로 생기거나 바뀐 청크만 임베딩하고, 사라진 청크는 Chroma 에서
+삭제합니다. 청크가 바뀌면 하이브리드 검색용 BM25 역색인(rag.lexical)과 필터용 청크 ID 집합
+(rag.facets)도 다시 만듭니다.
+
+    python -m rag.ingest
+    python -m rag.ingest --rebuild
+    python -m rag.ingest --prune-legacy
+    python -m rag.ingest --query "신생아 수면 습관을 개선하는 방법은?"
+    python -m rag.ingest --rebuild --space cosine --hnsw-m 32 --ef-construction 200 --ef-search 64
+"""
+from __future__ import annotations
+
+# Standard Libraries
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field, replace
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+# Local Application Modules
+from rag import facets, lexical, quantized
+from rag.chunker import ChunkerConfig, ChunkStats, add_arguments, chunk_units, config_from_args
+
+# langchain/Chroma/임베딩 모델은 import 만 해도 무거우므로 실제로 쓰는 함수 안에서 불러옴
+# (rag.pipeline 을 import 하는 FastAPI 앱이 이 모듈 때문에 ML 라이브러리를 미리 올리지 않도록)
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import Chroma
+    from langchain_core.documents import Document
+
+BOOK_PATH = "data/book/childcare_guide_for_new_father.txt"
+BOOK_TITLE = "초보 아빠를 위한 육아 가이드"
+CHUNK_PATH = "chunk/childcare_guide_chunks"
+PERSIST_DIR = "./vector_db"
+MANIFEST_NAME = "ingest_manifest.json"
+MANIFEST_VERSION = 1
+ADD_BATCH_SIZE = 256
+
+chapter_pattern = re.compile(r"^\[(\d{2})\. (.+?)\]$", re.MULTILINE)
+subchapter_pattern = re.compile(r"^(\d{2})\. (.+)$", re.MULTILINE)
+
+
+def make_chunk_id(metadata: Dict[str, Any], page_content: str) -> str:
+    """챕터/소챕터/문단 위치와 내용을 함께 해시한 청크 ID"""
+    key = "\x1f".join([
+        metadata.get("source", ""),
+        metadata.get("bookname", ""),
+        metadata.get("chapter_id") or "",
+        metadata.get("sub_chapter_name") or "",
+        metadata.get("paragraph_id") or "",
+        page_content,
+    ])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def split_book(
+    text: str,
+    book_title: str = BOOK_TITLE,
+    chunker: Optional[ChunkerConfig] = None,
+    stats: Optional[ChunkStats] = None,
+) -> List[Document]:
+    """책 텍스트를 챕터/소챕터로 나누고, 소챕터 안의 문단을 청커로 크기에 맞게 묶은 Document 목록"""
+    from langchain_core.documents import Document
+
+    chapters = [(m.start(), m.group(1), m.group(2)) for m in chapter_pattern.finditer(text)]
+    chapters.append((len(text), None, None))  # 마지막 챕터 끝
+
+    documents = []
+    seen_ids = set()
+    for i in range(len(chapters) - 1):
+        chap_start, chapter_id, chapter_name = chapters[i]
+        chap_end = chapters[i + 1][0]
+        chap_text = text[chap_start:chap_end]
+
+        subchapters = [(m.start(), m.group(1), m.group(2)) for m in subchapter_pattern.finditer(chap_text)]
+        subchapters.append((len(chap_text), None, None))
+
+        for j in range(len(subchapters) - 1):
+            sub_start, sub_id, sub_name = subchapters[j]
+            sub_end = subchapters[j + 1][0]
+            sub_text = chap_text[sub_start:sub_end].strip()
+            heading = f"{sub_id}. {sub_name}"
+            # 챕터 첫머리의 목차 줄은 소제목만 있는 문단이 되므로 뺌 (소제목은 메타데이터에 있음)
+            paragraphs = [p.strip() for p in re.split(r"\n\s*\n", sub_text) if p.strip() and p.strip() != heading]
+            chunks = chunk_units(paragraphs, chunker)
+            if stats is not None:
+                stats.add(chunks)
+
+            for k, chunk in enumerate(chunks, 1):
+                # 챕터/소제목은 본문에 반복하지 않고 메타데이터에만 둠
+                meta = {
+                    "source": "book",
+                    "bookname": book_title,
+                    "chapter_id": chapter_id,
+                    "chapter_name": chapter_name,
+                    "sub_chapter_name": sub_name,
+                    "paragraph_id": f"{k:02d}",
+                    "paragraph_range": f"{chunk.first_unit + 1:02d}-{chunk.last_unit + 1:02d}",
+                    "tokens": chunk.tokens,
+                }
+                meta["chunk_id"] = make_chunk_id(meta, chunk.text)
+                # 목차와 본문에 같은 소제목 줄이 반복되면 위치/내용까지 같은 청크가 생기므로 한 번만 담습니다.
+                if meta["chunk_id"] in seen_ids:
+                    continue
+                seen_ids.add(meta["chunk_id"])
+                documents.append(Document(page_content=chunk.text, metadata=meta))
+    return documents
+
+
+def load_book(
+    path: str = BOOK_PATH,
+    book_title: str = BOOK_TITLE,
+    chunker: Optional[ChunkerConfig] = None,
+    stats: Optional[ChunkStats] = None,
+) -> List[Document]:
+    with open(path, "r", encoding="utf-8") as f:
+        return split_book(f.read(), book_title, chunker, stats)
+
+
+def save_chunks(documents: List[Document], path: str = CHUNK_PATH) -> None:
+    """청크를 바이너리 청크 스토어(rag.chunk_store)로 저장"""
+    from rag.chunk_store import ChunkStore
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    ChunkStore.write(path, documents)
+
+
+class Manifest:
+    """벡터 스토어에 적재된 청크 ID 목록 (source 별로 관리)"""
+
+    def __init__(self, path: str, chunks: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.path = path
+        self.chunks: Dict[str, Dict[str, Any]] = chunks or {}
+
+    @classmethod
+    def load(cls, persist_dir: str = PERSIST_DIR) -> "Manifest":
+        path = os.path.join(persist_dir, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, data.get("chunks", {}))
+
+    @property
+    def corpus_version(self) -> str:
+        """적재된 청크 ID 전체의 해시. 청크가 추가/삭제되면 바뀝니다."""
+        digest = hashlib.sha256("\n".join(sorted(self.chunks)).encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    def ids_for(self, source: str) -> set:
+        return {chunk_id for chunk_id, info in self.chunks.items() if info.get("source") == source}
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "corpus_version": self.corpus_version,
+                "chunks": self.chunks,
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+_corpus_versions: Dict[str, tuple] = {}
+
+
+def read_corpus_version(persist_dir: str = PERSIST_DIR) -> Optional[str]:
+    """manifest 에 기록된 corpus_version (manifest 가 없으면 None)
+
+    질문마다 불리므로 manifest 파일이 바뀌었을 때만 다시 읽습니다.
+    """
+    path = os.path.join(persist_dir, MANIFEST_NAME)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _corpus_versions.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, "r", encoding="utf-8") as f:
+        version = json.load(f).get("corpus_version")
+    _corpus_versions[path] = (mtime, version)
+    return version
+
+
+@dataclass
+class IngestReport:
+    source: str
+    total: int = 0
+    added: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    seconds: float = 0.0
+    added_ids: List[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return (
+            f"[{self.source}] 전체 {self.total}개 / 추가 {self.added}개 / 삭제 {self.deleted}개 / "
+            f"유지 {self.unchanged}개 ({self.seconds:.2f}s)"
+        )
+
+
+@dataclass(frozen=True)
+class HnswConfig:
+    """Chroma 컬렉션의 HNSW 설정 (기본값은 Chroma 기본값과 같음)
+
+    space, m, ef_construction 은 색인 구조라서 컬렉션을 만들 때만 정할 수 있고 (--rebuild),
+    ef_search 는 질문 시점 탐색 폭이라 기존 컬렉션에서도 바꿀 수 있습니다.
+    """
+    space: str = "l2"
+    m: int = 16
+    ef_construction: int = 100
+    ef_search: int = 10
+
+    @classmethod
+    def from_metadata(cls, metadata: Optional[Dict[str, Any]]) -> "HnswConfig":
+        metadata = metadata or {}
+        default = cls()
+        return cls(
+            space=metadata.get("hnsw:space", default.space),
+            m=int(metadata.get("hnsw:M", default.m)),
+            ef_construction=int(metadata.get("hnsw:construction_ef", default.ef_construction)),
+            ef_search=int(metadata.get("hnsw:search_ef", default.ef_search)),
+        )
+
+    @classmethod
+    def from_collection(cls, collection) -> "HnswConfig":
+        """컬렉션의 현재 설정 (chromadb 1.x 는 configuration 이 실제 값이고 metadata 는 만들 때 값 그대로)"""
+        config = cls.from_metadata(getattr(collection, "metadata", None))
+        current = (getattr(collection, "configuration_json", None) or {}).get("hnsw") or {}
+        return cls(
+            space=current.get("space", config.space),
+            m=int(current.get("max_neighbors", config.m)),
+            ef_construction=int(current.get("ef_construction", config.ef_construction)),
+            ef_search=int(current.get("ef_search", config.ef_search)),
+        )
+
+    def to_metadata(self) -> Dict[str, Any]:
+        return {
+            "hnsw:space": self.space,
+            "hnsw:M": self.m,
+            "hnsw:construction_ef": self.ef_construction,
+            "hnsw:search_ef": self.ef_search,
+        }
+
+    def structure(self) -> tuple:
+        return (self.space, self.m, self.ef_construction)
+
+
+def hnsw_config(vectorstore: Chroma) -> HnswConfig:
+    return HnswConfig.from_collection(vectorstore._collection)
+
+
+def open_vectorstore(
+    embedding_model=None,
+    persist_dir: str = PERSIST_DIR,
+    hnsw: Optional[HnswConfig] = None,
+    recreate: bool = False,
+) -> Chroma:
+    """Chroma 를 열고, hnsw 를 주면 컬렉션 설정을 맞춤
+
+    색인 구조(space/M/ef_construction)가 다르면 recreate=True 이거나 컬렉션이 비어 있을 때만
+    컬렉션을 새로 만듭니다 (기존 벡터는 다시 적재해야 하므로 --rebuild 와 함께 씀).
+    """
+    from langchain_community.vectorstores import Chroma
+
+    from rag.embeddings import get_embedding_model
+
+    embedding_model = embedding_model or get_embedding_model()
+    vectorstore = Chroma(embedding_function=embedding_model, persist_directory=persist_dir)
+    if hnsw is None:
+        return vectorstore
+
+    current = hnsw_config(vectorstore)
+    if current == hnsw:
+        return vectorstore
+    if current.structure() != hnsw.structure():
+        if not recreate and vectorstore._collection.count() > 0:
+            raise ValueError(
+                f"기존 컬렉션의 HNSW 설정 {asdict(current)} 과 요청한 설정 {asdict(hnsw)} 이 다릅니다. "
+                "--rebuild 로 다시 적재하세요."
+            )
+        vectorstore.delete_collection()
+        return Chroma(
+            embedding_function=embedding_model,
+            persist_directory=persist_dir,
+            collection_metadata=hnsw.to_metadata(),
+        )
+
+    # ef_search 만 바뀐 경우: configuration 으로 바꿈 (metadata 에 hnsw:space 가 들어가면 modify 가 거부하고,
+    # metadata 의 hnsw:search_ef 는 이미 만든 색인에 반영되지 않음)
+    vectorstore._collection.modify(configuration={"hnsw": {"ef_search": hnsw.ef_search}})
+    return vectorstore
+
+
+def build_search_indexes(vectorstore: Chroma, persist_dir: str, corpus_version: Optional[str] = None) -> None:
+    """Chroma 에 들어있는 청크 전체(책/유튜브 등 모든 source)로 BM25 역색인과 필터용 ID 집합을 다시 만듦
+
+    양자화 벡터 색인(rag.quantized)은 이미 만들어 둔 경우에만 같은 설정으로 다시 만듭니다.
+    """
+    stored = vectorstore.get(include=["documents", "metadatas"])
+    lexical.LexicalIndex.build(zip(stored["ids"], stored["documents"]), corpus_version).save(
+        lexical.index_path(persist_dir)
+    )
+    facets.FacetIndex.build(stored["ids"], stored["documents"], stored["metadatas"], corpus_version).save(
+        facets.index_path(persist_dir)
+    )
+    quantized.rebuild_if_present(vectorstore, persist_dir, corpus_version)
+
+
+def add_documents(
+    vectorstore: Chroma,
+    documents: List[Document],
+    manifest: Manifest,
+    source: str,
+    batch_size: int = ADD_BATCH_SIZE,
+) -> List[str]:
+    """manifest 에 없는 청크만 추가하고 추가한 chunk_id 목록을 반환 (삭제나 검색 색인 갱신은 하지 않음)
+
+    크롤링하면서 배치 단위로 이어 넣을 때 씁니다. 끝나면 build_search_indexes 를 불러야 합니다.
+    """
+    current = {doc.metadata["chunk_id"]: doc for doc in documents}
+    new_ids = [chunk_id for chunk_id in current if chunk_id not in manifest.chunks]
+    for i in range(0, len(new_ids), batch_size):
+        batch_ids = new_ids[i:i + batch_size]
+        vectorstore.add_documents([current[chunk_id] for chunk_id in batch_ids], ids=batch_ids)
+        for chunk_id in batch_ids:
+            meta = current[chunk_id].metadata
+            manifest.chunks[chunk_id] = {
+                "source": source,
+                "chapter_id": meta.get("chapter_id"),
+                "sub_chapter_name": meta.get("sub_chapter_name"),
+                "paragraph_id": meta.get("paragraph_id"),
+            }
+        # 중간에 실패해도 이미 적재한 배치는 다시 임베딩하지 않도록 바로 기록
+        manifest.save()
+    return new_ids
+
+
+def legacy_ids(vectorstore: Chroma) -> set:
+    """source 메타데이터 없이 적재된 벡터 ID (manifest 이전 embedding_store.py 실행분)"""
+    stored = vectorstore.get(include=["metadatas"])
+    return {chunk_id for chunk_id, meta in zip(stored["ids"], stored["metadatas"]) if not (meta or {}).get("source")}
+
+
+def sync_documents(
+    vectorstore: Chroma,
+    documents: List[Document],
+    manifest: Manifest,
+    source: str,
+    batch_size: int = ADD_BATCH_SIZE,
+    rebuild: bool = False,
+    prune_legacy: bool = False,
+) -> IngestReport:
+    """source 에 속한 청크를 documents 와 같아지도록 추가/삭제 (rebuild 면 전부 다시 임베딩)
+
+    다른 source 의 벡터는 건드리지 않습니다. source 메타데이터가 없는 예전 벡터는
+    prune_legacy=True 일 때만 지웁니다.
+    """
+    started = time.perf_counter()
+    report = IngestReport(source=source, total=len(documents))
+
+    current = {doc.metadata["chunk_id"]: doc for doc in documents}
+    stored = manifest.ids_for(source)
+    if rebuild or not stored:
+        # manifest 에 기록되지 않은 같은 source 의 벡터 (manifest 를 잃었거나 적재 도중 중단된 경우) 도 정리
+        stored |= set(vectorstore.get(where={"source": source}, include=[])["ids"])
+    if prune_legacy:
+        stored |= legacy_ids(vectorstore)
+
+    removed = sorted(stored if rebuild else stored - current.keys())
+    for i in range(0, len(removed), batch_size):
+        vectorstore.delete(ids=removed[i:i + batch_size])
+    for chunk_id in removed:
+        manifest.chunks.pop(chunk_id, None)
+    report.deleted = len(removed)
+
+    new_ids = add_documents(vectorstore, list(current.values()), manifest, source, batch_size)
+    report.added = len(new_ids)
+    report.added_ids = new_ids
+    report.unchanged = report.total - report.added
+
+    manifest.save()
+    persist_dir = os.path.dirname(manifest.path)
+    index_paths = [lexical.index_path(persist_dir), facets.index_path(persist_dir)]
+    if removed or new_ids or not all(os.path.exists(path) for path in index_paths):
+        build_search_indexes(vectorstore, persist_dir, manifest.corpus_version)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def ingest_book(
+    book_path: str = BOOK_PATH,
+    persist_dir: str = PERSIST_DIR,
+    chunk_path: Optional[str] = CHUNK_PATH,
+    rebuild: bool = False,
+    vectorstore: Optional[Chroma] = None,
+    chunker: Optional[ChunkerConfig] = None,
+    prune_legacy: bool = False,
+) -> IngestReport:
+    stats = ChunkStats()
+    documents = load_book(book_path, chunker=chunker, stats=stats)
+    print(stats)
+    if chunk_path:
+        save_chunks(documents, chunk_path)
+        print(f"총 {len(documents)}개의 청크가 {chunk_path}에 저장되었습니다.")
+
+    vectorstore = vectorstore or open_vectorstore(persist_dir=persist_dir)
+    manifest = Manifest.load(persist_dir)
+    return sync_documents(
+        vectorstore, documents, manifest, source="book", rebuild=rebuild, prune_legacy=prune_legacy
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from rag.embeddings import DEFAULT_BATCH_SIZE, get_embedding_model
+
+    parser = argparse.ArgumentParser(description="육아 가이드 청크를 벡터 스토어에 증분 적재합니다.")
+    parser.add_argument("--book", default=BOOK_PATH, help="책 텍스트 파일 경로")
+    parser.add_argument("--persist-dir", default=PERSIST_DIR, help="Chroma 저장 경로")
+    parser.add_argument("--chunk-path", default=CHUNK_PATH, help="청크 스토어 저장 경로 (디렉터리)")
+    parser.add_argument("--rebuild", action="store_true", help="책 청크를 지우고 전부 다시 임베딩 (다른 출처는 유지)")
+    parser.add_argument(
+        "--prune-legacy", action="store_true", help="source 메타데이터 없이 예전에 적재된 벡터도 삭제"
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="임베딩 배치 크기")
+    parser.add_argument("--workers", type=int, default=None, help="임베딩 워커 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--no-cache", action="store_true", help="임베딩 캐시를 쓰지 않음")
+    parser.add_argument("--query", help="적재 후 확인용으로 검색해볼 질문")
+    parser.add_argument("--space", choices=["l2", "cosine", "ip"], help="HNSW 거리 (바꾸려면 --rebuild)")
+    parser.add_argument("--hnsw-m", type=int, help="HNSW 노드당 연결 수 M (바꾸려면 --rebuild)")
+    parser.add_argument("--ef-construction", type=int, help="HNSW 색인 생성 탐색 폭 (바꾸려면 --rebuild)")
+    parser.add_argument("--ef-search", type=int, help="HNSW 질문 시점 탐색 폭")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    embedding_model = get_embedding_model(
+        batch_size=args.batch_size,
+        num_workers=args.workers,
+        cache=not args.no_cache,
+    )
+    overrides = {
+        name: value
+        for name, value in (
+            ("space", args.space),
+            ("m", args.hnsw_m),
+            ("ef_construction", args.ef_construction),
+            ("ef_search", args.ef_search),
+        )
+        if value is not None
+    }
+    hnsw = None
+    if overrides:
+        previous = hnsw_config(open_vectorstore(embedding_model, args.persist_dir))
+        hnsw = replace(previous, **overrides)
+    vectorstore = open_vectorstore(embedding_model, args.persist_dir, hnsw, recreate=args.rebuild)
+    if hnsw is not None and hnsw.structure() != previous.structure():
+        # 컬렉션을 새로 만들었으므로 다른 source(유튜브 등)의 기록도 비워서 다시 적재되게 함
+        manifest = Manifest.load(args.persist_dir)
+        manifest.chunks.clear()
+        manifest.save()
+        print("컬렉션을 새 HNSW 설정으로 다시 만들었습니다. 유튜브 등 다른 출처도 다시 적재하세요.")
+    print(f"HNSW 설정: {asdict(hnsw_config(vectorstore))}")
+    try:
+        report = ingest_book(
+            args.book,
+            args.persist_dir,
+            args.chunk_path,
+            args.rebuild,
+            vectorstore,
+            config_from_args(args),
+            args.prune_legacy,
+        )
+    finally:
+        embedding_model.close()
+    print(report)
+    print(embedding_model.stats)
+    if not args.no_cache:
+        print(embedding_model.cache.stats)
+
+    if args.query:
+        for doc, score in vectorstore.similarity_search_with_score(args.query, k=5):
+            print(f"{score:.4f}", doc.metadata.get("chapter_name"), doc.page_content[:100], "...")
+
+
+if __name__ == "__main__":
+    main()
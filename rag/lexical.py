@@ -0,0 +1,155 @@
+"""청크 본문의 문자 n-gram BM25 역색인
+
+한국어는 조사/어미가 붙어서 형태소 분석기 없이 띄어쓰기 단위로 자르면 "6개월에는" 과 "6개월"
+이 다른 단어가 됩니다. 그래서 어절을 문자 bigram 으로 쪼개서 색인합니다 (한 글자 어절은 그대로).
+
+색인은 적재(rag.ingest.sync_documents)로 청크가 바뀔 때마다 Chroma 의 전체 청크로 다시 만들고,
+persist_dir/lexical_index.npz 에 CSR 형태(어휘별 posting 구간 + 문서 번호 + 빈도)로 저장합니다.
+"""
+# Standard Libraries
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Third-party Libraries
+import numpy as np
+
+LEXICAL_INDEX_NAME = "lexical_index.npz"
+NGRAM = 2
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+word_pattern = re.compile(r"\w+")
+
+
+def tokenize(text: str, n: int = NGRAM) -> List[str]:
+    tokens = []
+    for word in word_pattern.findall(text.lower()):
+        if len(word) <= n:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return tokens
+
+
+class LexicalIndex:
+    def __init__(
+        self,
+        chunk_ids: np.ndarray,
+        terms: np.ndarray,
+        indptr: np.ndarray,
+        postings: np.ndarray,
+        freqs: np.ndarray,
+        doc_lengths: np.ndarray,
+        corpus_version: Optional[str] = None,
+    ):
+        self.chunk_ids = chunk_ids
+        self.terms = terms
+        self.indptr = indptr
+        self.postings = postings
+        self.freqs = freqs
+        self.doc_lengths = doc_lengths
+        self.corpus_version = corpus_version
+        self.vocabulary: Dict[str, int] = {term: i for i, term in enumerate(terms.tolist())}
+        self.positions: Dict[str, int] = {chunk_id: i for i, chunk_id in enumerate(chunk_ids.tolist())}
+        self.avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[str, str]], corpus_version: Optional[str] = None) -> "LexicalIndex":
+        """(chunk_id, 본문) 목록으로 색인을 만듦"""
+        chunk_ids = []
+        doc_lengths = []
+        inverted: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for doc_index, (chunk_id, text) in enumerate(documents):
+            tokens = tokenize(text)
+            chunk_ids.append(chunk_id)
+            doc_lengths.append(len(tokens))
+            for term, count in Counter(tokens).items():
+                inverted[term].append((doc_index, count))
+
+        terms = sorted(inverted)
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        for i, term in enumerate(terms):
+            indptr[i + 1] = indptr[i] + len(inverted[term])
+        postings = np.empty(indptr[-1], dtype=np.int32)
+        freqs = np.empty(indptr[-1], dtype=np.uint16)
+        for i, term in enumerate(terms):
+            pairs = np.asarray(inverted[term], dtype=np.int64)
+            postings[indptr[i]:indptr[i + 1]] = pairs[:, 0]
+            freqs[indptr[i]:indptr[i + 1]] = np.minimum(pairs[:, 1], np.iinfo(np.uint16).max)
+
+        return cls(
+            chunk_ids=np.asarray(chunk_ids, dtype=str),
+            terms=np.asarray(terms, dtype=str),
+            indptr=indptr,
+            postings=postings,
+            freqs=freqs,
+            doc_lengths=np.asarray(doc_lengths, dtype=np.int32),
+            corpus_version=corpus_version,
+        )
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            chunk_ids=self.chunk_ids,
+            terms=self.terms,
+            indptr=self.indptr,
+            postings=self.postings,
+            freqs=self.freqs,
+            doc_lengths=self.doc_lengths,
+            corpus_version=np.asarray(self.corpus_version or "", dtype=str),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["LexicalIndex"]:
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                chunk_ids=data["chunk_ids"],
+                terms=data["terms"],
+                indptr=data["indptr"],
+                postings=data["postings"],
+                freqs=data["freqs"],
+                doc_lengths=data["doc_lengths"],
+                corpus_version=str(data["corpus_version"]) or None,
+            )
+
+    def search(self, query: str, k: int = 20, allowed: Optional[set] = None) -> List[Tuple[str, float]]:
+        """BM25 점수 상위 k 개의 (chunk_id, 점수). allowed 를 주면 그 청크 안에서만 찾음"""
+        if not len(self.chunk_ids):
+            return []
+        scores = np.zeros(len(self.chunk_ids), dtype=np.float32)
+        n_docs = len(self.chunk_ids)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths / max(self.avg_length, 1e-9))
+        for term, query_count in Counter(tokenize(query)).items():
+            term_index = self.vocabulary.get(term)
+            if term_index is None:
+                continue
+            start, end = self.indptr[term_index], self.indptr[term_index + 1]
+            docs = self.postings[start:end]
+            tf = self.freqs[start:end].astype(np.float32)
+            idf = np.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += query_count * idf * tf * (BM25_K1 + 1) / (tf + norm[docs])
+
+        if allowed is not None:
+            mask = np.zeros(n_docs, dtype=bool)
+            mask[[self.positions[chunk_id] for chunk_id in allowed if chunk_id in self.positions]] = True
+            scores[~mask] = 0.0
+        matched = np.flatnonzero(scores > 0)
+        if not len(matched):
+            return []
+        top = matched[np.argsort(-scores[matched], kind="stable")[:k]]
+        return [(str(self.chunk_ids[i]), float(scores[i])) for i in top]
+
+
+def index_path(persist_dir: str) -> str:
+    return os.path.join(persist_dir, LEXICAL_INDEX_NAME)
+
@@ -0,0 +1,173 @@
+"""Gemini 없이 GeminiClient 동시 처리량을 재는 스크립트
+
+FakeGenerativeModel 은 generate_content / generate_content_async 를 흉내내는 가짜 모델로,
+정해진 지연 후 답변 조각을 돌려주고 일정 비율로 429 에러를 냅니다.
+
+    python -m rag.llm_bench --requests 200 --concurrency 32 --max-concurrency 8
+"""
+# Standard Libraries
+import argparse
+import asyncio
+import random
+import statistics
+import threading
+import time
+from typing import List, Optional
+
+# Local Application Modules
+from ai_client import GeminiClient
+
+
+class FakeRateLimitError(Exception):
+    code = 429
+
+
+class _Chunk:
+    def __init__(self, text: str):
+        self.text = text
+        self.parts = [text]
+
+
+class _Response:
+    def __init__(self, chunks: List[str]):
+        self.chunks = [_Chunk(c) for c in chunks]
+        self.text = "".join(chunks)
+        self.parts = self.chunks
+
+
+class _AsyncStream:
+    def __init__(self, chunks: List[str], chunk_latency: float):
+        self._chunks = chunks
+        self._chunk_latency = chunk_latency
+
+    async def __aiter__(self):
+        for text in self._chunks:
+            await asyncio.sleep(self._chunk_latency)
+            yield _Chunk(text)
+
+
+class FakeGenerativeModel:
+    def __init__(
+        self,
+        first_token_latency: float = 0.3,
+        chunk_latency: float = 0.02,
+        chunks: int = 20,
+        rate_limit_ratio: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.first_token_latency = first_token_latency
+        self.chunk_latency = chunk_latency
+        self.chunks = [f"답변 조각 {i} " for i in range(chunks)]
+        self.rate_limit_ratio = rate_limit_ratio
+        self.calls = 0
+        self.rate_limited = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _maybe_rate_limit(self) -> None:
+        with self._lock:
+            self.calls += 1
+            if self._random.random() < self.rate_limit_ratio:
+                self.rate_limited += 1
+                raise FakeRateLimitError("429 Resource has been exhausted")
+
+    def generate_content(self, contents, stream: bool = False):
+        self._maybe_rate_limit()
+        time.sleep(self.first_token_latency)
+        if not stream:
+            time.sleep(self.chunk_latency * len(self.chunks))
+            return _Response(self.chunks)
+
+        def iterate():
+            for text in self.chunks:
+                time.sleep(self.chunk_latency)
+                yield _Chunk(text)
+        return iterate()
+
+    async def generate_content_async(self, contents, stream: bool = False):
+        self._maybe_rate_limit()
+        await asyncio.sleep(self.first_token_latency)
+        if not stream:
+            await asyncio.sleep(self.chunk_latency * len(self.chunks))
+            return _Response(self.chunks)
+        return _AsyncStream(self.chunks, self.chunk_latency)
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_bench(client: GeminiClient, requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    first_tokens: List[float] = []
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(i)
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            first = None
+            try:
+                async for _ in client.agenerate_response_stream(f"질문 {i}", [], user_id=f"user-{i % concurrency}"):
+                    if first is None:
+                        first = time.perf_counter() - started
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            first_tokens.append(first or 0.0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_p50": statistics.median(latencies) if latencies else 0.0,
+        "latency_p95": percentile(latencies, 95),
+        "ttft_p50": statistics.median(first_tokens) if first_tokens else 0.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="가짜 모델로 GeminiClient 동시 처리량을 측정합니다.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32, help="동시에 요청하는 사용자 수")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="GeminiClient 동시 호출 제한")
+    parser.add_argument("--history-turns", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.3, help="가짜 모델 첫 토큰 지연(초)")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    model = FakeGenerativeModel(first_token_latency=args.latency, rate_limit_ratio=args.rate_limit_ratio, seed=0)
+    client = GeminiClient(
+        api_key="",
+        model=model,
+        max_concurrency=args.max_concurrency,
+        history_turns=args.history_turns,
+        backoff_base=0.05,
+    )
+    result = asyncio.run(run_bench(client, args.requests, args.concurrency))
+    print(
+        f"요청 {result['requests']}개 (실패 {result['errors']}) / {result['seconds']:.2f}s / "
+        f"{result['throughput']:.1f} req/s / p50 {result['latency_p50'] * 1000:.0f}ms / "
+        f"p95 {result['latency_p95'] * 1000:.0f}ms / TTFT p50 {result['ttft_p50'] * 1000:.0f}ms / "
+        f"모델 호출 {model.calls}회 (429 {model.rate_limited}회)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""질문 → 검색 → context → Gemini 답변까지의 RAG 파이프라인
+
+Streamlit 앱과 FastAPI 라우터가 같은 파이프라인 인스턴스(임베딩 모델, Chroma, 답변 캐시)를
+프로세스당 한 번만 만들어서 공유합니다.
+"""
+# Standard Libraries
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+# Third-party Libraries
+import numpy as np
+
+# Local Application Modules
+from rag.answer_cache import CachedAnswer, SemanticAnswerCache
+from rag.context import ContextReport, build_context, estimate_tokens
+from rag.ingest import PERSIST_DIR, hnsw_config, open_vectorstore, read_corpus_version
+from rag import facets, lexical, quantized, telemetry
+from rag.facets import FacetIndex, RetrievalFilter
+from rag.lexical import LexicalIndex
+from rag.quantized import QuantizedIndex
+from rag.reranker import DEFAULT_TOP_N, CrossEncoderReranker
+from rag.retriever import Candidate, hybrid_search, search
+from rag.telemetry import Trace
+
+# BM25 와 합치면 적은 후보로도 정확한 용어가 들어간 문단을 찾으므로 벡터 후보는 20개면 충분
+DEFAULT_TOP_K = 20
+DEFAULT_TOKEN_BUDGET = 3000
+VECTOR_BACKENDS = ("chroma", "quantized")
+
+
+@dataclass
+class RagResult:
+    query: str
+    query_vector: np.ndarray
+    context: List[Dict[str, Any]] = field(default_factory=list)
+    report: Optional[ContextReport] = None
+    cached: Optional[CachedAnswer] = None
+    timings: Dict[str, float] = field(default_factory=dict)  # 단계별 ms
+    filters: Optional[RetrievalFilter] = None
+    candidates: List[Candidate] = field(default_factory=list)  # context 로 고르기 전 검색 후보 (순위순)
+    trace: Optional[Trace] = None  # 단계별 span (timings 와 같은 dict 에 기록)
+    cacheable: bool = True  # 이전 대화가 있는 사용자의 답변은 답변 캐시에 넣지 않음
+
+    @property
+    def cache_hit(self) -> bool:
+        return self.cached is not None
+
+
+class _Timer:
+    def __init__(self, timings: Dict[str, float], name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings[self.name] = (time.perf_counter() - self.started) * 1000
+
+
+class RagPipeline:
+    def __init__(
+        self,
+        vectorstore,
+        gemini,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        top_k: int = DEFAULT_TOP_K,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        persist_dir: Optional[str] = None,
+        reranker: Optional[CrossEncoderReranker] = None,
+        rerank_top_n: int = DEFAULT_TOP_N,
+        vector_backend: str = "chroma",
+    ):
+        if vector_backend not in VECTOR_BACKENDS:
+            raise ValueError(f"vector_backend 는 {VECTOR_BACKENDS} 중 하나여야 합니다: {vector_backend}")
+        if vector_backend == "quantized" and persist_dir is None:
+            raise ValueError("quantized 벡터 검색에는 persist_dir 가 필요합니다.")
+        self.vectorstore = vectorstore
+        self.gemini = gemini
+        self.answer_cache = answer_cache
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.persist_dir = persist_dir
+        # 있으면 검색 후보를 cross-encoder 로 다시 매기고 상위 rerank_top_n 개만 프롬프트에 넣음
+        self.reranker = reranker
+        self.rerank_top_n = rerank_top_n
+        # 컬렉션의 HNSW 거리 종류에 맞춰 거리를 유사도로 바꿈
+        self.space = hnsw_config(vectorstore).space
+        # quantized 면 벡터 검색을 Chroma HNSW 대신 persist_dir 의 양자화 색인(memmap)으로 함
+        # (Chroma 는 임베딩 모델과 적재용으로 계속 열어둠)
+        self.vector_backend = vector_backend
+        self._vector_index: Optional[QuantizedIndex] = None
+        self._lexical_index: Optional[LexicalIndex] = None
+        self._facet_index: Optional[FacetIndex] = None
+        self._index_version: Optional[str] = None
+
+    @classmethod
+    def load(cls, gemini, persist_dir: str = PERSIST_DIR, **kwargs) -> "RagPipeline":
+        vectorstore = open_vectorstore(persist_dir=persist_dir)
+        answer_cache = SemanticAnswerCache(
+            embed_query=vectorstore.embeddings.embed_query,
+            corpus_version=lambda: read_corpus_version(persist_dir),
+        )
+        return cls(vectorstore, gemini, answer_cache, persist_dir=persist_dir, **kwargs)
+
+    def warmup(self) -> Dict[str, float]:
+        """임베딩 모델 로드, 더미 인코딩, HNSW 색인 로드, BM25/필터 색인 로드(, 재순위 모델 로드)를 미리 해둠
+
+        프로세스 시작 때 한 번 불러서 첫 사용자 요청이 콜드 스타트 비용을 내지 않게 합니다.
+        단계별 소요 시간(ms)을 반환합니다.
+        """
+        timings: Dict[str, float] = {}
+        embeddings = self.vectorstore.embeddings
+        # 캐시를 거치지 않고 실제 모델로 인코딩해야 워밍업이 됨
+        engine = getattr(embeddings, "engine", embeddings)
+        with _Timer(timings, "model_load_ms"):
+            getattr(engine, "model", None)
+        with _Timer(timings, "encode_ms"):
+            vector = np.asarray(engine.embed_query("워밍업"), dtype=np.float32)
+        with _Timer(timings, "index_load_ms"):
+            if self.vector_backend == "quantized":
+                # 양자화 색인을 열고 코드 페이지를 한 번 읽어둠
+                self._refresh_indexes()
+                if len(self._vector_index):
+                    self._vector_index.search(vector, k=1)
+            # 첫 질의 때 디스크의 HNSW 색인을 메모리로 읽음
+            elif self.vectorstore._collection.count() > 0:
+                search(self.vectorstore, vector, k=1, space=self.space)
+        with _Timer(timings, "lexical_load_ms"):
+            self._refresh_indexes()
+        if self.reranker is not None:
+            with _Timer(timings, "rerank_load_ms"):
+                self.reranker.warmup()
+        return timings
+
+    def _refresh_indexes(self) -> None:
+        """적재로 corpus_version 이 바뀌었거나 아직 색인이 없으면 BM25/필터(/양자화 벡터) 색인을 다시 읽음"""
+        if self.persist_dir is None:
+            return
+        version = read_corpus_version(self.persist_dir)
+        quantized_ready = self.vector_backend != "quantized" or self._vector_index is not None
+        if (
+            self._index_version == version
+            and self._lexical_index is not None
+            and self._facet_index is not None
+            and quantized_ready
+        ):
+            return
+        self._lexical_index = LexicalIndex.load(lexical.index_path(self.persist_dir))
+        self._facet_index = FacetIndex.load(facets.index_path(self.persist_dir))
+        if self.vector_backend == "quantized":
+            self._vector_index = QuantizedIndex.load(quantized.index_path(self.persist_dir))
+            if self._vector_index is None:
+                raise RuntimeError("양자화 벡터 색인이 없습니다. python -m rag.quantized 로 먼저 만드세요.")
+        self._index_version = version
+
+    @property
+    def vector_index(self) -> Optional[QuantizedIndex]:
+        """양자화 벡터 색인 (vector_backend 가 chroma 면 None)"""
+        if self.vector_backend != "quantized":
+            return None
+        self._refresh_indexes()
+        return self._vector_index
+
+    @property
+    def lexical_index(self) -> Optional[LexicalIndex]:
+        """BM25 역색인 (없으면 벡터 검색만)"""
+        self._refresh_indexes()
+        return self._lexical_index
+
+    @property
+    def facet_index(self) -> Optional[FacetIndex]:
+        """출처/챕터/연령대 필터용 청크 ID 집합"""
+        self._refresh_indexes()
+        return self._facet_index
+
+    def filter_options(self) -> Dict[str, List[Dict[str, Any]]]:
+        index = self.facet_index
+        return index.options() if index is not None else {name: [] for name in FacetIndex.FIELDS}
+
+    def _allowed_ids(self, filters: Optional[RetrievalFilter]) -> Optional[set]:
+        if not filters:
+            return None
+        index = self.facet_index
+        if index is None:
+            raise RuntimeError("필터 색인이 없습니다. python -m rag.ingest 로 먼저 적재하세요.")
+        return index.resolve(filters)
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        token_budget: Optional[int] = None,
+        filters: Optional[RetrievalFilter] = None,
+        user_id: Optional[str] = None,
+    ) -> RagResult:
+        """답변 캐시를 확인하고, 없으면 검색해서 context 를 만듦 (Gemini 호출 전까지)
+
+        user_id 의 이전 대화가 있으면 답변이 그 대화에 맞춰 생성되므로 답변 캐시를 조회/저장하지 않습니다.
+        (다른 사용자에게 대화 맥락이 섞인 답변이 나가지 않도록)
+        """
+        timings: Dict[str, float] = {}
+        trace = Trace(timings=timings)
+        scope = filters.key() if filters else ""
+        cacheable = self.answer_cache is not None and not self.gemini.history.get(user_id)
+        with trace.activate():
+            with trace.span("embed"):
+                if cacheable:
+                    cached, query_vector = self.answer_cache.lookup(query, scope)
+                else:
+                    cached, query_vector = None, np.asarray(self.vectorstore.embeddings.embed_query(query), dtype=np.float32)
+            result = RagResult(
+                query=query,
+                query_vector=query_vector,
+                cached=cached,
+                timings=timings,
+                filters=filters,
+                trace=trace,
+                cacheable=cacheable,
+            )
+            trace.annotate(cache_hit=cached is not None)
+            if scope:
+                trace.annotate(filters=scope)
+            if cached is not None:
+                result.context = cached.context
+                return result
+
+            # 답변 캐시 조회에 쓴 질문 벡터로 바로 검색해서 임베딩을 한 번만 합니다.
+            with trace.span("search"):
+                candidates = hybrid_search(
+                    self.vectorstore,
+                    self.lexical_index,
+                    query,
+                    query_vector,
+                    k=top_k or self.top_k,
+                    allowed=self._allowed_ids(filters),
+                    space=self.space,
+                    vector_index=self.vector_index,
+                )
+            context_candidates, max_chunks = candidates, None
+            if self.reranker is not None and candidates:
+                with trace.span("rerank"):
+                    candidates = self.reranker.rerank(query, candidates)
+                # 예산 안에 점수를 못 매긴 후보는 1차 순위가 낮은 쪽이므로 context 에서 뺌
+                context_candidates = [c for c in candidates if c.rerank is not None]
+                max_chunks = self.rerank_top_n
+            result.candidates = candidates
+            with trace.span("context"):
+                result.context, result.report = build_context(
+                    context_candidates,
+                    query_vector,
+                    token_budget=token_budget or self.token_budget,
+                    max_chunks=max_chunks,
+                )
+            with trace.span("prompt"):
+                prompt_text = self.gemini.build_prompt(query, result.context)
+                result.report.prompt_chars = len(prompt_text)
+                result.report.prompt_tokens = estimate_tokens(prompt_text)
+            trace.annotate(
+                candidates=len(candidates), context_chunks=len(result.context), prompt_tokens=result.report.prompt_tokens
+            )
+        return result
+
+    def _generate_span(self, result: RagResult):
+        trace = result.trace or Trace(timings=result.timings)
+        return trace.span("generate")
+
+    @staticmethod
+    def _first_token(result: RagResult, span, started: float) -> None:
+        first_token_ms = (time.perf_counter() - started) * 1000
+        result.timings["first_token_ms"] = first_token_ms
+        span.attributes["first_token_ms"] = round(first_token_ms, 2)
+
+    def _generated(self, result: RagResult, answer: str) -> None:
+        """Gemini 답변을 끝까지 받은 뒤: 답변 토큰 수를 trace 에 남기고 답변 캐시에 저장"""
+        if result.trace is not None:
+            result.trace.annotate(response_tokens=estimate_tokens(answer))
+        self._store(result, answer)
+
+    def _store(self, result: RagResult, answer: str) -> None:
+        if self.answer_cache is not None and result.cacheable and answer:
+            scope = result.filters.key() if result.filters else ""
+            self.answer_cache.store(result.query, result.query_vector, answer, result.context, scope)
+
+    def _cached_answer(self, result: RagResult, user_id: Optional[str]) -> str:
+        """캐시 답변도 Gemini 답변과 똑같이 사용자 대화 기록에 남김 (다음 질문의 history 가 비지 않도록)"""
+        answer = result.cached.answer
+        self.gemini.history.append(user_id, result.query, answer)
+        return answer
+
+    def stream_answer(self, result: RagResult, user_id: Optional[str] = None) -> Iterator[str]:
+        if result.cached is not None:
+            yield self._cached_answer(result, user_id)
+            return
+        started = time.perf_counter()
+        chunks = []
+        with self._generate_span(result) as span:
+            for chunk in self.gemini.generate_response_stream(result.query, result.context, user_id=user_id):
+                if not chunks:
+                    self._first_token(result, span, started)
+                chunks.append(chunk)
+                yield chunk
+        # 끝까지 받은 답변만 캐시에 저장
+        self._generated(result, "".join(chunks))
+
+    # --- 비동기 API (FastAPI) ------------------------------------------------
+    async def aretrieve(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        token_budget: Optional[int] = None,
+        filters: Optional[RetrievalFilter] = None,
+        user_id: Optional[str] = None,
+    ) -> RagResult:
+        if telemetry.profiling_active():
+            # pyinstrument 는 시작한 스레드만 샘플링하므로 프로파일링하는 요청은 이벤트 루프에서 바로 실행
+            return self.retrieve(query, top_k, token_budget, filters, user_id)
+        # 임베딩/검색은 CPU 작업이라 이벤트 루프를 막지 않도록 스레드에서 실행
+        return await asyncio.to_thread(self.retrieve, query, top_k, token_budget, filters, user_id)
+
+    async def aanswer(self, result: RagResult, user_id: Optional[str] = None) -> str:
+        if result.cached is not None:
+            return self._cached_answer(result, user_id)
+        with self._generate_span(result):
+            answer = await self.gemini.agenerate_response(result.query, result.context, user_id=user_id)
+        self._generated(result, answer)
+        return answer
+
+    async def astream_answer(self, result: RagResult, user_id: Optional[str] = None) -> AsyncIterator[str]:
+        if result.cached is not None:
+            yield self._cached_answer(result, user_id)
+            return
+        started = time.perf_counter()
+        chunks = []
+        with self._generate_span(result) as span:
+            async for chunk in self.gemini.agenerate_response_stream(result.query, result.context, user_id=user_id):
+                if not chunks:
+                    self._first_token(result, span, started)
+                chunks.append(chunk)
+                yield chunk
+        self._generated(result, "".join(chunks))
@@ -0,0 +1,394 @@
+"""int8 스칼라 양자화 / PQ(product quantization) 벡터 색인
+
+Chroma 는 ko-sbert-nli 벡터(768 차원 float32)와 HNSW 그래프를 워커 프로세스마다 메모리에 통째로
+올립니다. 이 색인은 persist_dir/quantized_index/ 에
+
+- codes.i8      : int8 스칼라 양자화 코드 (청크당 768바이트, float32 의 1/4)  ─┐ kind 에 따라 둘 중 하나
+- codes.u8      : PQ 코드 (청크당 pq_m 바이트, 기본 96 → 1/32)             ─┘
+- scale.f32     : int8 차원별 배율 / codebooks.f32 : PQ 부분공간별 중심 256개
+- vectors.f32   : 원래 정밀도 벡터 (상위 후보를 다시 채점할 때만 해당 행을 읽음)
+- chunks/       : 청크 본문/메타데이터/ID 색인 (rag.chunk_store 형식)
+- meta.json     : 종류, 청크 수, 차원, corpus_version
+
+로 저장하고 전부 읽기 전용 memmap 으로 엽니다. 같은 파일을 여는 워커들은 OS 페이지 캐시를 함께 쓰고,
+질문마다 훑는 것은 작은 코드 배열뿐입니다. 근사 점수로 k * rescore 개를 고른 뒤 그 행만
+float32 벡터로 내적을 다시 계산해서 순위를 정하므로 재현율 손실이 작습니다.
+
+색인은 적재 후 Chroma 의 전체 청크로 만들고(rag.ingest.build_search_indexes 가 있으면 다시 만듦),
+서버는 VECTOR_BACKEND=quantized 일 때 Chroma HNSW 대신 이 색인으로 벡터 검색을 합니다.
+
+    python -m rag.quantized                       # int8 색인을 만들고 정답 질문 세트로 정확 검색과 비교
+    python -m rag.quantized --kind pq --pq-m 96 --rescore 4 16 32
+    python -m rag.bench --vector-backend quantized
+"""
+# Standard Libraries
+import argparse
+import json
+import os
+import resource
+import shutil
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Third-party Libraries
+import numpy as np
+
+# Local Application Modules
+from rag.chunk_store import ChunkStore
+from rag.retriever import Candidate
+
+QUANTIZED_INDEX_NAME = "quantized_index"
+FORMAT_VERSION = 1
+KINDS = ("int8", "pq")
+DEFAULT_KIND = "int8"
+# 근사 점수로 k * rescore 개를 골라 float32 로 다시 채점 (PQ 는 근사가 거칠어 더 많이 고름)
+DEFAULT_RESCORE = {"int8": 4, "pq": 16}
+DEFAULT_PQ_M = 96  # 부분공간 수 (768 / 96 = 8차원씩)
+PQ_CENTROIDS = 256  # 부분공간별 중심 수 (코드 1바이트)
+PQ_ITERATIONS = 20
+PQ_TRAIN_SAMPLE = 20000  # k-means 학습에 쓰는 최대 청크 수
+BLOCK_ROWS = 8192  # 근사 점수를 계산할 때 한 번에 float 로 바꾸는 행 수
+
+
+def index_path(persist_dir: str) -> str:
+    return os.path.join(persist_dir, QUANTIZED_INDEX_NAME)
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _kmeans(data: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    centroids = data[rng.choice(len(data), k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _nearest(data, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, data)
+        counts = np.bincount(labels, minlength=k)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # 빈 중심은 임의의 점으로 다시 놓음
+        if not filled.all():
+            centroids[~filled] = data[rng.choice(len(data), int((~filled).sum()))]
+    return centroids
+
+
+def _nearest(data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    labels = np.empty(len(data), dtype=np.int64)
+    squared = (centroids ** 2).sum(axis=1)
+    for start in range(0, len(data), BLOCK_ROWS):
+        block = data[start:start + BLOCK_ROWS]
+        labels[start:start + BLOCK_ROWS] = (squared[None, :] - 2 * block @ centroids.T).argmin(axis=1)
+    return labels
+
+
+def train_pq(vectors: np.ndarray, m: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """부분공간마다 k-means 로 중심을 학습하고 모든 벡터를 코드로 바꿈 → (codebooks, codes)"""
+    n, dim = vectors.shape
+    if dim % m:
+        raise ValueError(f"차원 {dim} 이 pq_m {m} 으로 나눠지지 않습니다.")
+    sub = dim // m
+    k = min(PQ_CENTROIDS, n)
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(n, min(n, PQ_TRAIN_SAMPLE), replace=False)]
+    codebooks = np.zeros((m, PQ_CENTROIDS, sub), dtype=np.float32)
+    codes = np.empty((n, m), dtype=np.uint8)
+    for j in range(m):
+        columns = slice(j * sub, (j + 1) * sub)
+        codebooks[j, :k] = _kmeans(sample[:, columns], k, PQ_ITERATIONS, rng)
+        codes[:, j] = _nearest(vectors[:, columns], codebooks[j, :k])
+    return codebooks, codes
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """차원별 대칭 int8 양자화 → (scale, codes). 값 ≈ codes * scale"""
+    scale = np.abs(vectors).max(axis=0, initial=0.0) / 127.0
+    scale[scale == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+    return scale.astype(np.float32), codes
+
+
+class QuantizedIndex:
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 양자화 색인 형식입니다: {meta.get('version')}")
+        self.kind: str = meta["kind"]
+        self.count: int = meta["count"]
+        self.dim: int = meta["dim"]
+        self.pq_m: Optional[int] = meta.get("pq_m")
+        self.corpus_version: Optional[str] = meta.get("corpus_version")
+
+        self.vectors = self._memmap("vectors.f32", np.float32, (self.count, self.dim))
+        if self.kind == "int8":
+            self.codes = self._memmap("codes.i8", np.int8, (self.count, self.dim))
+            self.scale = np.fromfile(os.path.join(path, "scale.f32"), dtype=np.float32)
+        else:
+            self.codes = self._memmap("codes.u8", np.uint8, (self.count, self.pq_m))
+            self.codebooks = self._memmap("codebooks.f32", np.float32, (self.pq_m, PQ_CENTROIDS, self.dim // self.pq_m))
+        self.chunks = ChunkStore(os.path.join(path, "chunks"))
+
+    def _memmap(self, name: str, dtype, shape: Tuple[int, ...]) -> np.ndarray:
+        if not self.count:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode="r", shape=shape)
+
+    def __len__(self) -> int:
+        return self.count
+
+    @classmethod
+    def load(cls, path: str) -> Optional["QuantizedIndex"]:
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            return None
+        return cls(path)
+
+    def file_sizes(self) -> Dict[str, int]:
+        """파일별 크기 (chunks/ 는 합계)"""
+        sizes = {}
+        for name in sorted(os.listdir(self.path)):
+            file_path = os.path.join(self.path, name)
+            if os.path.isdir(file_path):
+                sizes[name] = sum(os.path.getsize(os.path.join(file_path, child)) for child in os.listdir(file_path))
+            else:
+                sizes[name] = os.path.getsize(file_path)
+        return sizes
+
+    # --- 검색 ---------------------------------------------------------------
+    def approximate_scores(self, query_vector: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """코드만으로 계산한 근사 내적 (rows 를 주면 그 행만)"""
+        query = np.asarray(query_vector, dtype=np.float32)
+        total = self.count if rows is None else len(rows)
+        scores = np.empty(total, dtype=np.float32)
+        if self.kind == "int8":
+            scaled = query * self.scale
+        else:
+            sub = self.dim // self.pq_m
+            # 부분공간별로 (중심, 질문 조각) 내적표를 만들어두고 코드로 찾아 더함 (ADC)
+            table = np.einsum("mcs,ms->mc", self.codebooks, query.reshape(self.pq_m, sub)).ravel()
+            offsets = np.arange(self.pq_m, dtype=np.int64)[None, :] * PQ_CENTROIDS
+        for start in range(0, total, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, total)
+            block = self.codes[start:stop] if rows is None else self.codes[rows[start:stop]]
+            if self.kind == "int8":
+                scores[start:stop] = block.astype(np.float32) @ scaled
+            else:
+                scores[start:stop] = table[block + offsets].sum(axis=1)
+        return scores
+
+    def _candidate(self, row: int, score: float) -> Candidate:
+        metadata = self.chunks.metadata(row)
+        return Candidate(
+            chunk_id=metadata["chunk_id"],
+            content=metadata.get("content") or self.chunks.page_content(row),
+            metadata=metadata,
+            score=score,
+            vector=np.array(self.vectors[row]),
+        )
+
+    def _rows(self, chunk_ids: Iterable[str]) -> np.ndarray:
+        rows = (self.chunks.index_of(chunk_id) for chunk_id in chunk_ids)
+        return np.fromiter((row for row in rows if row is not None), dtype=np.int64)
+
+    def search(
+        self,
+        query_vector: np.ndarray,
+        k: int,
+        allowed: Optional[Iterable[str]] = None,
+        rescore: Optional[int] = None,
+    ) -> List[Candidate]:
+        """근사 점수 상위 k * rescore 개를 float32 벡터로 다시 채점한 top-k (점수는 코사인 유사도)"""
+        rescore = rescore or DEFAULT_RESCORE[self.kind]
+        rows = None if allowed is None else np.sort(self._rows(allowed))
+        total = self.count if rows is None else len(rows)
+        if not total or k <= 0:
+            return []
+        approximate = self.approximate_scores(query_vector, rows)
+        shortlist = min(total, max(k, k * rescore))
+        top = np.argpartition(-approximate, shortlist - 1)[:shortlist]
+        top_rows = np.sort(top if rows is None else rows[top])  # memmap 을 순서대로 읽도록 정렬
+        exact = self.vectors[top_rows] @ np.asarray(query_vector, dtype=np.float32)
+        order = np.argsort(-exact)[:k]
+        return [self._candidate(int(top_rows[i]), float(exact[i])) for i in order]
+
+    def fetch(self, chunk_ids: List[str], query_vector: np.ndarray) -> List[Candidate]:
+        """ID 로 청크를 가져와 질문과의 코사인 유사도를 계산 (retriever.fetch_candidates 와 같은 역할)"""
+        query = np.asarray(query_vector, dtype=np.float32)
+        return [self._candidate(int(row), float(self.vectors[row] @ query)) for row in self._rows(chunk_ids)]
+
+    def exact_search(self, query_vector: np.ndarray, k: int) -> List[str]:
+        """float32 벡터 전체를 훑는 정확 검색 (비교 기준)"""
+        scores = np.asarray(self.vectors) @ np.asarray(query_vector, dtype=np.float32)
+        top = np.argsort(-scores)[:k]
+        return [self.chunks.chunk_id(int(row)) for row in top]
+
+    # --- 만들기 -------------------------------------------------------------
+    @staticmethod
+    def build(
+        path: str,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        metadatas: Sequence[Optional[Dict[str, Any]]],
+        vectors: np.ndarray,
+        kind: str = DEFAULT_KIND,
+        pq_m: int = DEFAULT_PQ_M,
+        corpus_version: Optional[str] = None,
+        seed: int = 0,
+    ) -> "QuantizedIndex":
+        """청크와 벡터로 색인을 path 에 저장 (임시 디렉터리에 쓴 뒤 통째로 교체)"""
+        from langchain_core.documents import Document
+
+        if kind not in KINDS:
+            raise ValueError(f"kind 는 {KINDS} 중 하나여야 합니다: {kind}")
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2:
+            # 빈 컬렉션이면 Chroma 가 embeddings 를 빈 목록으로 돌려줌
+            vectors = vectors.reshape(len(ids), -1) if len(ids) else np.zeros((0, 0), dtype=np.float32)
+        vectors = _normalize_rows(vectors)
+        dim = vectors.shape[1]
+
+        tmp_path = path.rstrip("/") + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        ChunkStore.write(
+            os.path.join(tmp_path, "chunks"),
+            (
+                Document(page_content=text or "", metadata={**(meta or {}), "chunk_id": chunk_id})
+                for chunk_id, text, meta in zip(ids, documents, metadatas)
+            ),
+        )
+        vectors.tofile(os.path.join(tmp_path, "vectors.f32"))
+        meta = {"version": FORMAT_VERSION, "kind": kind, "count": len(ids), "dim": dim, "corpus_version": corpus_version}
+        if kind == "int8":
+            scale, codes = quantize_int8(vectors)
+            scale.tofile(os.path.join(tmp_path, "scale.f32"))
+            codes.tofile(os.path.join(tmp_path, "codes.i8"))
+        else:
+            if len(ids):
+                codebooks, codes = train_pq(vectors, pq_m, seed)
+            else:
+                codebooks, codes = np.zeros((pq_m, PQ_CENTROIDS, 0), dtype=np.float32), np.zeros((0, pq_m), dtype=np.uint8)
+            codebooks.tofile(os.path.join(tmp_path, "codebooks.f32"))
+            codes.tofile(os.path.join(tmp_path, "codes.u8"))
+            meta["pq_m"] = pq_m
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        return QuantizedIndex(path)
+
+
+def build_from_vectorstore(
+    vectorstore,
+    persist_dir: str,
+    kind: str = DEFAULT_KIND,
+    pq_m: int = DEFAULT_PQ_M,
+    corpus_version: Optional[str] = None,
+) -> QuantizedIndex:
+    """Chroma 에 들어있는 청크 전체로 색인을 만듦"""
+    stored = vectorstore.get(include=["documents", "metadatas", "embeddings"])
+    vectors = np.asarray(stored["embeddings"], dtype=np.float32)
+    return QuantizedIndex.build(
+        index_path(persist_dir), stored["ids"], stored["documents"], stored["metadatas"], vectors,
+        kind=kind, pq_m=pq_m, corpus_version=corpus_version,
+    )
+
+
+def rebuild_if_present(vectorstore, persist_dir: str, corpus_version: Optional[str] = None) -> Optional[QuantizedIndex]:
+    """색인이 이미 있으면 같은 종류/설정으로 다시 만듦 (적재 후 rag.ingest.build_search_indexes 가 부름)"""
+    current = QuantizedIndex.load(index_path(persist_dir))
+    if current is None:
+        return None
+    return build_from_vectorstore(vectorstore, persist_dir, current.kind, current.pq_m or DEFAULT_PQ_M, corpus_version)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def compare(
+    index: QuantizedIndex,
+    query_vectors: np.ndarray,
+    k: int,
+    rescore_values: Sequence[int],
+    repeat: int = 3,
+) -> List[Dict[str, Any]]:
+    """정확 검색(float32 전체)의 top-k 대비 recall@k 와 질문당 지연을 rescore 값별로"""
+    truth = [set(index.exact_search(q, k)) for q in query_vectors]
+    rows = []
+    exact_ms = []
+    for q in query_vectors:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            index.exact_search(q, k)
+            exact_ms.append((time.perf_counter() - started) * 1000)
+    rows.append({"mode": "exact f32", "recall": 1.0, "p50_ms": _percentile(exact_ms, 50), "p95_ms": _percentile(exact_ms, 95)})
+    for rescore in rescore_values:
+        hits = 0
+        latencies = []
+        for q, expected in zip(query_vectors, truth):
+            for _ in range(repeat):
+                started = time.perf_counter()
+                found = index.search(q, k, rescore=rescore)
+                latencies.append((time.perf_counter() - started) * 1000)
+            hits += len(expected & {c.chunk_id for c in found})
+        rows.append({
+            "mode": f"{index.kind} rescore x{rescore}",
+            "recall": hits / max(1, len(truth) * k),
+            "p50_ms": _percentile(latencies, 50),
+            "p95_ms": _percentile(latencies, 95),
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from rag.bench import GOLD_PATH, GoldSet
+    from rag.embeddings import get_embedding_model
+    from rag.ingest import PERSIST_DIR, open_vectorstore, read_corpus_version
+
+    parser = argparse.ArgumentParser(description="양자화 벡터 색인을 만들고 정확 검색과 재현율/지연/크기를 비교합니다.")
+    parser.add_argument("--persist-dir", default=PERSIST_DIR, help="Chroma 저장 경로 (색인도 이 아래에 만듦)")
+    parser.add_argument("--kind", choices=KINDS, default=DEFAULT_KIND, help="int8 스칼라 양자화 또는 PQ")
+    parser.add_argument("--pq-m", type=int, default=DEFAULT_PQ_M, help="PQ 부분공간 수 (차원을 나눠떨어지게)")
+    parser.add_argument("--no-build", action="store_true", help="이미 만든 색인으로 비교만")
+    parser.add_argument("--gold", default=GOLD_PATH, help="비교에 쓸 질문 세트")
+    parser.add_argument("--k", type=int, default=10, help="recall@k 의 k")
+    parser.add_argument("--rescore", type=int, nargs="+", default=[1, 4, 16], help="비교할 rescore 배수")
+    parser.add_argument("--repeat", type=int, default=3, help="지연 측정 반복 횟수")
+    args = parser.parse_args(argv)
+
+    embedding_model = get_embedding_model(num_workers=0, cache=False)
+    if args.no_build:
+        index = QuantizedIndex.load(index_path(args.persist_dir))
+        if index is None:
+            parser.error(f"{index_path(args.persist_dir)} 에 색인이 없습니다.")
+    else:
+        started = time.perf_counter()
+        vectorstore = open_vectorstore(embedding_model, persist_dir=args.persist_dir)
+        index = build_from_vectorstore(
+            vectorstore, args.persist_dir, args.kind, args.pq_m, read_corpus_version(args.persist_dir)
+        )
+        print(f"{index.kind} 색인 {len(index)}개 청크 ({time.perf_counter() - started:.2f}s)")
+
+    sizes = index.file_sizes()
+    codes = sum(size for name, size in sizes.items() if name.startswith(("codes", "scale", "codebooks")))
+    print("파일 " + ", ".join(f"{name} {size / 1024:.1f} KB" for name, size in sizes.items()))
+    print(
+        f"질문마다 훑는 코드 {codes / 1024:.1f} KB / float32 벡터 {sizes.get('vectors.f32', 0) / 1024:.1f} KB "
+        f"(×{sizes.get('vectors.f32', 0) / max(1, codes):.1f} 작음)"
+    )
+
+    gold = GoldSet.load(args.gold)
+    query_vectors = np.asarray([embedding_model.embed_query(q.question) for q in gold.questions], dtype=np.float32)
+    embedding_model.close()
+    for row in compare(index, query_vectors, args.k, args.rescore, args.repeat):
+        print(f"{row['mode']:<20} recall@{args.k} {row['recall']:.3f} / p50 {row['p50_ms']:.2f}ms / p95 {row['p95_ms']:.2f}ms")
+    # 리눅스에서 ru_maxrss 는 KB
+    print(f"최대 RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
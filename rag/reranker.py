@@ -0,0 +1,164 @@
+"""검색 후보를 한국어 cross-encoder 로 다시 매기는 재순위(rerank) 단계
+
+ko-sbert-nli bi-encoder 점수는 질문과 문단을 따로 임베딩해서 비교하므로 순위가 거칠고, 그래서
+많은 청크를 Gemini 에 보내야 했습니다. cross-encoder 는 (질문, 문단) 쌍을 함께 읽어 점수를 매기므로
+상위 몇 개만 프롬프트에 넣어도 됩니다. CPU 에서 돌리므로 비용을 묶어둡니다.
+
+- 1차 검색 순위 상위 max_candidates 개만 batch_size 씩 묶어서 점수를 매기고
+- 다음 배치까지 돌리면 budget_ms 를 넘을 것 같으면 거기서 멈춥니다 (첫 배치는 항상 매김).
+  남은 후보는 1차 순위가 낮은 쪽이므로 버려도 손실이 적습니다.
+- (질문, chunk_id) 점수는 LRU 캐시에 둡니다. chunk_id 는 본문 해시라 본문이 바뀌면 키도 바뀝니다.
+
+    python -m rag.bench --rerank            # 재순위 전후 recall/프롬프트 토큰/지연 비교
+"""
+# Standard Libraries
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Third-party Libraries
+import numpy as np
+
+# Local Application Modules
+from rag import telemetry
+from rag.retriever import Candidate
+
+RERANKER_MODEL = "bongsoo/klue-cross-encoder-v1"
+DEFAULT_MAX_CANDIDATES = 20
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_BUDGET_MS = 400.0
+DEFAULT_MAX_LENGTH = 384
+DEFAULT_CACHE_SIZE = 4096
+# 재순위를 하면 프롬프트에는 이만큼만 넣음
+DEFAULT_TOP_N = 5
+
+
+@dataclass
+class RerankStats:
+    calls: int = 0
+    scored: int = 0
+    cache_hits: int = 0
+    budget_cutoffs: int = 0
+    seconds: float = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"재순위 {self.calls}회 / 점수 계산 {self.scored}쌍 / 캐시 {self.cache_hits}쌍 / "
+            f"예산 초과로 중단 {self.budget_cutoffs}회 / {self.seconds:.2f}s"
+        )
+
+
+def _load_model(model_name: str, device: str, max_length: int):
+    from sentence_transformers import CrossEncoder
+
+    return CrossEncoder(model_name, device=device, max_length=max_length)
+
+
+class CrossEncoderReranker:
+    def __init__(
+        self,
+        model_name: str = RERANKER_MODEL,
+        device: str = "cpu",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_candidates: int = DEFAULT_MAX_CANDIDATES,
+        budget_ms: Optional[float] = DEFAULT_BUDGET_MS,
+        max_length: int = DEFAULT_MAX_LENGTH,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        model=None,
+    ):
+        self.model_name = model_name
+        self.device = device
+        self.batch_size = batch_size
+        self.max_candidates = max_candidates
+        self.budget_ms = budget_ms
+        self.max_length = max_length
+        self.cache_size = cache_size
+        self.stats = RerankStats()
+        self._model = model
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = _load_model(self.model_name, self.device, self.max_length)
+        return self._model
+
+    def score(self, query: str, texts: Sequence[str]) -> np.ndarray:
+        """(질문, 문단) 쌍 점수 (캐시를 거치지 않음)"""
+        if not texts:
+            return np.zeros(0, dtype=np.float32)
+        scores = self.model.predict(
+            [(query, text) for text in texts],
+            batch_size=len(texts),
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return np.asarray(scores, dtype=np.float32).reshape(-1)
+
+    def _cached(self, query: str, chunk_id: str) -> Optional[float]:
+        with self._lock:
+            score = self._cache.get((query, chunk_id))
+            if score is not None:
+                self._cache.move_to_end((query, chunk_id))
+            return score
+
+    def _remember(self, query: str, chunk_ids: Sequence[str], scores: np.ndarray) -> None:
+        with self._lock:
+            for chunk_id, score in zip(chunk_ids, scores):
+                self._cache[(query, chunk_id)] = float(score)
+                self._cache.move_to_end((query, chunk_id))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def rerank(self, query: str, candidates: Sequence[Candidate]) -> List[Candidate]:
+        """점수를 매긴 후보(cross-encoder 점수순) + 못 매긴 후보(1차 순위 그대로) 순서로 반환
+
+        점수를 매긴 후보는 Candidate.rerank 에 점수가 들어갑니다.
+        """
+        started = time.perf_counter()
+        head = list(candidates[:self.max_candidates])
+        tail = list(candidates[self.max_candidates:])
+
+        scores: Dict[int, float] = {}
+        for i, candidate in enumerate(head):
+            cached = self._cached(query, candidate.chunk_id)
+            if cached is not None:
+                scores[i] = cached
+        cache_hits = len(scores)
+
+        # 1차 순위 순서대로 배치를 돌려서 예산이 모자라면 순위가 낮은 후보부터 빠지게 함
+        pending = [i for i in range(len(head)) if i not in scores]
+        slowest_batch_ms = 0.0
+        cut = False
+        for start in range(0, len(pending), self.batch_size):
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if self.budget_ms is not None and start and elapsed_ms + slowest_batch_ms > self.budget_ms:
+                cut = True
+                break
+            batch = pending[start:start + self.batch_size]
+            batch_started = time.perf_counter()
+            batch_scores = self.score(query, [head[i].content for i in batch])
+            slowest_batch_ms = max(slowest_batch_ms, (time.perf_counter() - batch_started) * 1000)
+            self._remember(query, [head[i].chunk_id for i in batch], batch_scores)
+            scores.update(zip(batch, batch_scores.tolist()))
+
+        for i, score in scores.items():
+            head[i].rerank = score
+        scored = sorted((head[i] for i in scores), key=lambda c: c.rerank, reverse=True)
+        unscored = [head[i] for i in range(len(head)) if i not in scores]
+
+        with self._lock:
+            self.stats.calls += 1
+            self.stats.scored += len(scores) - cache_hits
+            self.stats.cache_hits += cache_hits
+            self.stats.budget_cutoffs += int(cut)
+            self.stats.seconds += time.perf_counter() - started
+        telemetry.annotate(rerank_scored=len(scores), rerank_cache_hits=cache_hits, rerank_budget_cut=cut)
+        return scored + unscored + tail
+
+    def warmup(self) -> None:
+        """모델을 로드하고 한 번 추론해둠 (캐시에는 남기지 않음)"""
+        self.score("워밍업", ["워밍업"])
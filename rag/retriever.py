@@ -0,0 +1,160 @@
+"""Chroma 벡터 검색 (+ BM25 역색인과의 RRF 하이브리드) 결과를 후보(Candidate) 목록으로 정리하는 모듈"""
+# Standard Libraries
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+# Third-party Libraries
+import numpy as np
+
+# Local Application Modules
+from rag.telemetry import span
+
+# RRF 상수. 순위가 낮은 쪽의 영향을 줄이는 값으로 보통 60 을 씀
+RRF_K = 60
+
+
+@dataclass
+class Candidate:
+    chunk_id: str
+    content: str
+    metadata: Dict[str, Any]
+    score: float  # 질문과의 코사인 유사도
+    vector: Optional[np.ndarray] = None
+    fusion: Optional[float] = None  # 하이브리드 검색의 RRF 점수 (벡터 검색만 했으면 None)
+    rerank: Optional[float] = None  # cross-encoder 재순위 점수 (재순위를 안 했거나 예산 안에 못 매겼으면 None)
+
+
+def chunk_identity(metadata: Dict[str, Any], page_content: str = "") -> str:
+    """청크를 구분하는 ID
+
+    paragraph_id 는 소챕터 안에서만 고유하므로, chunk_id 가 없는 예전 청크는
+    책/챕터/소챕터/문단 번호를 합쳐서 구분합니다.
+    """
+    if metadata.get("chunk_id"):
+        return metadata["chunk_id"]
+    key = "\x1f".join(str(metadata.get(name) or "") for name in ("bookname", "chapter_id", "sub_chapter_name", "paragraph_id"))
+    if not key.strip("\x1f"):
+        key = page_content
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def _to_candidate(page_content: str, metadata: Optional[Dict[str, Any]], score: float, vector) -> Candidate:
+    metadata = metadata or {}
+    return Candidate(
+        chunk_id=chunk_identity(metadata, page_content),
+        content=metadata.get("content") or page_content,
+        metadata=metadata,
+        score=score,
+        vector=np.asarray(vector, dtype=np.float32),
+    )
+
+
+def distance_to_similarity(distance: float, space: str = "l2") -> float:
+    """Chroma 거리를 정규화 벡터 기준 코사인 유사도로 변환"""
+    if space == "l2":
+        # 정규화 벡터의 제곱 L2 거리 = 2 - 2cos
+        return 1.0 - distance / 2.0
+    # cosine, ip 는 1 - cos (ip 는 정규화 벡터일 때 같음)
+    return 1.0 - distance
+
+
+def search(
+    vectorstore,
+    query_vector: np.ndarray,
+    k: int,
+    where: Optional[Dict[str, Any]] = None,
+    space: str = "l2",
+) -> List[Candidate]:
+    """질문 벡터로 top-k 후보를 찾고, MMR 에 쓸 청크 벡터까지 함께 가져옴"""
+    result = vectorstore._collection.query(
+        query_embeddings=[np.asarray(query_vector, dtype=np.float32).tolist()],
+        n_results=k,
+        where=where,
+        include=["documents", "metadatas", "distances", "embeddings"],
+    )
+    return [
+        _to_candidate(page_content, metadata, distance_to_similarity(distance, space), vector)
+        for page_content, metadata, distance, vector in zip(
+            result["documents"][0],
+            result["metadatas"][0],
+            result["distances"][0],
+            result["embeddings"][0],
+        )
+    ]
+
+
+def fetch_candidates(vectorstore, chunk_ids: List[str], query_vector: np.ndarray) -> List[Candidate]:
+    """ID 로 청크를 가져와서 질문과의 코사인 유사도를 직접 계산 (정규화 벡터 기준)"""
+    if not chunk_ids:
+        return []
+    result = vectorstore._collection.get(ids=chunk_ids, include=["documents", "metadatas", "embeddings"])
+    query_vector = np.asarray(query_vector, dtype=np.float32)
+    return [
+        _to_candidate(page_content, metadata, float(np.asarray(vector, dtype=np.float32) @ query_vector), vector)
+        for page_content, metadata, vector in zip(result["documents"], result["metadatas"], result["embeddings"])
+    ]
+
+
+def rrf_fuse(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> Dict[str, float]:
+    """reciprocal rank fusion: 각 순위 목록에서 1 / (k + 순위) 를 더함"""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, 1):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return fused
+
+
+def hybrid_search(
+    vectorstore,
+    lexical_index,
+    query: str,
+    query_vector: np.ndarray,
+    k: int,
+    lexical_k: Optional[int] = None,
+    allowed: Optional[Set[str]] = None,
+    space: str = "l2",
+    vector_index=None,
+) -> List[Candidate]:
+    """벡터 검색과 BM25 검색 결과를 RRF 로 합친 후보 (RRF 점수 순)
+
+    allowed 를 주면 (rag.facets 로 미리 만든 필터용 청크 ID 집합) 두 검색 모두 그 청크 안에서만 찾습니다.
+    vector_index 를 주면 (rag.quantized.QuantizedIndex) Chroma 대신 그 색인으로 벡터 검색과 청크 조회를 합니다.
+    """
+    where = None
+    if allowed is not None:
+        if not allowed:
+            return []
+        k = min(k, len(allowed))
+        where = {"chunk_id": {"$in": sorted(allowed)}}
+    with span("vector_search", k=k):
+        if vector_index is not None:
+            vector_candidates = vector_index.search(query_vector, k, allowed=allowed)
+        else:
+            vector_candidates = search(vectorstore, query_vector, k, where=where, space=space)
+    if lexical_index is None:
+        return vector_candidates
+
+    with span("lexical_search"):
+        lexical_hits = lexical_index.search(query, lexical_k or k, allowed=allowed)
+    fused = rrf_fuse([[c.chunk_id for c in vector_candidates], [chunk_id for chunk_id, _ in lexical_hits]])
+
+    by_id = {c.chunk_id: c for c in vector_candidates}
+    missing = [chunk_id for chunk_id, _ in lexical_hits if chunk_id not in by_id]
+    # BM25 로만 찾은 청크는 Chroma(또는 양자화 색인)에서 본문/벡터를 따로 가져옴
+    with span("fetch_candidates", ids=len(missing)):
+        if vector_index is not None:
+            fetched = vector_index.fetch(missing, query_vector)
+        else:
+            fetched = fetch_candidates(vectorstore, missing, query_vector)
+        for candidate in fetched:
+            by_id[candidate.chunk_id] = candidate
+
+    candidates = []
+    for chunk_id, fusion in fused.items():
+        candidate = by_id.get(chunk_id)
+        if candidate is not None:
+            candidate.fusion = fusion
+            candidates.append(candidate)
+    candidates.sort(key=lambda c: c.fusion, reverse=True)
+    return candidates
@@ -0,0 +1,268 @@
+"""요청 단위 추적(span), 구조화 로그, Prometheus 형식 지표
+
+질문 하나가 느릴 때 질문 임베딩, Chroma/BM25 검색, context/프롬프트 구성, Gemini 호출,
+Streamlit 출력 중 어디서 시간이 갔는지 보기 위한 가벼운 계측입니다.
+
+- Trace: 요청 하나. trace.span("search") 처럼 단계를 감싸면 시작 시각/소요 시간/부모 span 을 기록하고
+  trace.timings["search_ms"] 에도 넣습니다 (RagResult.timings 와 같은 dict).
+- span()/annotate()/count(): 현재 컨텍스트(contextvars)의 trace 에 기록하는 함수. trace 가 없으면
+  아무 일도 하지 않으므로 retriever/임베딩 캐시처럼 trace 를 넘겨받지 않는 곳에서도 씁니다.
+  asyncio.to_thread 는 컨텍스트를 복사하므로 스레드에서 돈 검색도 같은 trace 에 남습니다.
+- Trace.finish(): 단계별 시간/토큰 수/캐시 적중을 METRICS 에 더하고 "rag.trace" 로거로 JSON 한 줄을 남김
+- METRICS.render(): Prometheus text exposition 형식 (main.py 의 GET /metrics)
+- 요청별 프로파일링(pyinstrument)은 main.py 미들웨어에서 켜고, 그동안 profiling_active() 가 True 입니다.
+"""
+# Standard Libraries
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("rag.trace")
+
+# 초 단위 버킷 (임베딩 수 ms ~ Gemini 수십 초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("rag_trace", default=None)
+_profiling: ContextVar[bool] = ContextVar("rag_profiling", default=False)
+
+
+# --- 지표 -----------------------------------------------------------------
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labels, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # 버킷별 개수 + [합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    le = 'le="%g"' % bound
+                    lines.append(f"{self.name}_bucket{_label_text(self.labels, key, le)} {count:g}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, key, le)} {series[-1]:g}")
+                lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {series[-2]:.6f}")
+                lines.append(f"{self.name}_count{_label_text(self.labels, key)} {series[-1]:g}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[Any] = []
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+REQUESTS = METRICS.counter("rag_requests_total", "RAG 요청 수", ("route", "cache_hit"))
+REQUEST_SECONDS = METRICS.histogram("rag_request_seconds", "RAG 요청 전체 소요 시간", ("route",))
+STAGE_SECONDS = METRICS.histogram("rag_stage_seconds", "RAG 단계별 소요 시간", ("stage",))
+TOKENS = METRICS.counter("rag_tokens_total", "Gemini 프롬프트/답변 토큰 수 (추정)", ("kind",))
+EMBED_CACHE = METRICS.counter("rag_embed_cache_total", "질문 임베딩 캐시 조회 결과", ("result",))
+HTTP_SECONDS = METRICS.histogram("http_request_duration_seconds", "HTTP 요청 처리 시간", ("method", "path", "status"))
+
+
+# --- 추적 -----------------------------------------------------------------
+@dataclass
+class Span:
+    name: str
+    start_ms: float  # trace 시작 기준
+    duration_ms: float = 0.0
+    parent: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+class Trace:
+    def __init__(self, name: str = "rag", timings: Optional[Dict[str, float]] = None):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.timings = timings if timings is not None else {}
+        self.spans: List[Span] = []
+        self.attributes: Dict[str, Any] = {}
+        self.started = time.perf_counter()
+        self.finished = False
+        self._stack: List[Span] = []
+
+    def _now_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        span = Span(name, self._now_ms(), parent=self._stack[-1].name if self._stack else None, attributes=attributes)
+        self._stack.append(span)
+        try:
+            yield span
+        finally:
+            span.duration_ms = self._now_ms() - span.start_ms
+            self._stack = [s for s in self._stack if s is not span]
+            self.spans.append(span)
+            self.timings[f"{name}_ms"] = span.duration_ms
+
+    @contextmanager
+    def activate(self) -> Iterator["Trace"]:
+        """이 블록 안에서 span()/annotate()/count() 가 이 trace 에 기록되게 함"""
+        token = _current_trace.set(self)
+        try:
+            yield self
+        finally:
+            _current_trace.reset(token)
+
+    def annotate(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def count(self, key: str, amount: int = 1) -> None:
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "event": self.name,
+            "trace_id": self.trace_id,
+            "total_ms": round(self._now_ms(), 2),
+            **self.attributes,
+            "spans": [
+                {**asdict(span), "start_ms": round(span.start_ms, 2), "duration_ms": round(span.duration_ms, 2)}
+                for span in sorted(self.spans, key=lambda s: s.start_ms)
+            ],
+        }
+
+    def finish(self, route: str, **attributes: Any) -> Dict[str, Any]:
+        """지표에 반영하고 구조화 로그를 남김 (여러 번 불러도 한 번만)"""
+        self.annotate(route=route, **attributes)
+        record = self.to_dict()
+        if self.finished:
+            return record
+        self.finished = True
+
+        REQUESTS.inc(route=route, cache_hit=str(bool(self.attributes.get("cache_hit"))).lower())
+        REQUEST_SECONDS.observe(record["total_ms"] / 1000, route=route)
+        for span in self.spans:
+            STAGE_SECONDS.observe(span.duration_ms / 1000, stage=span.name)
+        for kind in ("prompt", "response"):
+            tokens = self.attributes.get(f"{kind}_tokens")
+            if tokens:
+                TOKENS.inc(tokens, kind=kind)
+        for result in ("hit", "miss"):
+            n = self.attributes.get(f"embed_cache_{result}s")
+            if n:
+                EMBED_CACHE.inc(n, result=result)
+        logger.info(json.dumps(record, ensure_ascii=False, default=str))
+        return record
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """현재 trace 에 span 을 남김 (trace 가 없으면 아무것도 안 함)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    with trace.span(name, **attributes) as s:
+        yield s
+
+
+def annotate(**attributes: Any) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.annotate(**attributes)
+
+
+def count(key: str, amount: int = 1) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.count(key, amount)
+
+
+# --- 프로파일링 / 로그 설정 ------------------------------------------------
+@contextmanager
+def profiling() -> Iterator[None]:
+    """요청 하나를 pyinstrument 로 프로파일링하는 동안 켜 둠 (main.py 미들웨어)"""
+    token = _profiling.set(True)
+    try:
+        yield
+    finally:
+        _profiling.reset(token)
+
+
+def profiling_active() -> bool:
+    return _profiling.get()
+
+
+def configure_logging(level: int = logging.INFO) -> None:
+    """trace 로그를 한 줄 JSON 으로 stderr 에 출력 (이미 핸들러가 있으면 그대로 둠)"""
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
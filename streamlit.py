@@ -1,57 +1,66 @@
+import time
+import uuid
 import streamlit as st
 from ai_client import GeminiClient
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
-import time
+from rag.facets import RetrievalFilter
+from rag import telemetry
+from rag.pipeline import RagPipeline
+from rag.reranker import CrossEncoderReranker
 import config
 
 st.set_page_config(page_title="Childcare RAG Chatbot")
 st.title("Chat with Gemini AI 🍼👶🏻")
 
 @st.cache_resource
-def load_gemini():
-    return GeminiClient(api_key=config.GOOGLE_API_KEY)
-
-@st.cache_resource
-def load_vectorstore():
-    embedding_model = HuggingFaceEmbeddings(
-        model_name="jhgan/ko-sbert-nli",
-        model_kwargs={'device': 'cpu'},
-        encode_kwargs={'normalize_embeddings': True}
-    )
-    persist_dir = "./vector_db"
-    return Chroma(embedding_function=embedding_model, persist_directory=persist_dir)
+def load_pipeline():
+    # 사용자별 최근 3턴만 함께 보내고, 동시에 여러 세션이 써도 안전한 상태 없는 클라이언트
+    gemini = GeminiClient(api_key=config.GOOGLE_API_KEY, history_turns=3)
+    telemetry.configure_logging()
+    started = time.perf_counter()
+    reranker = CrossEncoderReranker(config.RERANKER_MODEL) if config.RERANKER_MODEL else None
+    pipeline = RagPipeline.load(gemini, reranker=reranker, vector_backend=config.VECTOR_BACKEND)
+    # 첫 질문이 모델/색인 로드를 기다리지 않도록 앱을 띄울 때 미리 로드
+    warmup = pipeline.warmup()
+    print(f"[warmup] RAG 파이프라인 준비 {time.perf_counter() - started:.2f}s {warmup}")
+    return pipeline
 
-gemini = load_gemini()
-vectorstore = load_vectorstore()
+pipeline = load_pipeline()
 
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
+if "user_id" not in st.session_state:
+    st.session_state.user_id = uuid.uuid4().hex
+
+def filter_sidebar() -> RetrievalFilter:
+    """사이드바에서 고른 출처/챕터/연령대 필터"""
+    options = pipeline.filter_options()
 
-def run_rag(query: str, top_k: int = 50):
-    docs_with_scores = vectorstore.similarity_search_with_score(query, k=top_k)
-    seen_ids = set()
-    context = []
-    for doc, score in docs_with_scores:
-        para_id = doc.metadata.get("paragraph_id") or doc.page_content[:30]
-        if para_id in seen_ids:
-            continue
-        seen_ids.add(para_id)
-        score = score if score <= 1.0 else 0.0
-        context.append({
-            "bookname": doc.metadata.get("bookname", "정보 없음"),
-            "chapter_name": doc.metadata.get("chapter_name", "정보 없음"),
-            "sub_chapter_name": doc.metadata.get("sub_chapter_name", "정보 없음"),
-            "paragraph_id": para_id,
-            "content": doc.metadata.get("content") or doc.page_content,
-            "score": score
-        })
-    answer = gemini.generate_response(query, context)
-    return answer, context
+    def select(label, name):
+        items = {f"{o['label']} ({o['count']})": o["value"] for o in options[name] if o["count"]}
+        return [items[key] for key in st.sidebar.multiselect(label, list(items))] or None
+
+    st.sidebar.header("검색 범위")
+    return RetrievalFilter(
+        source=select("출처", "source"),
+        chapter=select("챕터", "chapter"),
+        age=select("연령대", "age"),
+    )
+
+filters = filter_sidebar()
+
+def run_rag(query: str, top_k: int = 20, token_budget: int = 3000, filters: RetrievalFilter = None):
+    """답변 스트림(조각 iterator)과 검색 결과(context, 캐시 여부, context 리포트, trace)를 반환"""
+    result = pipeline.retrieve(
+        query, top_k=top_k, token_budget=token_budget, filters=filters, user_id=st.session_state.user_id
+    )
+    stream = pipeline.stream_answer(result, user_id=st.session_state.user_id)
+    return stream, result
 
 for chat in st.session_state.chat_history:
     with st.chat_message(chat["role"]):
         st.markdown(chat["message"])
+        if chat.get("cache_hit"):
+            st.caption("⚡ 캐시된 답변")
     if chat["role"] == "ai":
         with st.expander("답변 생성에 사용된 출처 보기"):
             for i, c in enumerate(chat.get("context", [])[:3], 1):
@@ -69,19 +78,30 @@ if prompt := st.chat_input("질문을 입력하세요:"):
     with st.chat_message("ai"):
         message_placeholder = st.empty()
         full_response = ""
-        answer, context = run_rag(prompt, top_k=50)
+        answer_stream, result = run_rag(prompt, top_k=20, filters=filters)
+        context, cache_hit, report = result.context, result.cache_hit, result.report
 
-        for char in answer:
-            full_response += char
-            message_placeholder.markdown(full_response + "▌")
-            time.sleep(0.01)
-        message_placeholder.markdown(full_response)
+        # render 는 답변 생성(generate)을 포함하므로 차이가 화면 갱신에 쓴 시간
+        with result.trace.span("render"):
+            for chunk in answer_stream:
+                full_response += chunk
+                message_placeholder.markdown(full_response + "▌")
+            message_placeholder.markdown(full_response)
+        result.trace.annotate(
+            render_overhead_ms=round(result.timings["render_ms"] - result.timings.get("generate_ms", 0.0), 2)
+        )
+        result.trace.finish(route="streamlit")
+        if cache_hit:
+            st.caption("⚡ 캐시된 답변")
+        else:
+            st.caption(f"출처 {report.selected}/{report.candidates}개 · 프롬프트 약 {report.prompt_tokens} 토큰")
 
     # AI 답변과 context를 함께 저장
     st.session_state.chat_history.append({
         "role": "ai",
         "message": full_response,
-        "context": context  # context 포함
+        "context": context,  # context 포함
+        "cache_hit": cache_hit,
     })
 
     latest_ai = next((c for c in reversed(st.session_state.chat_history) if c["role"] == "ai"), None)
@@ -4,26 +4,47 @@ import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse, parse_qs
 
+OEMBED_URL = "https://www.youtube.com/oembed"
 
-def fetch_transcript(video_id, language="ko"):
+
+def find_transcript(video_id, language="ko", ytt_api=None):
     """
-    유튜브 video_id와 언어코드로 자막(스크립트) 텍스트를 반환
+    요청한 언어 자막 → 자동 생성 자막 → 아무 자막 순으로 찾아서 반환 (없으면 None)
     """
+    ytt_api = ytt_api or YouTubeTranscriptApi()
+    transcript_list = ytt_api.list(video_id)
     try:
-        ytt_api = YouTubeTranscriptApi()
-        transcript_list = ytt_api.list(video_id)
-        transcript = None
-
+        return transcript_list.find_transcript([language])
+    except Exception:
         try:
-            transcript = transcript_list.find_transcript([language])
+            return transcript_list.find_generated_transcript([language])
         except Exception:
-            try:
-                transcript = transcript_list.find_generated_transcript([language])
-            except Exception:
-                try:
-                    transcript = next(iter(transcript_list))
-                except Exception:
-                    return "Error: No transcript available."
+            return next(iter(transcript_list), None)
+
+
+def fetch_transcript_segments(video_id, language="ko", ytt_api=None):
+    """
+    자막을 (언어코드, [{"text", "start", "duration"}, ...]) 로 반환 (타임스탬프 유지)
+    """
+    transcript = find_transcript(video_id, language, ytt_api)
+    if transcript is None:
+        return None, []
+    segments = [
+        {"text": entry.text, "start": float(entry.start), "duration": float(entry.duration)}
+        for entry in transcript.fetch()
+        if entry.text
+    ]
+    return transcript.language_code, segments
+
+
+def fetch_transcript(video_id, language="ko"):
+    """
+    유튜브 video_id와 언어코드로 자막(스크립트) 텍스트를 반환
+    """
+    try:
+        transcript = find_transcript(video_id, language)
+        if transcript is None:
+            return "Error: No transcript available."
 
         lang_info = transcript.language_code if transcript else ""
 
@@ -42,6 +63,20 @@ def fetch_transcript(video_id, language="ko"):
     except Exception as e:
         return f"Error fetching transcript: {e}"
     
+def get_youtube_title(video_url, session=None):
+    """
+    oEmbed JSON 으로 제목만 가져옴 (watch 페이지 전체를 받아 파싱하지 않음)
+    """
+    http = session or requests
+    try:
+        response = http.get(OEMBED_URL, params={"url": video_url, "format": "json"}, timeout=10)
+        response.raise_for_status()
+        return response.json()["title"]
+    except Exception:
+        # oEmbed 가 막힌 영상(퍼가기 금지 등)은 기존 방식으로 og:title 을 읽음
+        return get_youtube_title_alternative(video_url)
+
+
 def get_youtube_title_alternative(video_url):
     try:
         response = requests.get(video_url)
@@ -64,8 +99,9 @@ def get_video_id(url: str) -> str:
         return parsed_url.path.lstrip("/")
     return None
 
-video_id = get_video_id("https://www.youtube.com/watch?v=YKrNsHX9dzY")
-title = get_youtube_title_alternative("https://www.youtube.com/watch?v=YKrNsHX9dzY")
-result = fetch_transcript(video_id, "ko")
+if __name__ == "__main__":
+    video_id = get_video_id("https://www.youtube.com/watch?v=YKrNsHX9dzY")
+    title = get_youtube_title("https://www.youtube.com/watch?v=YKrNsHX9dzY")
+    result = fetch_transcript(video_id, "ko")
 
-print(title, result)
\ No newline at end of file
+    print(title, result)
@@ -0,0 +1,311 @@
+"""유튜브 자막 일괄 적재
+
+URL 목록(또는 한 줄에 URL 하나씩 적은 재생목록 파일)을 받아서
+1. 워커 풀로 자막과 제목을 동시에 가져오고 (자막 원본은 video_id 별로 디스크에 캐시)
+2. 자막 조각을 공용 청커(rag.chunker)로 크기에 맞게 묶어 청크를 만든 뒤 (청크마다 시작/끝 시각 유지)
+3. 책과 같은 Chroma 벡터 스토어에 source="youtube" 로 증분 적재합니다.
+
+적재는 추가만 합니다 (URL 하나만 다시 넣어도 이미 적재한 다른 영상은 그대로). 목록에서 빠진 영상을
+지우려면 전체 목록과 함께 --prune 을 주고, 이때도 가져오기에 실패한 영상이 있으면 지우지 않습니다.
+
+    python -m youtube.ingest --file youtube/playlist.txt
+    python -m youtube.ingest --file youtube/playlist.txt --prune   # 목록에 없는 영상은 삭제
+    python -m youtube.ingest https://www.youtube.com/watch?v=YKrNsHX9dzY --target-tokens 300
+    python -m youtube.ingest --file youtube/playlist.txt --fake --no-store   # 네트워크 없이 벤치마크
+"""
+# Standard Libraries
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Third-party Libraries
+import requests
+from langchain_core.documents import Document
+from youtube_transcript_api import YouTubeTranscriptApi
+
+# Local Application Modules
+from rag.chunker import ChunkerConfig, ChunkStats, add_arguments, chunk_units, config_from_args
+from rag.ingest import make_chunk_id
+from youtube.extract import fetch_transcript_segments, get_video_id, get_youtube_title
+
+CACHE_DIR = "youtube/.cache"
+DEFAULT_WORKERS = 8
+
+
+@dataclass
+class VideoTranscript:
+    video_id: str
+    url: str
+    title: str
+    language: Optional[str]
+    segments: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class YouTubeSource:
+    """실제 유튜브에서 자막/제목을 가져오는 전송 계층 (스레드 간 커넥션 풀 공유)"""
+
+    def __init__(self, language: str = "ko", pool_size: int = DEFAULT_WORKERS):
+        self.language = language
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.ytt_api = YouTubeTranscriptApi(http_client=self.session)
+
+    def fetch_transcript(self, video_id: str) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        return fetch_transcript_segments(video_id, self.language, self.ytt_api)
+
+    def fetch_title(self, url: str) -> str:
+        return get_youtube_title(url, self.session)
+
+
+class FakeYouTubeSource:
+    """네트워크 없이 파이프라인을 재보기 위한 가짜 전송 계층"""
+
+    def __init__(self, latency: float = 0.2, minutes: int = 10):
+        self.latency = latency
+        self.minutes = minutes
+
+    def fetch_transcript(self, video_id: str) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        time.sleep(self.latency)
+        segments = [
+            {"text": f"{video_id} 자막 {i}번째 문장입니다.", "start": i * 4.0, "duration": 4.0}
+            for i in range(self.minutes * 15)
+        ]
+        return "ko", segments
+
+    def fetch_title(self, url: str) -> str:
+        time.sleep(self.latency / 2)
+        return f"가짜 영상 {get_video_id(url)}"
+
+
+class TranscriptCache:
+    """video_id 별 자막 원본(JSON) 디스크 캐시"""
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, video_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{video_id}.json")
+
+    def get(self, video_id: str) -> Optional[VideoTranscript]:
+        try:
+            with open(self._path(video_id), "r", encoding="utf-8") as f:
+                return VideoTranscript(**json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError, TypeError):
+            return None
+
+    def put(self, transcript: VideoTranscript) -> None:
+        tmp_path = self._path(transcript.video_id) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(transcript.__dict__, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(transcript.video_id))
+
+
+def read_url_file(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def _timestamp(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def chunk_transcript(transcript: VideoTranscript, chunker: Optional[ChunkerConfig] = None) -> List[Document]:
+    """자막 조각을 청커로 크기에 맞게 묶고, 청크마다 시작/끝 시각을 붙인 Document 목록"""
+    segments = transcript.segments
+    chunks = chunk_units([segment["text"].replace("\n", " ") for segment in segments], chunker)
+    documents = []
+    for index, chunk in enumerate(chunks, 1):
+        start = segments[chunk.first_unit]["start"]
+        end = segments[chunk.last_unit]["start"] + segments[chunk.last_unit]["duration"]
+        meta = {
+            "source": "youtube",
+            "bookname": transcript.title,
+            "chapter_id": transcript.video_id,
+            "chapter_name": "유튜브",
+            "sub_chapter_name": f"{_timestamp(start)}~{_timestamp(end)}",
+            "paragraph_id": f"{index:02d}",
+            "video_id": transcript.video_id,
+            "url": f"https://www.youtube.com/watch?v={transcript.video_id}&t={int(start)}s",
+            "start": start,
+            "end": end,
+            "tokens": chunk.tokens,
+        }
+        # 자막 조각은 한 줄씩 이어 붙임 (청커는 단위 사이를 빈 줄로 이음)
+        text = " ".join(chunk.text.split())
+        meta["chunk_id"] = make_chunk_id(meta, text)
+        documents.append(Document(page_content=text, metadata=meta))
+    return documents
+
+
+@dataclass
+class BatchReport:
+    videos: int = 0
+    cached: int = 0
+    fetched: int = 0
+    failed: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        return (
+            f"영상 {self.videos}개 (캐시 {self.cached} / 새로 받음 {self.fetched} / 실패 {self.failed}) → "
+            f"청크 {self.chunks}개 ({self.seconds:.2f}s)"
+        )
+
+
+def fetch_all(
+    urls: List[str],
+    source=None,
+    cache: Optional[TranscriptCache] = None,
+    workers: int = DEFAULT_WORKERS,
+    report: Optional[BatchReport] = None,
+) -> List[VideoTranscript]:
+    """URL 목록의 자막/제목을 워커 풀로 동시에 가져옴 (캐시에 있으면 건너뜀)"""
+    source = source or YouTubeSource()
+    cache = cache or TranscriptCache()
+    report = report if report is not None else BatchReport()
+    lock = threading.Lock()
+
+    video_urls: Dict[str, str] = {}
+    for url in urls:
+        video_id = get_video_id(url)
+        if video_id:
+            video_urls.setdefault(video_id, url)
+    report.videos = len(video_urls)
+
+    def load(video_id: str) -> Optional[VideoTranscript]:
+        cached = cache.get(video_id)
+        if cached is not None:
+            with lock:
+                report.cached += 1
+            return cached
+        url = video_urls[video_id]
+        try:
+            language, segments = source.fetch_transcript(video_id)
+            title = source.fetch_title(url)
+        except Exception as e:
+            with lock:
+                report.failed += 1
+                report.errors[video_id] = repr(e)
+            return None
+        if not segments:
+            with lock:
+                report.failed += 1
+                report.errors[video_id] = "No transcript available."
+            return None
+        transcript = VideoTranscript(video_id, url, title, language, segments)
+        cache.put(transcript)
+        with lock:
+            report.fetched += 1
+        return transcript
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(load, video_urls))
+    return [transcript for transcript in results if transcript is not None]
+
+
+def ingest_videos(
+    urls: List[str],
+    source=None,
+    chunker: Optional[ChunkerConfig] = None,
+    workers: int = DEFAULT_WORKERS,
+    cache_dir: str = CACHE_DIR,
+    vectorstore=None,
+    persist_dir: Optional[str] = None,
+    stats: Optional[ChunkStats] = None,
+    prune: bool = False,
+) -> Tuple[List[Document], BatchReport]:
+    """자막을 받아 청크로 만들고, vectorstore 를 주면 source="youtube" 로 적재
+
+    기본은 추가만 합니다. prune 이면 urls 를 전체 목록으로 보고 목록에 없는 영상의 청크를 지우는데,
+    실패한 영상이 하나라도 있으면 그 영상 청크까지 지워지지 않도록 삭제는 건너뜁니다.
+    """
+    started = time.perf_counter()
+    report = BatchReport()
+    transcripts = fetch_all(urls, source, TranscriptCache(cache_dir), workers, report)
+    documents = [doc for transcript in transcripts for doc in chunk_transcript(transcript, chunker)]
+    report.chunks = len(documents)
+    if stats is not None:
+        stats.sizes.extend(doc.metadata["tokens"] for doc in documents)
+
+    if vectorstore is not None:
+        from rag.ingest import (
+            PERSIST_DIR,
+            IngestReport,
+            Manifest,
+            add_documents,
+            build_search_indexes,
+            sync_documents,
+        )
+
+        persist_dir = persist_dir or PERSIST_DIR
+        manifest = Manifest.load(persist_dir)
+        if prune and report.failed:
+            print(f"가져오지 못한 영상이 {report.failed}개 있어 삭제(--prune)는 건너뛰고 추가만 합니다.")
+        if prune and not report.failed:
+            print(sync_documents(vectorstore, documents, manifest, source="youtube"))
+        else:
+            added_started = time.perf_counter()
+            new_ids = add_documents(vectorstore, documents, manifest, source="youtube")
+            if new_ids:
+                build_search_indexes(vectorstore, persist_dir, manifest.corpus_version)
+            print(IngestReport(
+                source="youtube",
+                total=len(documents),
+                added=len(new_ids),
+                unchanged=len(documents) - len(new_ids),
+                seconds=time.perf_counter() - added_started,
+                added_ids=new_ids,
+            ))
+
+    report.seconds = time.perf_counter() - started
+    return documents, report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="유튜브 자막을 벡터 스토어에 일괄 적재합니다.")
+    parser.add_argument("urls", nargs="*", help="유튜브 URL")
+    parser.add_argument("--file", help="한 줄에 URL 하나씩 적은 목록 파일")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--language", default="ko")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--no-store", action="store_true", help="벡터 스토어에 적재하지 않고 청크만 만듦")
+    parser.add_argument("--fake", action="store_true", help="네트워크 대신 가짜 전송 계층 사용 (벤치마크용)")
+    parser.add_argument("--prune", action="store_true", help="URL 목록을 전체 목록으로 보고 목록에 없는 영상 청크를 삭제")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    urls = list(args.urls)
+    if args.file:
+        urls += read_url_file(args.file)
+    if not urls:
+        parser.error("URL 또는 --file 을 지정하세요.")
+
+    source = FakeYouTubeSource() if args.fake else YouTubeSource(args.language, args.workers)
+    vectorstore = None
+    if not args.no_store:
+        from rag.ingest import open_vectorstore
+
+        vectorstore = open_vectorstore()
+
+    stats = ChunkStats()
+    _, report = ingest_videos(
+        urls, source, config_from_args(args), args.workers, args.cache_dir, vectorstore, stats=stats, prune=args.prune
+    )
+    print(report)
+    print(stats)
+    for video_id, error in report.errors.items():
+        print(f"  {video_id}: {error}")
+
+
+if __name__ == "__main__":
+    main()